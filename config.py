@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     BIRTHDAY_DATABASE: str = Field(default="database/birthdate_list.db", description="Path to birthday database")
 
     ADMIN_ID: int = Field(..., description="Telegram Admin User ID")
+
+    ACTIVITY_RETENTION_DAYS: int = Field(default=180, ge=30, description="How many days raw user activity events are kept")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -36,3 +38,4 @@ except Exception as e:
 TOKEN = settings.TOKEN
 BIRTHDAY_DATABASE = settings.BIRTHDAY_DATABASE
 ADMIN_ID = settings.ADMIN_ID
+ACTIVITY_RETENTION_DAYS = settings.ACTIVITY_RETENTION_DAYS
@@ -1,12 +1,13 @@
 from functools import wraps
 from aiogram import types
-from utils.database import check_user_exists, add_user_to_db
+from utils.repository import check_user_exists, add_user_to_db
 from utils.logger import write_user_log
+from utils.user_context import get_context_user_info
 
 def ensure_user_in_db(handler):
     """
     Декоратор: проверяет наличие пользователя в БД.
-    Если нет — добавляет.
+    Если нет — добавляет. В личных чатах это уже сделал UserContextMiddleware.
     """
 
     @wraps(handler)
@@ -14,8 +15,8 @@ def ensure_user_in_db(handler):
         user_id = message.from_user.id
         user_tag = message.from_user.username
         user_name = message.from_user.full_name
-        if not check_user_exists(user_id):
-            add_user_to_db(user_id, user_tag, user_name)
+        if get_context_user_info(user_id) is None and not await check_user_exists(user_id):
+            await add_user_to_db(user_id, user_tag, user_name)
             msg = f"Пользователь {user_name} ({user_id}) добавлен в базу данных"
             write_user_log(msg)
 
@@ -1,6 +1,6 @@
 # decorators/require_birthdate.py
 from functools import wraps
-from utils.database import get_user_info
+from utils.repository import get_current_user_info
 from utils.logger import write_user_log
 from keyboards.birthdate_required import get_birthdate_required_keyboard
 
@@ -25,7 +25,7 @@ def require_birthdate(mode: str = "info"):
         @wraps(func)
         async def wrapper(user, message_obj, *args, is_callback=False, **kwargs):
             user_id = user.id
-            user_info = get_user_info(user_id)
+            user_info = await get_current_user_info(user_id)
 
             if not user_info or not (user_info.get("user_day") and user_info.get("user_month") and user_info.get("user_year")):
                 text = messages.get(mode, messages["info"])
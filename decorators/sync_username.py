@@ -1,22 +1,28 @@
 from functools import wraps
-from utils.database import update_user_name, get_user_info
+from utils.repository import update_user_name, get_user_info
+from utils.user_context import get_context_user_info
 
 
 def sync_username(handler):
-    """Декоратор: сихронизирует username и fullname пользователя в БД"""
+    """
+    Декоратор: сихронизирует username и fullname пользователя в БД.
+    В личных чатах это уже сделал UserContextMiddleware.
+    """
     @wraps(handler)
     async def wrapper(event, *args, **kwargs):
         user_id = event.from_user.id
-        tg_username = event.from_user.username
-        tg_fullname = event.from_user.full_name
 
-        user_info = get_user_info(user_id)
-        db_username = user_info.get("user_tag")
-        db_fullname = user_info.get("user_name")
+        if get_context_user_info(user_id) is None:
+            tg_username = event.from_user.username
+            tg_fullname = event.from_user.full_name
 
-        # Если ник изменился → обновляем в БД
-        if tg_username != db_username or tg_fullname != db_fullname:
-            update_user_name(user_id, tg_username, tg_fullname)
+            user_info = await get_user_info(user_id) or {}
+            db_username = user_info.get("user_tag")
+            db_fullname = user_info.get("user_name")
+
+            # Если ник изменился → обновляем в БД
+            if tg_username != db_username or tg_fullname != db_fullname:
+                await update_user_name(user_id, tg_username, tg_fullname)
 
         return await handler(event, *args, **kwargs)
     return wrapper
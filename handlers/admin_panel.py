@@ -1,10 +1,14 @@
 from aiogram import types, Router, F, Bot
 from aiogram.filters import Command
 
-from utils.database import get_real_user_name
-from utils.database_utils.database_statistic import get_users_count, count_active_users, count_new_users, get_last_active_users, get_top_active_users, get_top_users_by_days
-from utils.database_utils.task_management import toggle_task, get_task_status
+from utils.repository import (get_real_user_name, get_users_count, count_active_users, count_new_users,
+                              get_last_active_users, get_top_active_users, get_top_users_by_days,
+                              toggle_task, get_all_tasks_status)
 from utils.logger import write_user_log
+from utils.database_utils.user_cache import get_user_cache_stats
+from utils.database_utils.activity_buffer import get_activity_buffer_stats
+from services.schedule_cache import get_schedule_cache_stats
+from utils.outbound_queue import get_outbound_stats
 
 from keyboards.back_to_menu import get_back_inline_keyboard
 from keyboards.admin_tasks_keyboard import get_admin_tasks_keyboard
@@ -56,29 +60,37 @@ async def send_admin_panel(
         message: types.Message,
         callback: types.CallbackQuery | None
 ):
-    full_name = get_real_user_name(user_id)
+    full_name = await get_real_user_name(user_id)
 
     # Получаем топ-5 последних пользователей
-    last_users = get_last_active_users(10)
+    last_users = await get_last_active_users(10)
     last_users_text = "\n".join([
         f"{i+1}. {u['user_name']} @{u['user_tag']}"
         for i, u in enumerate(last_users)
     ])
 
     # Получаем топ-5 активных пользователей
-    top_users = get_top_active_users(5)
+    top_users = await get_top_active_users(5)
     top_users_text = "\n".join([
         f"{i+1}. {u['user_name']} @{u['user_tag']} ({u['activity_count']} событий)"
         for i, u in enumerate(top_users)
     ])
     
     # Получаем топ-5 пользователей по количеству дней использования
-    top_days_users = get_top_users_by_days(5)
+    top_days_users = await get_top_users_by_days(5)
     top_days_text = "\n".join([
         f"{i+1}. {u['user_name']} @{u['user_tag']} ({u['days_count']} дней)"
         for i, u in enumerate(top_days_users)
     ])
     
+    users_count = await get_users_count()
+    new_users_count = await count_new_users(7)
+    active_users_count = await count_active_users(7)
+    cache_stats = get_user_cache_stats()
+    activity_stats = get_activity_buffer_stats()
+    schedule_stats = get_schedule_cache_stats()
+    outbound_stats = get_outbound_stats()
+
     # Создаем клавиатуру с кнопками управления
     from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
     
@@ -87,6 +99,10 @@ async def send_admin_panel(
         text="⚙️ Управление тасками",
         callback_data="admin_tasks"
     ))
+    builder.row(InlineKeyboardButton(
+        text="📢 Рассылки",
+        callback_data="admin_broadcasts"
+    ))
     builder.row(InlineKeyboardButton(
         text="⬅️ Назад в меню",
         callback_data="start"
@@ -95,12 +111,22 @@ async def send_admin_panel(
     text = (
         f"Привет, {full_name}!\n"
         "Это панель управления ботом.\n\n"
-        f"👥 Количество пользователей: {get_users_count()}\n"
-        f"👥 Количество новых пользователей за неделю: {count_new_users(7)}\n"
-        f"👥 Количество уникальных пользователей за неделю: {count_active_users(7)}\n"
+        f"👥 Количество пользователей: {users_count}\n"
+        f"👥 Количество новых пользователей за неделю: {new_users_count}\n"
+        f"👥 Количество уникальных пользователей за неделю: {active_users_count}\n"
         f"👥 Последние активные пользователи:\n{last_users_text}\n\n"
         f"🏆 Топ-5 самых активных пользователей за всё время:\n{top_users_text}\n\n"
-        f"📅 Топ-5 пользователей по количеству дней использования:\n{top_days_text}"
+        f"📅 Топ-5 пользователей по количеству дней использования:\n{top_days_text}\n\n"
+        f"🗄 Кэш профилей: {cache_stats['size']}/{cache_stats['max_size']}, "
+        f"попаданий {cache_stats['hits']}, промахов {cache_stats['misses']} ({cache_stats['hit_rate']}%)\n"
+        f"📝 Буфер активности: ожидают записи {activity_stats['pending']}, "
+        f"записано {activity_stats['written']}, отброшено {activity_stats['dropped']}\n"
+        f"📚 Кэш расписаний: {schedule_stats['size']}/{schedule_stats['max_size']}, "
+        f"попаданий {schedule_stats['hits']}, промахов {schedule_stats['misses']} ({schedule_stats['hit_rate']}%)\n"
+        f"📤 Очередь сообщений: ожидают {outbound_stats['pending']}, "
+        f"отправлено {outbound_stats['sent']}, ошибок {outbound_stats['failed']}, "
+        f"отложено по лимиту чата {outbound_stats['delayed']}, повторов {outbound_stats['retried']}, "
+        f"пропущено недоступных {outbound_stats['skipped_unreachable']}"
     )
 
     if callback:
@@ -115,16 +141,16 @@ async def _update_admin_tasks_menu(message: types.Message):
         "daily_schedule": "📅 Ежедневная рассылка расписания",
         "birthday_notifications": "🎂 Уведомления о днях рождения",
         "new_year_greetings": "🎄 Новогодние поздравления",
-        "schedule_notifications": "⏰ Уведомления о расписании занятий"
+        "schedule_notifications": "⏰ Уведомления о расписании занятий",
+        "activity_compaction": "🧹 Сжатие журнала активности",
+        "schedule_ingest": "📚 Загрузка изменённых расписаний"
     }
     
-    tasks_status = {}
-    for task_key in task_names.keys():
-        tasks_status[task_key] = get_task_status(task_key)
+    tasks_status = await get_all_tasks_status()
     
     status_lines = []
     for task_key, task_display_name in task_names.items():
-        status = tasks_status[task_key]
+        status = tasks_status.get(task_key, True)
         status_icon = "✅" if status else "❌"
         status_lines.append(f"{status_icon} {task_display_name}: {'Вкл.' if status else 'Выкл.'}")
     
@@ -134,7 +160,7 @@ async def _update_admin_tasks_menu(message: types.Message):
         "\n".join(status_lines)
     )
     
-    await message.edit_text(text=text, reply_markup=get_admin_tasks_keyboard())
+    await message.edit_text(text=text, reply_markup=get_admin_tasks_keyboard(tasks_status))
 
 
 @router.callback_query(F.data == "admin_tasks")
@@ -157,13 +183,15 @@ async def handle_toggle_task(callback: types.CallbackQuery):
         "daily_schedule": "Ежедневная рассылка расписания",
         "birthday_notifications": "Уведомления о днях рождения",
         "new_year_greetings": "Новогодние поздравления",
-        "schedule_notifications": "Уведомления о расписании занятий"
+        "schedule_notifications": "Уведомления о расписании занятий",
+        "activity_compaction": "Сжатие журнала активности",
+        "schedule_ingest": "Загрузка изменённых расписаний"
     }
     
     task_display_name = task_names.get(task_key, task_key)
     
     # Переключаем таск
-    new_status = toggle_task(task_key)
+    new_status = await toggle_task(task_key)
     
     status_text = "включен" if new_status else "выключен"
     await callback.answer(f"Таск '{task_display_name}' {status_text}", show_alert=True)
@@ -0,0 +1,24 @@
+from aiogram import types, Router, F
+
+from utils.logger import write_user_log
+from utils.repository import set_user_reachable
+
+router = Router()
+
+# Статусы бота в личном чате: пользователь заблокировал бота / снова запустил его
+BOT_BLOCKED_STATUSES = {"kicked", "left"}
+BOT_ACTIVE_STATUSES = {"member"}
+
+
+@router.my_chat_member(F.chat.type == "private")
+async def bot_status_changed(event: types.ChatMemberUpdated):
+    """Обновить доступность пользователя, когда он блокирует или разблокирует бота"""
+    user_id = event.from_user.id
+    status = event.new_chat_member.status
+
+    if status in BOT_BLOCKED_STATUSES:
+        await set_user_reachable(user_id, False, "blocked")
+        write_user_log(f"Пользователь {event.from_user.full_name} ({user_id}) заблокировал бота")
+    elif status in BOT_ACTIVE_STATUSES:
+        await set_user_reachable(user_id, True, "unblocked")
+        write_user_log(f"Пользователь {event.from_user.full_name} ({user_id}) разблокировал бота")
@@ -0,0 +1,62 @@
+from aiogram import types, Router, F
+
+from services.broadcast_service import (pause_broadcast, resume_broadcast, cancel_broadcast,
+                                        format_broadcast_progress)
+
+from utils.logger import write_user_log
+from utils.repository import get_broadcast_job, get_recent_broadcast_jobs
+
+from keyboards.admin_broadcasts_keyboard import get_broadcast_keyboard, get_broadcasts_list_keyboard
+
+from decorators.admin_only import admin_only
+
+router = Router()
+
+# Сколько последних рассылок показывать в списке
+RECENT_BROADCASTS_LIMIT = 5
+
+BROADCAST_ACTIONS = {
+    "pause": (pause_broadcast, "поставил на паузу"),
+    "resume": (resume_broadcast, "продолжил"),
+    "cancel": (cancel_broadcast, "отменил"),
+}
+
+
+@router.callback_query(F.data == "admin_broadcasts")
+@admin_only
+async def show_broadcasts(callback: types.CallbackQuery):
+    """Показать последние рассылки"""
+    jobs = await get_recent_broadcast_jobs(RECENT_BROADCASTS_LIMIT)
+    if jobs:
+        text = "\n\n".join(format_broadcast_progress(job) for job in jobs)
+    else:
+        text = "📢 Рассылок пока не было."
+    await callback.message.edit_text(text=text, reply_markup=get_broadcasts_list_keyboard(jobs))
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("broadcast:"))
+@admin_only
+async def manage_broadcast(callback: types.CallbackQuery):
+    """Показать рассылку или поставить её на паузу, продолжить, отменить"""
+    _, action, job_id = callback.data.split(":")
+    job_id = int(job_id)
+
+    alert = None
+    if action in BROADCAST_ACTIONS:
+        handler, action_text = BROADCAST_ACTIONS[action]
+        if await handler(job_id):
+            write_user_log(f"Админ {callback.from_user.full_name} ({callback.from_user.id}) {action_text} рассылку #{job_id}")
+        else:
+            alert = "Рассылка уже в другом состоянии"
+
+    job = await get_broadcast_job(job_id)
+    if job is None:
+        await callback.answer("Рассылка не найдена", show_alert=True)
+        return
+
+    text = format_broadcast_progress(job)
+    # Telegram не даёт отредактировать сообщение без изменений
+    if text != callback.message.text:
+        await callback.message.edit_text(text=text, reply_markup=get_broadcast_keyboard(job))
+    await callback.answer(alert, show_alert=alert is not None)
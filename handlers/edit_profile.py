@@ -2,7 +2,7 @@ from aiogram import types, Router
 from aiogram.fsm.context import FSMContext
 from utils.logger import write_user_log
 from utils.user_utils import get_user_name
-from utils.database import toggle_schedule_notifications, get_user_info, get_schedule_notifications_status
+from utils.repository import toggle_schedule_notifications, get_current_user_info, request_schedule_replan
 from keyboards.edit_profile import get_edit_profile_inline_keyboard
 
 from decorators.sync_username import sync_username
@@ -21,7 +21,8 @@ async def edit_profile_menu(callback: types.CallbackQuery, state: FSMContext):
 
     write_user_log(f"Пользователь {callback.from_user.full_name} ({user_id}) перешёл в меню редактирования профиля")
 
-    inline_keyboard = get_edit_profile_inline_keyboard(user_id)
+    user_info = await get_current_user_info(user_id) or {}
+    inline_keyboard = get_edit_profile_inline_keyboard(bool(user_info.get("schedule_notifications")))
 
     await callback.message.edit_text(
         f"Привет, {user_name}!\n\nВыбери, что хочешь изменить в профиле:",
@@ -39,8 +40,8 @@ async def toggle_schedule_notifications_handler(callback: types.CallbackQuery, s
     user_name = await get_user_name(callback)
     
     # Получаем текущий статус и информацию о пользователе
-    current_status = get_schedule_notifications_status(user_id)
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
+    current_status = bool(user_info and user_info.get("schedule_notifications"))
     
     # Если пользователь пытается включить рассылку, проверяем наличие группы
     if not current_status:  # Текущий статус выключен, значит пытается включить
@@ -52,7 +53,8 @@ async def toggle_schedule_notifications_handler(callback: types.CallbackQuery, s
             return
     
     # Переключаем настройку
-    new_status = toggle_schedule_notifications(user_id)
+    new_status = await toggle_schedule_notifications(user_id)
+    request_schedule_replan(user_id)
     
     status_text = "включена" if new_status else "выключена"
     await callback.answer(f"Рассылка расписания {status_text}", show_alert=True)
@@ -60,7 +62,7 @@ async def toggle_schedule_notifications_handler(callback: types.CallbackQuery, s
     write_user_log(f"Пользователь {callback.from_user.full_name} ({user_id}) {'включил' if new_status else 'выключил'} рассылку расписания")
     
     # Обновляем клавиатуру с новым статусом
-    inline_keyboard = get_edit_profile_inline_keyboard(user_id)
+    inline_keyboard = get_edit_profile_inline_keyboard(new_status)
     
     try:
         await callback.message.edit_text(
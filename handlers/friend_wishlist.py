@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, ReplyKeyboardRemove
 
 from utils.logger import write_user_log
-from utils.database import get_user_info, get_user_wishlist
+from utils.repository import get_current_user_info, get_user_wishlist
 
 from keyboards.friend_wishlist_keyboard import get_error_wishlist_keyboard
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
@@ -55,7 +55,7 @@ async def callback_friend_wishlist(callback: CallbackQuery, state: FSMContext):
 @require_birthdate("friend_wishlist")
 async def process_friend_wishlist(user, message_obj, state: FSMContext, is_callback=False):
     user_id = user.id
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
 
     user_tag = user_info.get("user_tag")
     msg_to_user = f"Пожалуйста, введите тег пользователя, чей вишлист вы хотите посмотреть.\nНапример, @{user_tag}" if user_tag else "Пожалуйста, введите тег пользователя, чей вишлист вы хотите посмотреть.\nНапример, @StankinMultiToolBot"
@@ -78,9 +78,9 @@ async def show_friend_wishlist(message: types.Message, state: FSMContext):
         return
 
     user_id = message.from_user.id
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
     user_tag = user_info.get("user_tag")
-    result = get_user_wishlist(friend_tag)
+    result = await get_user_wishlist(friend_tag)
 
     if friend_tag == user_tag:
         msg_to_user = own_wishlist_message(user_info.get("user_wishlist"))
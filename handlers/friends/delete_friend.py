@@ -2,7 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from utils.database_utils.friends import get_friends_info, delete_friend
+from utils.repository import get_friends_info, delete_friend
 
 from handlers.friends.friends_edit_menu import update_friends_view
 
@@ -22,7 +22,7 @@ async def callback_delete_friends(callback: CallbackQuery, state: FSMContext):
     Удаляет текущего друга.
     """
     user_id = callback.from_user.id
-    pairs = get_friends_info(user_id)
+    pairs = await get_friends_info(user_id)
     total = len(pairs)
 
     if total == 0:
@@ -36,10 +36,10 @@ async def callback_delete_friends(callback: CallbackQuery, state: FSMContext):
         idx = 0
 
     friend_id, friend_name = pairs[idx]
-    delete_friend(user_id, friend_id)
+    await delete_friend(user_id, friend_id)
 
     # после удаления перечитываем список и чиним индекс
-    pairs2 = get_friends_info(user_id)
+    pairs2 = await get_friends_info(user_id)
     total2 = len(pairs2)
     if total2 == 0:
         await state.update_data(current_index=0)
@@ -4,10 +4,8 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from states.friends_states import EditMenuState
-from utils.database_utils.friends import get_friends_info
-from utils.database import get_user_info
+from utils.repository import get_friends_info, get_user_info, get_user_rank_by_activity, get_user_rank_by_days
 from utils.date_utils import format_date
-from utils.database_utils.database_statistic import get_user_rank_by_activity, get_user_rank_by_days
 from keyboards.back_to_menu import get_back_inline_keyboard
 from decorators.sync_username import sync_username
 
@@ -23,7 +21,7 @@ async def callback_friend_profile(callback: CallbackQuery, state: FSMContext):
     """
     user_id = callback.from_user.id
 
-    pairs = get_friends_info(user_id)
+    pairs = await get_friends_info(user_id)
     total = len(pairs)
     if total == 0:
         await callback.message.edit_text("У тебя пока нет друзей.", reply_markup=get_back_inline_keyboard("friends_edit_menu"))
@@ -38,7 +36,7 @@ async def callback_friend_profile(callback: CallbackQuery, state: FSMContext):
 
     friend_id, friend_name = pairs[idx]
 
-    info = get_user_info(friend_id) or {}
+    info = await get_user_info(friend_id) or {}
     user_name = info.get("user_tag")
     user_name = f"@{user_name}" if user_name else ""
     day = info.get("user_day")
@@ -56,8 +54,8 @@ async def callback_friend_profile(callback: CallbackQuery, state: FSMContext):
         bday_str = format_date(day, month, year)
 
     # Получаем метрики друга
-    rank_activity = get_user_rank_by_activity(friend_id)
-    rank_days = get_user_rank_by_days(friend_id)
+    rank_activity = await get_user_rank_by_activity(friend_id)
+    rank_days = await get_user_rank_by_days(friend_id)
     
     rank_activity_text = f"#{rank_activity}" if rank_activity > 0 else "Нет данных"
     rank_days_text = f"#{rank_days}" if rank_days > 0 else "Нет данных"
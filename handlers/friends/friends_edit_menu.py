@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from utils.user_utils import get_user_name
-from utils.database_utils.friends import get_friends_info
+from utils.repository import get_friends_info
 
 from keyboards.friends_menu_keyboards import get_edit_menu_keyboard
 
@@ -48,7 +48,7 @@ async def friends_nav(callback: CallbackQuery, state: FSMContext):
     Листаем выбранного друга в списке (вперёд/назад в пределах страницы или глобально).
     """
     user_id = callback.from_user.id
-    friends = get_friends_info(user_id)
+    friends = await get_friends_info(user_id)
     total = len(friends)
 
     if total <= 1:
@@ -70,7 +70,7 @@ async def friends_page_nav(callback: CallbackQuery, state: FSMContext):
     Переключение страниц списка друзей (по 10 на страницу).
     """
     user_id = callback.from_user.id
-    friends = get_friends_info(user_id)
+    friends = await get_friends_info(user_id)
     total = len(friends)
     total_pages = (total + FRIENDS_PER_PAGE - 1) // FRIENDS_PER_PAGE if total else 0
 
@@ -103,7 +103,7 @@ async def update_friends_view(callback: CallbackQuery, state: FSMContext, prefix
 
     user = callback.from_user
     user_name = await get_user_name(user)
-    pairs = get_friends_info(user.id)
+    pairs = await get_friends_info(user.id)
     total = len(pairs)
 
     if total == 0:
@@ -5,7 +5,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from utils.logger import write_user_log
 from utils.user_utils import get_user_name
-from utils.database_utils.friends import get_upcoming_birthdays, get_today_birthdays
+from utils.repository import get_upcoming_birthdays, get_today_birthdays
 from keyboards.friends_menu_keyboards import get_friends_menu_keyboard
 
 # Декораторы
@@ -50,8 +50,8 @@ async def process_friends_menu(user, message_obj, is_callback=False):
     user_id = user.id
     user_name = await get_user_name(user)
 
-    upcoming_birthdays = get_upcoming_birthdays(user_id)
-    today_birthdays = get_today_birthdays(user_id)
+    upcoming_birthdays = await get_upcoming_birthdays(user_id)
+    today_birthdays = await get_today_birthdays(user_id)
 
     message_text = f"Привет, {user_name}!"
 
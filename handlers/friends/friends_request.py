@@ -6,12 +6,11 @@ from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramForbiddenError
 
 from utils.logger import write_user_log
-from utils.database import (get_user_info, get_id_from_username, check_user_by_username)
-
-from utils.database_utils.friends import (add_friend_to_user, add_friend_request,
-                                          check_existing_request, update_friend_request_status,
-                                          get_friend_id_from_request_id, check_existing_friend,
-                                          delete_friend_request)
+from utils.repository import (get_user_info, get_id_from_username, check_user_by_username,
+                              add_friend_to_user, add_friend_request,
+                              check_existing_request, update_friend_request_status,
+                              get_friend_id_from_request_id, check_existing_friend,
+                              delete_friend_request)
 
 from keyboards.friends_menu_keyboards import get_error_request_keyboard, get_request_keyboard, get_accept_request_keyboard
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
@@ -72,19 +71,19 @@ async def send_friend_request(message: Message, state: FSMContext):
             reply_markup=get_error_request_keyboard()
         )
         write_user_log(f"Пользователь {full_name} ({user_id}) ввёл свой username")
-    elif not check_user_by_username(friend_tag):
+    elif not await check_user_by_username(friend_tag):
         await message.answer(
             text="Пользователь не найден.",
             reply_markup=get_error_request_keyboard()
         )
         write_user_log(f"Пользователь {full_name} ({user_id}) ввёл несуществующий username")
     else:
-        friend_id = get_id_from_username(friend_tag)[0]
+        friend_id = (await get_id_from_username(friend_tag))[0]
 
-        sender_name = get_user_info(user_id).get("user_name")
-        receive_name = get_user_info(friend_id).get("user_name")
+        sender_name = (await get_user_info(user_id)).get("user_name")
+        receive_name = (await get_user_info(friend_id)).get("user_name")
 
-        if check_existing_friend(user_id, friend_id):
+        if await check_existing_friend(user_id, friend_id):
             write_user_log(f"Пользователь {full_name} ({user_id}) уже является другом пользователя {receive_name} ({friend_id})")
             await message.answer(
                 text=f"Вы уже являетесь друзьями с {receive_name}.",
@@ -93,7 +92,7 @@ async def send_friend_request(message: Message, state: FSMContext):
             return
 
         # Проверяем, не отправлял ли уже запрос
-        existing_request = check_existing_request(user_id, friend_id)
+        existing_request = await check_existing_request(user_id, friend_id)
         if existing_request:
             write_user_log(f"Пользователь {full_name} ({user_id}) отправил повторный запрос пользователю {receive_name} ({friend_id})")
             await message.answer(
@@ -103,7 +102,7 @@ async def send_friend_request(message: Message, state: FSMContext):
             return
 
         # Добавляем новый запрос
-        request_id = add_friend_request(user_id, friend_id)
+        request_id = await add_friend_request(user_id, friend_id)
 
         try:
             msg = f"Пользователь {sender_name} отправил Вам запрос в друзья!"
@@ -120,14 +119,14 @@ async def send_friend_request(message: Message, state: FSMContext):
             write_user_log(f"Пользователь {full_name} ({user_id}) успешно отправил запрос пользователю {receive_name} {(friend_id)}")
 
         except TelegramForbiddenError:
-            delete_friend_request(request_id)
+            await delete_friend_request(request_id)
             await message.answer(
                 f"⚠️ Не удалось отправить запрос пользователю {receive_name}.\n"
                 f"Пользователь, возможно, заблокировал меня(",
                 reply_markup=get_error_request_keyboard()
             )
         except Exception as e:
-            delete_friend_request(request_id)
+            await delete_friend_request(request_id)
             await message.answer(
                 f"⚠️ Не удалось отправить запрос пользователю {receive_name}.\n"
                 f"Попробуйте в другой раз.",
@@ -144,17 +143,17 @@ async def handle_friend_request_accept(callback: CallbackQuery):
     request_id = get_request_id_from_callback(callback)  # Получаем ID запроса
 
     # Обновляем статус запроса на "accepted"
-    update_friend_request_status(request_id, "accepted")
+    await update_friend_request_status(request_id, "accepted")
 
     # Получаем ID друга из запроса
-    friend_id = get_friend_id_from_request_id(request_id)
+    friend_id = await get_friend_id_from_request_id(request_id)
 
     # Добавляем обоих пользователей в друзья
-    add_friend_to_user(user_id, friend_id)
-    add_friend_to_user(friend_id, user_id)
+    await add_friend_to_user(user_id, friend_id)
+    await add_friend_to_user(friend_id, user_id)
 
-    receive_name = get_user_info(user_id).get("user_name")
-    sender_name = get_user_info(friend_id).get("user_name")
+    receive_name = (await get_user_info(user_id)).get("user_name")
+    sender_name = (await get_user_info(friend_id)).get("user_name")
 
     await callback.message.edit_text(f"Вы стали друзьями c пользователем {sender_name}!",
                                      reply_markup=get_accept_request_keyboard())
@@ -173,12 +172,12 @@ async def handle_friend_request_decline(callback: CallbackQuery):
     user_id = callback.from_user.id
     request_id = get_request_id_from_callback(callback)
 
-    update_friend_request_status(request_id, "declined")
+    await update_friend_request_status(request_id, "declined")
 
-    friend_id = get_friend_id_from_request_id(request_id)
+    friend_id = await get_friend_id_from_request_id(request_id)
 
-    receive_name = get_user_info(user_id).get("user_name")
-    sender_name = get_user_info(friend_id).get("user_name")
+    receive_name = (await get_user_info(user_id)).get("user_name")
+    sender_name = (await get_user_info(friend_id)).get("user_name")
 
     await callback.message.edit_text(f"Вы отклонили запрос пользователя {sender_name}!",
                                      reply_markup=get_accept_request_keyboard())
@@ -6,8 +6,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramForbiddenError
 
 from utils.logger import write_user_log
-from utils.database import get_user_info, update_user_wishlist
-from utils.database_utils.friends import (
+from utils.repository import (
+    get_user_info,
+    update_user_wishlist,
     add_wishlist_suggestion,
     get_wishlist_suggestion,
     update_wishlist_suggestion_status,
@@ -38,11 +39,11 @@ async def start_wishlist_suggestion(callback: CallbackQuery, state: FSMContext):
     friend_id = int(callback.data.split(":")[1])
     
     # Проверяем, что пользователь действительно друг
-    if not check_existing_friend(user_id, friend_id):
+    if not await check_existing_friend(user_id, friend_id):
         await callback.answer("Этот пользователь не в вашем списке друзей.", show_alert=True)
         return
     
-    friend_info = get_user_info(friend_id)
+    friend_info = await get_user_info(friend_id)
     if not friend_info:
         await callback.answer("Пользователь не найден.", show_alert=True)
         return
@@ -81,7 +82,7 @@ async def process_wishlist_suggestion(message: Message, state: FSMContext):
         return
     
     # Проверяем, что пользователь все еще друг
-    if not check_existing_friend(user_id, friend_id):
+    if not await check_existing_friend(user_id, friend_id):
         await message.answer("Этот пользователь больше не в вашем списке друзей.",
                            reply_markup=get_back_inline_keyboard("friends_edit_menu"))
         await state.clear()
@@ -95,7 +96,7 @@ async def process_wishlist_suggestion(message: Message, state: FSMContext):
                            reply_markup=get_cancel_inline_keyboard("friends_edit_menu"))
         return
     
-    friend_info = get_user_info(friend_id)
+    friend_info = await get_user_info(friend_id)
     if not friend_info:
         await message.answer("Пользователь не найден.",
                            reply_markup=get_back_inline_keyboard("friends_edit_menu"))
@@ -103,10 +104,10 @@ async def process_wishlist_suggestion(message: Message, state: FSMContext):
         return
     
     friend_name = friend_info.get("user_name", "пользователю")
-    sender_name = get_user_info(user_id).get("user_name", full_name)
+    sender_name = (await get_user_info(user_id)).get("user_name", full_name)
     
     # Добавляем предложение в БД
-    suggestion_id = add_wishlist_suggestion(user_id, friend_id, wishlist_text)
+    suggestion_id = await add_wishlist_suggestion(user_id, friend_id, wishlist_text)
     
     try:
         # Отправляем сообщение получателю
@@ -134,7 +135,7 @@ async def process_wishlist_suggestion(message: Message, state: FSMContext):
         )
         
     except TelegramForbiddenError:
-        delete_wishlist_suggestion(suggestion_id)
+        await delete_wishlist_suggestion(suggestion_id)
         await message.answer(
             f"⚠️ Не удалось отправить предложение вишлиста пользователю {friend_name}.\n"
             f"Пользователь, возможно, заблокировал бота.",
@@ -144,7 +145,7 @@ async def process_wishlist_suggestion(message: Message, state: FSMContext):
             f"Не удалось отправить предложение вишлиста от {user_id} к {friend_id}: пользователь заблокировал бота"
         )
     except Exception as e:
-        delete_wishlist_suggestion(suggestion_id)
+        await delete_wishlist_suggestion(suggestion_id)
         await message.answer(
             f"⚠️ Не удалось отправить предложение вишлиста пользователю {friend_name}.\n"
             f"Попробуйте в другой раз.",
@@ -162,7 +163,7 @@ async def handle_wishlist_suggestion_accept(callback: CallbackQuery):
     user_id = callback.from_user.id
     suggestion_id = int(callback.data.split(":")[1])
     
-    suggestion = get_wishlist_suggestion(suggestion_id)
+    suggestion = await get_wishlist_suggestion(suggestion_id)
     if not suggestion:
         await callback.answer("Предложение не найдено.", show_alert=True)
         return
@@ -181,14 +182,14 @@ async def handle_wishlist_suggestion_accept(callback: CallbackQuery):
     wishlist_text = suggestion["wishlist_text"]
     
     # Обновляем статус предложения
-    update_wishlist_suggestion_status(suggestion_id, "accepted")
+    await update_wishlist_suggestion_status(suggestion_id, "accepted")
     
     # Обновляем вишлист пользователя
-    update_user_wishlist(user_id, wishlist_text)
+    await update_user_wishlist(user_id, wishlist_text)
     
-    sender_info = get_user_info(sender_id)
+    sender_info = await get_user_info(sender_id)
     sender_name = sender_info.get("user_name", "пользователь") if sender_info else "пользователь"
-    receiver_name = get_user_info(user_id).get("user_name", callback.from_user.full_name)
+    receiver_name = (await get_user_info(user_id)).get("user_name", callback.from_user.full_name)
     
     # Уведомляем получателя
     await callback.message.edit_text(
@@ -221,7 +222,7 @@ async def handle_wishlist_suggestion_decline(callback: CallbackQuery):
     user_id = callback.from_user.id
     suggestion_id = int(callback.data.split(":")[1])
     
-    suggestion = get_wishlist_suggestion(suggestion_id)
+    suggestion = await get_wishlist_suggestion(suggestion_id)
     if not suggestion:
         await callback.answer("Предложение не найдено.", show_alert=True)
         return
@@ -239,11 +240,11 @@ async def handle_wishlist_suggestion_decline(callback: CallbackQuery):
     sender_id = suggestion["sender_id"]
     
     # Обновляем статус предложения
-    update_wishlist_suggestion_status(suggestion_id, "declined")
+    await update_wishlist_suggestion_status(suggestion_id, "declined")
     
-    sender_info = get_user_info(sender_id)
+    sender_info = await get_user_info(sender_id)
     sender_name = sender_info.get("user_name", "пользователь") if sender_info else "пользователь"
-    receiver_name = get_user_info(user_id).get("user_name", callback.from_user.full_name)
+    receiver_name = (await get_user_info(user_id)).get("user_name", callback.from_user.full_name)
     
     # Уведомляем получателя
     await callback.message.edit_text(
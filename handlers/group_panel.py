@@ -16,7 +16,7 @@ from utils.group_utils import load_groups, save_groups
 from handlers.start_menu import send_start_menu
 from utils.user_utils import get_user_name, is_user_group_admin
 from utils.logger import write_user_log
-from utils.database import get_users_by_group, get_approval_status, toggle_user_approval, update_real_user_name, get_real_user_name
+from utils.repository import get_users_by_group, toggle_user_approval, update_real_user_name, get_real_user_name
 from keyboards.group_panel_keyboards import get_edit_send_time_keyboard, ALLOWED_HOURS, _fmt_hour
 from states.group_panel_states import SendTimeState
 
@@ -87,7 +87,7 @@ async def send_admin_panel(
         [InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="start")]
     ])
 
-    user_name = get_real_user_name(user_id)
+    user_name = await get_real_user_name(user_id)
 
     text = (
         f"Привет, {user_name}!\n"
@@ -111,7 +111,7 @@ class EditState(StatesGroup):
 
 
 # Функция для создания клавиатуры
-def get_edit_keyboard(student_id: int):
+def get_edit_keyboard(approved: bool):
     """Создаёт клавиатуру с кнопками управления"""
     builder = InlineKeyboardBuilder()
 
@@ -128,7 +128,7 @@ def get_edit_keyboard(student_id: int):
     ))
 
     # Кнопка управления поздравлениями
-    status = "✅" if get_approval_status(student_id) else "🚫"
+    status = "✅" if approved else "🚫"
     builder.row(types.InlineKeyboardButton(
         text=f"{status} Поздравления",
         callback_data="toggle_approval"
@@ -154,7 +154,7 @@ async def handle_edit_group(callback: types.CallbackQuery, state: FSMContext):
         await callback.answer("❌ Доступ запрещён", show_alert=True)
         return
 
-    students = get_users_by_group(user_group)
+    students = await get_users_by_group(user_group)
     if not students:
         await callback.answer("❌ В группе нет студентов", show_alert=True)
         msg = f"Панель управления группы админа {callback.from_user.full_name} ({callback.from_user.id}) закрыта. В группе {user_group} нет студентов"
@@ -181,7 +181,7 @@ async def update_group_view(bot: Bot, chat_id: int, message_id: int, state: FSMC
     user_group = data['user_group']
     current_index = data['current_index']
 
-    students = get_users_by_group(user_group)
+    students = await get_users_by_group(user_group)
     if not students:
         await bot.edit_message_text(
             chat_id=chat_id,
@@ -203,7 +203,7 @@ async def update_group_view(bot: Bot, chat_id: int, message_id: int, state: FSMC
             chat_id=chat_id,
             message_id=message_id,
             text=f"Список студентов:\n\n{student_list}\n\nВыберите действие:",
-            reply_markup=get_edit_keyboard(students[current_index]['id'])
+            reply_markup=get_edit_keyboard(students[current_index]['approved'])
         )
     except TelegramBadRequest as e:
         if "message is not modified" not in str(e):
@@ -213,7 +213,7 @@ async def update_group_view(bot: Bot, chat_id: int, message_id: int, state: FSMC
 @router.callback_query(EditState.browsing, lambda c: c.data in ["move_up", "move_down"])
 async def handle_move(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    students = get_users_by_group(data['user_group'])
+    students = await get_users_by_group(data['user_group'])
 
     new_index = (data['current_index'] + (-1 if callback.data == "move_up" else 1)) % len(students)
 
@@ -231,7 +231,7 @@ async def handle_move(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(EditState.browsing, lambda c: c.data == "change_name")
 async def handle_change_name(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    students = get_users_by_group(data['user_group'])
+    students = await get_users_by_group(data['user_group'])
 
     await state.update_data(
         selected_student_id=students[data['current_index']]['id'],
@@ -267,7 +267,7 @@ async def handle_new_name(message: types.Message, state: FSMContext):
             pass
 
         # Получаем актуальный список студентов
-        students = get_users_by_group(data['user_group'])
+        students = await get_users_by_group(data['user_group'])
         current_index = data['current_index']
 
         # Создаем новое сообщение со списком
@@ -282,7 +282,7 @@ async def handle_new_name(message: types.Message, state: FSMContext):
         new_msg = await message.answer(
             f"❌ Имя не может быть пустым или совпадать с предыдущим\n\n"
             f"Список студентов:\n\n{student_list}\n\nВыберите действие:",
-            reply_markup=get_edit_keyboard(students[current_index]['id'])
+            reply_markup=get_edit_keyboard(students[current_index]['approved'])
         )
 
         # Обновляем состояние с новым message_id
@@ -293,7 +293,7 @@ async def handle_new_name(message: types.Message, state: FSMContext):
         await state.set_state(EditState.browsing)
         return
 
-    if update_real_user_name(data['selected_student_id'], new_name):
+    if await update_real_user_name(data['selected_student_id'], new_name):
 
         msg = (f"Админ {message.from_user.full_name} ({message.from_user.id}) группы {data['user_group']} "
                f"изменил имя пользователя {new_name} ({data['selected_student_id']})")
@@ -309,7 +309,7 @@ async def handle_new_name(message: types.Message, state: FSMContext):
             pass
 
         # Получаем актуальный список студентов
-        students = get_users_by_group(data['user_group'])
+        students = await get_users_by_group(data['user_group'])
         current_index = data['current_index']
 
         # Создаем новое сообщение со списком
@@ -324,7 +324,7 @@ async def handle_new_name(message: types.Message, state: FSMContext):
         new_msg = await message.answer(
             f"✅ Имя успешно обновлено!\n\n"
             f"Список студентов:\n\n{student_list}\n\nВыберите действие:",
-            reply_markup=get_edit_keyboard(students[current_index]['id'])
+            reply_markup=get_edit_keyboard(students[current_index]['approved'])
         )
 
         # Обновляем состояние с новым message_id
@@ -340,11 +340,11 @@ async def handle_new_name(message: types.Message, state: FSMContext):
 @router.callback_query(EditState.browsing, lambda c: c.data == "toggle_approval")
 async def handle_toggle_approval(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    students = get_users_by_group(data['user_group'])
+    students = await get_users_by_group(data['user_group'])
     current_student = students[data['current_index']]
 
     # Получаем новый статус
-    new_status = toggle_user_approval(current_student['id'])
+    new_status = await toggle_user_approval(current_student['id'])
 
     if new_status is not None:
         status_text = "разрешены" if new_status else "запрещены"
@@ -6,7 +6,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQu
 from states.group_registration import GroupRegistration
 from utils.logger import write_user_log
 from utils.group_utils import load_groups, save_groups, get_group_name_by_id, is_valid_group_name
-from utils.database import add_user_to_db, check_user_exists
+from utils.repository import add_user_to_db, check_user_exists
 from utils.group_utils import is_bot_admin, is_group_registered, is_group_file_exists
 from utils.user_utils import is_admin
 
@@ -4,7 +4,7 @@ from aiogram.filters import Command
 from aiogram.types import CallbackQuery
 
 from utils.logger import write_user_log
-from utils.database import get_user_info
+from utils.repository import get_current_user_info
 from utils.date_utils import format_date
 
 from keyboards.profile_menu_keyboard import get_profile_menu_inline_keyboard
@@ -37,7 +37,7 @@ async def process_user_info(user, message_obj, is_callback=False):
 
     user_id = user.id
     write_user_log(f"Пользователь {user.full_name} ({user_id}) запросил информацию об аккаунте")
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
 
     user_day = user_info.get("user_day")
     user_month = user_info.get("user_month")
@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, ReplyKeyboardRemove
 
 from utils.logger import write_user_log
-from utils.database import get_user_info, get_id_from_username
+from utils.repository import get_user_info, get_id_from_username
 
 from keyboards.friend_wishlist_keyboard import get_error_wishlist_keyboard
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
@@ -71,9 +71,9 @@ async def show_other_profile(message: types.Message, state: FSMContext):
         await message.answer("Тег должен содержать от 2 до 50 символов. Попробуйте еще раз.")
         return
 
-    other_id = get_id_from_username(other_user_name)[0]
+    other_id = (await get_id_from_username(other_user_name))[0]
 
-    info = get_user_info(other_id)
+    info = await get_user_info(other_id)
 
     if other_user_name == user_name:
         msg_to_user = get_own_profile_info(info)
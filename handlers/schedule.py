@@ -13,7 +13,7 @@ from keyboards.back_to_menu import get_back_inline_keyboard
 from states.schedule import ScheduleState
 from utils.logger import write_user_log
 from utils.user_utils import check_group_user
-from utils.database import get_user_info
+from utils.repository import get_user_info
 
 # Декораторы
 from decorators.private_only import private_only
@@ -81,7 +81,7 @@ async def handle_day_offset(callback: types.CallbackQuery, state: FSMContext, bo
     if not user_has_group:
         return
 
-    schedule_message = get_schedule_for_date(friend_id or callback.from_user.id, target_date.day, target_date.month)
+    schedule_message = await get_schedule_for_date(friend_id or callback.from_user.id, target_date.day, target_date.month)
 
     if not schedule_message:
         await callback.answer("Нет данных для этого дня", show_alert=True)
@@ -157,7 +157,7 @@ async def show_custom_schedule(message: types.Message, state: FSMContext, bot: B
         await tmp_msg.delete()
 
         # Получаем расписание
-        schedule_message = get_schedule_for_date(user_id, day, month)
+        schedule_message = await get_schedule_for_date(user_id, day, month)
 
         if schedule_message is None or schedule_message == "incorrect date":
             # Ошибка даты
@@ -243,11 +243,11 @@ async def show_schedule_for_date(
 ):
     target_user_id = friend_id if friend_id else user_id
 
-    schedule_message = get_schedule_for_date(target_user_id, target_date.day, target_date.month)
+    schedule_message = await get_schedule_for_date(target_user_id, target_date.day, target_date.month)
 
     if not schedule_message:
         if friend_id:
-            friend_name = get_user_info(friend_id)['user_name']
+            friend_name = (await get_user_info(friend_id))['user_name']
             error_msg = f"⚠️ Расписание пока недоступно для группы {friend_name}."
             back_to = "friends_edit_menu"
         else:
@@ -306,7 +306,7 @@ async def show_custom_schedule_for_date(
 ):
     """Отправляет/редактирует расписание с клавиатурой Вперёд/Назад + выбор новой даты + возврат в меню."""
 
-    schedule_message = get_schedule_for_date(user_id, target_date.day, target_date.month)
+    schedule_message = await get_schedule_for_date(user_id, target_date.day, target_date.month)
 
     if not schedule_message or schedule_message == "incorrect date":
         text = "⚠️ Расписание пока недоступно для вашей группы."
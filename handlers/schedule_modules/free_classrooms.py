@@ -0,0 +1,81 @@
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, Message
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+
+import re
+from datetime import datetime, date
+
+import pytz
+
+from states.free_classrooms import FreeClassroomsState
+
+from keyboards.cancel_keyboard import get_cancel_inline_keyboard
+from keyboards.schedule_keyboards import get_free_classrooms_keyboard
+
+from services.schedule_service import get_free_classrooms_message
+
+from utils.logger import write_user_log
+
+router = Router()
+
+tz_moscow = pytz.timezone("Europe/Moscow")
+
+# "10:20-12:00" или "20.10 10:20-12:00"
+INTERVAL_RE = re.compile(
+    r"^(?:(\d{1,2})\.(\d{1,2})\s+)?(\d{1,2}):(\d{2})\s*[-–—]\s*(\d{1,2}):(\d{2})$"
+)
+
+
+def _parse_interval(text: str) -> tuple[date, int, int] | None:
+    """Разбирает ввод пользователя в (дата, начало, конец в минутах) или None."""
+    match = INTERVAL_RE.match(text)
+    if not match:
+        return None
+
+    day, month, start_h, start_m, end_h, end_m = match.groups()
+    today = datetime.now(tz=tz_moscow).date()
+    try:
+        target_date = date(today.year, int(month), int(day)) if day else today
+    except ValueError:
+        return None
+
+    start_min = int(start_h) * 60 + int(start_m)
+    end_min = int(end_h) * 60 + int(end_m)
+    if int(start_h) > 23 or int(end_h) > 23 or int(start_m) > 59 or int(end_m) > 59 or start_min >= end_min:
+        return None
+    return target_date, start_min, end_min
+
+
+@router.callback_query(F.data == "free_classrooms")
+async def choose_free_classrooms_interval(callback: CallbackQuery, state: FSMContext):
+    """Запросить у пользователя дату и время"""
+    write_user_log(f"Пользователь {callback.from_user.full_name} ({callback.from_user.id}) нажал кнопку поиска свободных аудиторий")
+    await callback.answer()
+    await callback.message.edit_text(
+        text=(
+            "Введите время, на которое нужна аудитория, например 10:20-12:00 (на сегодня) "
+            "или 20.10 10:20-12:00 (на другую дату):"
+        ),
+        reply_markup=get_cancel_inline_keyboard("schedule")
+    )
+    await state.set_state(FreeClassroomsState.waiting_for_interval)
+
+
+@router.message(StateFilter(FreeClassroomsState.waiting_for_interval))
+async def process_interval_input(message: Message, state: FSMContext):
+    """Проверить введённое время и показать свободные аудитории"""
+    interval = _parse_interval((message.text or "").strip())
+    if interval is None:
+        await message.answer("⚠️ Не удалось разобрать время. Введите в формате 10:20-12:00 или 20.10 10:20-12:00:")
+        return
+
+    await state.clear()
+
+    target_date, start_min, end_min = interval
+    text = await get_free_classrooms_message(target_date, start_min, end_min)
+    await message.answer(text=text, reply_markup=get_free_classrooms_keyboard(), parse_mode="HTML")
+
+    write_user_log(
+        f"Пользователь {message.from_user.full_name} ({message.from_user.id}) искал свободные аудитории: {message.text}"
+    )
@@ -0,0 +1,121 @@
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, Message
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.exceptions import TelegramBadRequest
+
+from datetime import datetime
+
+import pytz
+
+from states.lecturer_schedule import LecturerScheduleState
+
+from keyboards.cancel_keyboard import get_cancel_inline_keyboard
+from keyboards.schedule_keyboards import get_lecturer_schedule_keyboard
+
+from services.schedule_service import get_lecturer_schedule_for_date
+
+from utils.logger import write_user_log
+
+from filters.require_fsm import RequireFSM
+
+router = Router()
+
+tz_moscow = pytz.timezone("Europe/Moscow")
+
+# Минимальная длина запроса (по одной букве находится слишком много преподавателей)
+MIN_QUERY_LENGTH = 3
+
+
+@router.callback_query(F.data == "lecturer_schedule")
+async def choose_lecturer_schedule(callback: CallbackQuery, state: FSMContext):
+    """Запросить у пользователя фамилию преподавателя"""
+    write_user_log(f"Пользователь {callback.from_user.full_name} ({callback.from_user.id}) нажал кнопку поиска преподавателя")
+    await callback.answer()
+    await callback.message.edit_text(
+        text="Введите фамилию преподавателя (например, Иванов или Иванов И.И.):",
+        reply_markup=get_cancel_inline_keyboard("schedule")
+    )
+    await state.set_state(LecturerScheduleState.waiting_for_lecturer)
+
+
+@router.message(StateFilter(LecturerScheduleState.waiting_for_lecturer))
+async def process_lecturer_input(message: Message, state: FSMContext):
+    """Проверить введённую фамилию и показать занятия преподавателя"""
+
+    lecturer_query = (message.text or "").strip()
+
+    if len(lecturer_query) < MIN_QUERY_LENGTH:
+        await message.answer(f"⚠️ Введите хотя бы {MIN_QUERY_LENGTH} буквы фамилии преподавателя:")
+        return
+
+    await state.update_data(lecturer_query=lecturer_query)
+
+    today = datetime.now(tz=tz_moscow)
+
+    await show_lecturer_schedule_for_date(
+        user_id=message.from_user.id,
+        user_fullname=message.from_user.full_name,
+        lecturer_query=lecturer_query,
+        target_date=today,
+        message=message
+    )
+
+
+@router.callback_query(
+    F.data.startswith("schedule_lecturer_date_"),
+    RequireFSM("lecturer_query")
+)
+async def handle_lecturer_schedule_date(callback: CallbackQuery, state: FSMContext):
+    """Обработка кнопок переключения дней"""
+    date_str = callback.data.split("_")[-1]
+    data = await state.get_data()
+    lecturer_query = data.get("lecturer_query")
+    target_date = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=tz_moscow)
+
+    await show_lecturer_schedule_for_date(
+        user_id=callback.from_user.id,
+        user_fullname=callback.from_user.full_name,
+        lecturer_query=lecturer_query,
+        target_date=target_date,
+        callback=callback
+    )
+
+
+@router.callback_query(F.data.startswith("schedule_lecturer_date_"))
+async def handle_lecturer_schedule_date_fallback(callback: CallbackQuery, state: FSMContext):
+    await choose_lecturer_schedule(callback, state)
+
+
+async def show_lecturer_schedule_for_date(
+        user_id: int, user_fullname: str, lecturer_query: str, target_date: datetime,
+        message: Message | None = None,
+        callback: CallbackQuery | None = None,
+):
+    """Отображает занятия преподавателя во всех группах на выбранную дату"""
+    try:
+        schedule_message = await get_lecturer_schedule_for_date(lecturer_query, target_date.date())
+
+        kb = get_lecturer_schedule_keyboard(target_date)
+
+        if callback:
+            await callback.message.edit_text(
+                text=schedule_message,
+                reply_markup=kb,
+                parse_mode="HTML"
+            )
+            await callback.answer()
+        elif message:
+            await message.answer(
+                text=schedule_message,
+                reply_markup=kb,
+                parse_mode="HTML"
+            )
+
+        write_user_log(
+            f"Пользователь {user_fullname} ({user_id}) просмотрел занятия преподавателя «{lecturer_query}» на {target_date.strftime('%d.%m')}"
+        )
+
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            write_user_log(f"Ошибка при показе занятий преподавателя: {e}", level="error")
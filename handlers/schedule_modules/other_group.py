@@ -14,7 +14,7 @@ from keyboards.cancel_keyboard import get_cancel_inline_keyboard
 from keyboards.schedule_keyboards import get_other_group_schedule_keyboard
 from keyboards.back_to_menu import get_back_inline_keyboard
 
-from services.schedule_service import format_schedule, load_schedule
+from services.schedule_service import render_schedule
 
 from utils.logger import write_user_log
 from utils.group_utils import is_valid_group_name
@@ -93,14 +93,19 @@ async def show_other_schedule_for_date(
 ):
     """Отображает расписание другой группы на выбранную дату"""
     try:
-        data = load_schedule(group_name + ".json")
-        schedule_message = format_schedule(
-            data,
+        schedule_message = await render_schedule(
+            group_name,
             day=target_date.day,
-            month=target_date.month,
-            group=group_name
+            month=target_date.month
         )
 
+        if schedule_message is None:
+            await (callback.message if callback else message).answer(
+                text=f"❌ Не найдено расписание для группы {group_name}.",
+                reply_markup=get_back_inline_keyboard("schedule")
+            )
+            return
+
         kb = get_other_group_schedule_keyboard(target_date)
 
         if callback:
@@ -121,11 +126,6 @@ async def show_other_schedule_for_date(
             f"Пользователь {user_fullname} ({user_id}) просмотрел расписание группы {group_name} на {target_date.strftime('%d.%m')}"
         )
 
-    except FileNotFoundError:
-        await (callback.message if callback else message).answer(
-            text=f"❌ Не найдено расписание для группы {group_name}.",
-            reply_markup=get_back_inline_keyboard("schedule")
-        )
     except TelegramBadRequest as e:
         if "message is not modified" not in str(e):
             print(f"TelegramBadRequest: {e}")
\ No newline at end of file
@@ -4,7 +4,7 @@ from aiogram.types import CallbackQuery
 
 from utils.logger import write_user_log
 from utils.user_utils import get_user_name
-from utils.database_utils.database_statistic import (
+from utils.repository import (
     get_user_rank_by_activity, 
     get_user_rank_by_days, 
     get_user_statistics
@@ -30,9 +30,9 @@ async def show_statistics(callback: CallbackQuery):
     write_user_log(f"Пользователь {callback.from_user.full_name} ({user_id}) запросил статистику")
     
     # Получаем статистику
-    stats = get_user_statistics(user_id)
-    rank_activity = get_user_rank_by_activity(user_id)
-    rank_days = get_user_rank_by_days(user_id)
+    stats = await get_user_statistics(user_id)
+    rank_activity = await get_user_rank_by_activity(user_id)
+    rank_days = await get_user_rank_by_days(user_id)
     
     # Формируем сообщение
     rank_activity_text = f"#{rank_activity}" if rank_activity > 0 else "Нет данных"
@@ -2,9 +2,11 @@ from aiogram import types, Router
 from aiogram.filters import Command
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from bot import bot
-from utils.logger import write_user_log
-from utils.database import get_all_user_ids
+from services.broadcast_service import start_broadcast, format_broadcast_progress
+
+from utils.repository import get_broadcast_job
+
+from keyboards.admin_broadcasts_keyboard import get_broadcast_keyboard
 
 from decorators.admin_only import admin_only
 
@@ -42,30 +44,18 @@ async def select_update(message: types.Message):
         "🏆 Удачи в этом семестре и приятного пользования ботом!"
     )
 
-    user_ids = get_all_user_ids()
-
-    successful = 0
-    failed = 0
-
-    for user_id in user_ids:
-        try:
-            await bot.send_message(
-                chat_id=user_id,
-                text=update_message,
-                parse_mode="HTML",
-                reply_markup=get_inline_keyboard()
-            )
-            successful += 1
-        except Exception as e:
-            msg = f"Не удалось отправить сообщение пользователю с ID {user_id}: {e}"
-            write_user_log(msg)
-            failed += 1
-
-    # Подтверждение для администратора
-    await message.answer(
-        f"📢 Рассылка завершена.\n✅ Успешно отправлено: {successful}\n❌ Ошибки: {failed}"
+    # Рассылка идёт в фоне; по её завершении админ получит итог
+    job_id = await start_broadcast(
+        "update",
+        update_message,
+        parse_mode="HTML",
+        reply_markup=get_inline_keyboard(),
+        created_by=message.from_user.id
     )
 
+    job = await get_broadcast_job(job_id)
+    await message.answer(format_broadcast_progress(job), reply_markup=get_broadcast_keyboard(job))
+
 
 def get_inline_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -5,7 +5,7 @@ from aiogram.types import CallbackQuery, ReplyKeyboardRemove
 
 from utils.logger import write_user_log
 from utils.group_utils import is_valid_group_name, is_group_file_exists
-from utils.database import set_user_group_subgroup
+from utils.repository import set_user_group_subgroup, request_schedule_replan
 from states.group_state import GroupState
 
 from keyboards.back_to_menu import get_back_inline_keyboard
@@ -80,7 +80,8 @@ async def process_subgroup_input(message: types.Message, state: FSMContext):
     elif user_subgroup == "Б":
         db_subgroup = "B"
 
-    set_user_group_subgroup(message.from_user.id, user_group, db_subgroup)
+    await set_user_group_subgroup(message.from_user.id, user_group, db_subgroup)
+    request_schedule_replan(message.from_user.id)
 
     msg = f"Пользователь {message.from_user.full_name} ({message.from_user.id}) указал группу: {user_group}, подгруппа: {user_subgroup}"
     write_user_log(msg)
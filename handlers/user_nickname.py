@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 
 from utils.logger import write_user_log
-from utils.database import update_cust_user_name
+from utils.repository import update_cust_user_name
 
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
 from keyboards.back_to_menu import get_back_inline_keyboard
@@ -66,7 +66,7 @@ async def show_user_nickname(message: types.Message, state: FSMContext):
 
     UserID = message.from_user.id
 
-    update_cust_user_name(UserID, new_wishlist)
+    await update_cust_user_name(UserID, new_wishlist)
 
     await message.answer(f"Ваш новый никнейм успешно сохранен: {new_wishlist}", reply_markup=get_back_inline_keyboard("info"))
     msg = f"Пользователь {message.from_user.full_name} ({UserID}) установил новый никнейм: {new_wishlist}"
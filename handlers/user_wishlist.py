@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, ReplyKeyboardRemove
 
 from utils.logger import write_user_log
-from utils.database import update_user_wishlist
+from utils.repository import update_user_wishlist
 
 from keyboards.back_to_menu import get_back_inline_keyboard
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
@@ -67,7 +67,7 @@ async def show_user_wishlist(message: types.Message, state: FSMContext):
 
     UserID = message.from_user.id
 
-    update_user_wishlist(UserID, new_wishlist)
+    await update_user_wishlist(UserID, new_wishlist)
     await message.answer(f"Ваш новый вишлист успешно сохранен: {new_wishlist}", reply_markup=get_back_inline_keyboard("info"))
     msg = f"Пользователь {message.from_user.full_name} ({UserID}) установил новый вишлист: {new_wishlist}"
     write_user_log(msg)
@@ -0,0 +1,38 @@
+# keyboards/admin_broadcasts_keyboard.py
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from utils.database_utils.broadcasts import BROADCAST_RUNNING, BROADCAST_PAUSED
+
+
+def get_broadcast_keyboard(job: dict) -> InlineKeyboardMarkup:
+    """Создает клавиатуру управления рассылкой."""
+    job_id = job["id"]
+    builder = InlineKeyboardBuilder()
+
+    if job["status"] == BROADCAST_RUNNING:
+        builder.button(text="⏸ Пауза", callback_data=f"broadcast:pause:{job_id}")
+    elif job["status"] == BROADCAST_PAUSED:
+        builder.button(text="▶️ Продолжить", callback_data=f"broadcast:resume:{job_id}")
+    if job["status"] in (BROADCAST_RUNNING, BROADCAST_PAUSED):
+        builder.button(text="✖️ Отменить", callback_data=f"broadcast:cancel:{job_id}")
+
+    builder.button(text="🔄 Обновить", callback_data=f"broadcast:show:{job_id}")
+    builder.button(text="⬅️ К рассылкам", callback_data="admin_broadcasts")
+    builder.adjust(2, 2)
+    return builder.as_markup()
+
+
+def get_broadcasts_list_keyboard(jobs: list[dict]) -> InlineKeyboardMarkup:
+    """Создает клавиатуру со списком последних рассылок."""
+    builder = InlineKeyboardBuilder()
+    for job in jobs:
+        builder.row(InlineKeyboardButton(
+            text=f"📢 #{job['id']} ({job['kind']})",
+            callback_data=f"broadcast:show:{job['id']}"
+        ))
+    builder.row(InlineKeyboardButton(
+        text="⬅️ Назад в панель админа",
+        callback_data="admin_panel"
+    ))
+    return builder.as_markup()
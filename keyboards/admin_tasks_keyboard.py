@@ -2,19 +2,17 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from utils.database_utils.task_management import get_all_tasks_status
 
-
-def get_admin_tasks_keyboard() -> InlineKeyboardMarkup:
+def get_admin_tasks_keyboard(tasks_status: dict[str, bool]) -> InlineKeyboardMarkup:
     """Создает клавиатуру для управления тасками в админ-панели."""
-    tasks_status = get_all_tasks_status()
-    
     # Названия тасков для отображения
     task_names = {
         "daily_schedule": "📅 Ежедневная рассылка расписания",
         "birthday_notifications": "🎂 Уведомления о днях рождения",
         "new_year_greetings": "🎄 Новогодние поздравления",
-        "schedule_notifications": "⏰ Уведомления о расписании занятий"
+        "schedule_notifications": "⏰ Уведомления о расписании занятий",
+        "activity_compaction": "🧹 Сжатие журнала активности",
+        "schedule_ingest": "📚 Загрузка изменённых расписаний"
     }
     
     builder = InlineKeyboardBuilder()
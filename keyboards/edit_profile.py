@@ -1,9 +1,8 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from utils.database import get_schedule_notifications_status
 
-def get_edit_profile_inline_keyboard(user_id: int):
+def get_edit_profile_inline_keyboard(schedule_notifications: bool):
     """Создает клавиатуру редактирования профиля с текущим статусом рассылки расписания"""
-    status = "✅" if get_schedule_notifications_status(user_id) else "❌"
+    status = "✅" if schedule_notifications else "❌"
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="📚 Номер группы", callback_data="group")],
         [InlineKeyboardButton(text="🎂 День рождения", callback_data="start_birthdate_input")],
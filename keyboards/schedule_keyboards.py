@@ -57,13 +57,15 @@ def get_week_days_keyboard(start_date: datetime | None = None,
     # Доп. кнопки
     builder.button(text="🔀 Другой день", callback_data="schedule_custom")
     builder.button(text="👥 Чужая группа", callback_data="other_group")
+    builder.button(text="👨‍🏫 Преподаватель", callback_data="lecturer_schedule")
+    builder.button(text="🏫 Свободные аудитории", callback_data="free_classrooms")
 
     if friend_id:
         builder.button(text="⬅️ Назад в меню", callback_data="friends_edit_menu")
     else:
         builder.button(text="⬅️ Назад в меню", callback_data="start")
 
-    builder.adjust(3, 3, 2, 2, 1)
+    builder.adjust(3, 3, 2, 2, 2, 1)
     return builder.as_markup()
 
 
@@ -123,3 +125,51 @@ def get_other_group_schedule_keyboard(target_date: datetime) -> InlineKeyboardMa
         ]
     ])
     return kb
+
+
+def get_lecturer_schedule_keyboard(target_date: datetime) -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="◀️ Назад",
+                callback_data=f"schedule_lecturer_date_{(target_date - timedelta(days=1)).strftime('%Y-%m-%d')}"
+            ),
+            InlineKeyboardButton(
+                text="▶️ Вперёд",
+                callback_data=f"schedule_lecturer_date_{(target_date + timedelta(days=1)).strftime('%Y-%m-%d')}"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="🔍 Другой преподаватель",
+                callback_data="lecturer_schedule"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="⬅️ Назад в меню",
+                callback_data="start"
+            )
+        ]
+    ])
+    return kb
+
+
+def get_free_classrooms_keyboard() -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="🔄 Другое время",
+                callback_data="free_classrooms"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="⬅️ Назад в меню",
+                callback_data="start"
+            )
+        ]
+    ])
+    return kb
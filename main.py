@@ -3,27 +3,39 @@ import asyncio
 
 from handlers import (start_menu, info, birthdate, group_registration, group_panel, edit_profile,
                       other_profile, user_wishlist, user_group, schedule, help, user_nickname,
-                      update, admin_panel, statistics)
+                      update, admin_panel, statistics, bot_status, broadcasts)
 from handlers.friends import friends_menu, friends_request, friends_edit_menu, delete_friend, friend_profile, wishlist_suggestion
 
-from handlers.schedule_modules import other_group, friend
+from handlers.schedule_modules import other_group, friend, lecturer, free_classrooms
 
 from utils.logger import write_user_log
 from utils import set_user_birthdate
 from utils.database_utils.init_database import init_database
+from utils.database_utils.connection import close_all_connections
+from utils.database_utils.db_executor import shutdown_db_executor
+from utils.database_utils.activity_buffer import run_activity_flusher, flush_activity
+from utils.outbound_queue import run_outbound_workers
+
+from services.schedule_ingest import ingest_schedules
+from services.broadcast_service import resume_broadcasts
 
 from tasks.daily_schedule import send_daily_schedule
 from tasks.birthday_notifications import check_birthdays
 from tasks.new_year_greetings import check_new_year
 from tasks.schedule_notifications import check_schedule_notifications
+from tasks.activity_compaction import compact_activity
+from tasks.schedule_ingest import watch_schedule_files
 
 from middlewares.user_activity import ActivityMiddleware
+from middlewares.user_context import UserContextMiddleware
 
 # Отключение ненужных логов от aiogram
 # logging.getLogger("aiogram.event").setLevel(logging.WARNING)
 
 # Подключение роутеров
 dp.update.middleware(ActivityMiddleware())
+dp.message.outer_middleware(UserContextMiddleware())
+dp.callback_query.outer_middleware(UserContextMiddleware())
 dp.include_router(start_menu.router)
 dp.include_router(info.router)
 dp.include_router(birthdate.router)
@@ -40,6 +52,8 @@ dp.include_router(user_nickname.router)
 dp.include_router(update.router)
 dp.include_router(admin_panel.router)
 dp.include_router(statistics.router)
+dp.include_router(bot_status.router)
+dp.include_router(broadcasts.router)
 dp.include_router(friends_request.router)
 dp.include_router(friends_menu.router)
 dp.include_router(friends_edit_menu.router)
@@ -48,6 +62,8 @@ dp.include_router(friend_profile.router)
 dp.include_router(wishlist_suggestion.router)
 dp.include_router(other_group.router)
 dp.include_router(friend.router)
+dp.include_router(lecturer.router)
+dp.include_router(free_classrooms.router)
 
 
 async def main():
@@ -55,14 +71,30 @@ async def main():
     write_user_log("Бот запущен!")
 
     init_database()
+    ingest_schedules()
+
+    # очередь исходящих сообщений нужна рассылкам, запускаем её первой
+    outbound_workers = asyncio.create_task(run_outbound_workers())
+    # рассылки, прерванные перезапуском, продолжаются с сохранённого места
+    await resume_broadcasts()
 
     # запускаем рассылку параллельно с ботом
     asyncio.create_task(send_daily_schedule())
     asyncio.create_task(check_birthdays())
     asyncio.create_task(check_new_year())
     asyncio.create_task(check_schedule_notifications())
+    asyncio.create_task(compact_activity())
+    asyncio.create_task(watch_schedule_files())
+    activity_flusher = asyncio.create_task(run_activity_flusher())
 
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        activity_flusher.cancel()
+        outbound_workers.cancel()
+        await flush_activity()
+        shutdown_db_executor()
+        close_all_connections()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
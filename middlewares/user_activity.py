@@ -1,6 +1,11 @@
 # middlewares/user_activity.py
+import asyncio
+
 from aiogram import BaseMiddleware, types
-from utils.database_utils.database_statistic import log_user_activity
+from utils.logger import write_user_log
+from utils.database_utils.activity_buffer import record_activity
+from utils.database_utils.reachability import is_user_reachable
+from utils.repository import set_user_reachable
 
 
 def _is_command(msg: types.Message) -> bool:
@@ -8,18 +13,38 @@ def _is_command(msg: types.Message) -> bool:
     return any(e.type == "bot_command" and e.offset == 0 for e in ents)
 
 
+# user_id -> задача, отмечающая пользователя снова доступным (ссылка держит задачу
+# до завершения, а повторные апдейты того же пользователя не запускают вторую запись)
+_pending_reachable: dict[int, asyncio.Task] = {}
+
+
+def _on_reachable_saved(user_id: int, task: asyncio.Task):
+    _pending_reachable.pop(user_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        write_user_log(f"Не удалось отметить пользователя {user_id} доступным: {task.exception()}", level="error")
+
+
+def _record(user_id: int, ev: str):
+    record_activity(user_id, ev)
+    # Пользователь снова пишет боту — значит, разблокировал его
+    if user_id not in _pending_reachable and not is_user_reachable(user_id, ignore_ttl=True):
+        task = asyncio.create_task(set_user_reachable(user_id, True, "active"))
+        _pending_reachable[user_id] = task
+        task.add_done_callback(lambda finished: _on_reachable_saved(user_id, finished))
+
+
 class ActivityMiddleware(BaseMiddleware):
     async def __call__(self, handler, event, data):
         if isinstance(event, types.Update):
             if event.callback_query:
                 cb = event.callback_query
                 if cb.message and cb.message.chat and cb.message.chat.type == "private" and cb.from_user:
-                    log_user_activity(cb.from_user.id, "callback")
+                    _record(cb.from_user.id, "callback")
 
             elif event.message:
                 msg = event.message
                 if msg.chat and msg.chat.type == "private" and msg.from_user:
                     ev = "command" if _is_command(msg) else "message"
-                    log_user_activity(msg.from_user.id, ev)
+                    _record(msg.from_user.id, ev)
 
         return await handler(event, data)
\ No newline at end of file
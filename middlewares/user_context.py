@@ -0,0 +1,39 @@
+# middlewares/user_context.py
+from aiogram import BaseMiddleware, types
+
+from utils.logger import write_user_log
+from utils.repository import sync_user
+from utils.user_context import set_context_user, reset_context_user
+
+
+def _is_private(event) -> bool:
+    if isinstance(event, types.Message):
+        return event.chat.type == "private"
+    if isinstance(event, types.CallbackQuery):
+        return bool(event.message and event.message.chat.type == "private")
+    return False
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Внешний middleware для message и callback_query.
+    В личных чатах одним обращением к БД добавляет пользователя (если его нет),
+    синхронизирует username/full_name (только если они изменились) и загружает
+    профиль. Хэндлеры читают профиль через get_current_user_info (utils.repository).
+    В data он намеренно не кладётся: функции, меняющие пользователя,
+    сбрасывают профиль в utils.user_context, а копия в data осталась бы устаревшей.
+    """
+    async def __call__(self, handler, event, data):
+        user = getattr(event, "from_user", None)
+        if user is None or user.is_bot or not _is_private(event):
+            return await handler(event, data)
+
+        user_info, created = await sync_user(user.id, user.username, user.full_name)
+        if created:
+            write_user_log(f"Пользователь {user.full_name} ({user.id}) добавлен в базу данных")
+
+        token = set_context_user(user.id, user_info)
+        try:
+            return await handler(event, data)
+        finally:
+            reset_context_user(token)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from aiogram.types import ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
-from utils.database import set_user_birthdate, get_user_info, update_is_approved
+from utils.repository import set_user_birthdate, get_current_user_info, update_is_approved
 from utils.logger import write_user_log
 from utils.date_utils import format_date
 
@@ -13,11 +13,11 @@ async def save_user_birthday(user_id: int, username: str, full_name: str, day: i
     Логика сохранения дня рождения пользователя + ответное сообщение.
     """
     # Сохраняем в БД
-    set_user_birthdate(user_id, day, month, year)
+    await set_user_birthdate(user_id, day, month, year)
 
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
     if user_info["is_approved"] is None or user_info["is_approved"] == "":
-        update_is_approved(user_id, True)
+        await update_is_approved(user_id, True)
 
     month_list = [
         "январь", "февраль", "март", "апрель", "май", "июнь",
@@ -0,0 +1,182 @@
+# services/broadcast_service.py
+"""
+Выполнение массовых рассылок (/update, новогодние поздравления).
+
+Рассылка — задание в БД (utils.database_utils.broadcasts) с курсором
+по user_id. Исполнитель берёт получателей пачками по BROADCAST_BATCH_SIZE,
+ставит всю пачку в очередь исходящих сообщений (она же задаёт темп)
+и после каждой пачки сохраняет счётчики. Перед каждой пачкой статус
+задания перечитывается из БД, так что пауза и отмена срабатывают на
+границе пачки. Задания в статусе running продолжаются после перезапуска
+бота (resume_broadcasts).
+
+В тексте можно использовать USER_NAME_PLACEHOLDER — он заменяется
+именем получателя.
+"""
+import asyncio
+import html
+
+from aiogram.types import InlineKeyboardMarkup
+
+from utils.logger import write_user_log
+from utils.outbound_queue import submit_message, send_message
+from utils.database_utils.db_executor import run_db
+from utils.database_utils.reachability import is_user_reachable
+from utils.database_utils.broadcasts import (
+    BROADCAST_RUNNING, BROADCAST_PAUSED, BROADCAST_CANCELLED, BROADCAST_DONE,
+    create_broadcast_job, get_broadcast_job, get_running_broadcast_job_ids, set_broadcast_status,
+    fetch_broadcast_recipients, advance_broadcast_cursor, add_broadcast_counts
+)
+
+# Сколько получателей обрабатывать за раз
+BROADCAST_BATCH_SIZE = 200
+# Заменяется в тексте рассылки именем получателя
+USER_NAME_PLACEHOLDER = "{user_name}"
+# Имя получателя, если в профиле его нет
+DEFAULT_USER_NAME = "студент"
+
+BROADCAST_STATUS_NAMES = {
+    BROADCAST_RUNNING: "▶️ идёт",
+    BROADCAST_PAUSED: "⏸ на паузе",
+    BROADCAST_CANCELLED: "✖️ отменена",
+    BROADCAST_DONE: "✅ завершена",
+}
+
+# job_id -> задача исполнителя
+_running: dict[int, asyncio.Task] = {}
+
+
+def _render_text(text: str, parse_mode: str | None, real_user_name: str | None, user_name: str | None) -> str:
+    if USER_NAME_PLACEHOLDER not in text:
+        return text
+    name = real_user_name or user_name or DEFAULT_USER_NAME
+    if parse_mode == "HTML":
+        name = html.escape(name)
+    return text.replace(USER_NAME_PLACEHOLDER, name)
+
+
+async def _send_batch(job: dict, batch: list[tuple], reply_markup: InlineKeyboardMarkup | None) -> tuple[int, int, int]:
+    """Отправляет пачку через очередь. Возвращает (отправлено, ошибок, пропущено)."""
+    recipients = []
+    sends = []
+    for user_id, real_user_name, user_name in batch:
+        if not is_user_reachable(user_id):
+            continue
+        recipients.append(user_id)
+        sends.append(submit_message(
+            user_id,
+            _render_text(job["text"], job["parse_mode"], real_user_name, user_name),
+            parse_mode=job["parse_mode"],
+            reply_markup=reply_markup
+        ))
+
+    sent = failed = 0
+    for user_id, result in zip(recipients, await asyncio.gather(*sends, return_exceptions=True)):
+        if isinstance(result, Exception):
+            write_user_log(f"Рассылка #{job['id']}: не удалось отправить сообщение пользователю {user_id}: {result}")
+            failed += 1
+        else:
+            sent += 1
+    return sent, failed, len(batch) - len(recipients)
+
+
+async def _run_broadcast(job_id: int):
+    job = await run_db(get_broadcast_job, job_id)
+    reply_markup = InlineKeyboardMarkup.model_validate_json(job["reply_markup"]) if job["reply_markup"] else None
+
+    while True:
+        job = await run_db(get_broadcast_job, job_id)
+        if job["status"] != BROADCAST_RUNNING:
+            write_user_log(f"📢 Рассылка #{job_id} остановлена: {job['status']}")
+            return
+
+        batch = await run_db(fetch_broadcast_recipients, job["cursor"], BROADCAST_BATCH_SIZE)
+        if not batch:
+            break
+
+        await run_db(advance_broadcast_cursor, job_id, batch[-1][0], len(batch))
+        counts = await _send_batch(job, batch, reply_markup)
+        await run_db(add_broadcast_counts, job_id, *counts)
+
+    if not await run_db(set_broadcast_status, job_id, BROADCAST_DONE):
+        # Поставлена на паузу или отменена после последней пачки
+        return
+    job = await run_db(get_broadcast_job, job_id)
+    write_user_log(f"📢 Рассылка #{job_id} завершена: отправлено {job['sent']}, ошибок {job['failed']}")
+
+    if job["created_by"]:
+        try:
+            await send_message(
+                job["created_by"],
+                f"📢 Рассылка завершена.\n✅ Успешно отправлено: {job['sent']}\n❌ Ошибки: {job['failed']}"
+            )
+        except Exception as e:
+            write_user_log(f"Не удалось сообщить о завершении рассылки #{job_id}: {e}")
+
+
+def _on_runner_done(job_id: int, task: asyncio.Task):
+    _running.pop(job_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        # Задание остаётся в статусе running и продолжится после перезапуска или resume
+        write_user_log(f"❌ Рассылка #{job_id} прервана ошибкой: {task.exception()}", level="error")
+
+
+def _start_runner(job_id: int):
+    task = _running.get(job_id)
+    if task is not None and not task.done():
+        return
+    task = asyncio.create_task(_run_broadcast(job_id))
+    _running[job_id] = task
+    task.add_done_callback(lambda finished: _on_runner_done(job_id, finished))
+
+
+async def start_broadcast(kind: str, text: str, parse_mode: str | None = None,
+                          reply_markup: InlineKeyboardMarkup | None = None, created_by: int | None = None) -> int:
+    """Создаёт задание рассылки всем пользователям и запускает его. Возвращает id задания."""
+    markup_json = reply_markup.model_dump_json(exclude_none=True) if reply_markup else None
+    job_id = await run_db(create_broadcast_job, kind, text, parse_mode, markup_json, created_by)
+    write_user_log(f"📢 Запущена рассылка #{job_id} ({kind})")
+    _start_runner(job_id)
+    return job_id
+
+
+async def pause_broadcast(job_id: int) -> bool:
+    """Ставит рассылку на паузу (после текущей пачки)."""
+    return await run_db(set_broadcast_status, job_id, BROADCAST_PAUSED)
+
+
+async def resume_broadcast(job_id: int) -> bool:
+    """Продолжает рассылку с сохранённого курсора (и перезапускает прерванную ошибкой)."""
+    job = await run_db(get_broadcast_job, job_id)
+    if job is None:
+        return False
+    if job["status"] == BROADCAST_PAUSED:
+        if not await run_db(set_broadcast_status, job_id, BROADCAST_RUNNING):
+            return False
+    elif job["status"] != BROADCAST_RUNNING:
+        return False
+    _start_runner(job_id)
+    return True
+
+
+async def cancel_broadcast(job_id: int) -> bool:
+    """Отменяет рассылку (после текущей пачки)."""
+    return await run_db(set_broadcast_status, job_id, BROADCAST_CANCELLED)
+
+
+async def resume_broadcasts():
+    """Продолжает рассылки, прерванные перезапуском бота. Вызывается при старте."""
+    for job_id in await run_db(get_running_broadcast_job_ids):
+        write_user_log(f"📢 Продолжение рассылки #{job_id} после перезапуска")
+        _start_runner(job_id)
+
+
+def format_broadcast_progress(job: dict) -> str:
+    """Текст с состоянием рассылки для админа."""
+    total = max(job["total"], job["processed"])
+    percent = round(job["processed"] / total * 100) if total else 100
+    return (
+        f"📢 Рассылка #{job['id']} ({job['kind']}): {BROADCAST_STATUS_NAMES.get(job['status'], job['status'])}\n"
+        f"Обработано {job['processed']} из {total} ({percent}%)\n"
+        f"✅ Отправлено: {job['sent']}  ❌ Ошибки: {job['failed']}  ⏭ Пропущено: {job['skipped']}"
+    )
@@ -0,0 +1,101 @@
+# services/classroom_index.py
+"""
+Индекс занятости аудиторий для поиска свободных аудиторий.
+
+Для каждой даты и аудитории хранятся занятые интервалы (минуты от полуночи),
+слитые в непересекающиеся и отсортированные по началу. Проверка
+«занята ли аудитория в [start, end)» — бинарный поиск, O(log n).
+
+Индекс строится из хранилища расписаний сразу на текущую неделю,
+другие даты догружаются по запросу. При загрузке или удалении расписания
+любой группы (меняется версия хранилища) индекс строится заново.
+Функции обращаются к БД и вызываются в пуле потоков БД (run_db).
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from utils.database_utils.schedule_store import (
+    get_schedule_store_version, get_all_classrooms, get_classroom_intervals
+)
+
+# Сколько дат (кроме текущей недели) держать в индексе
+CLASSROOM_INDEX_EXTRA_DAYS = 31
+
+tz_moscow = pytz.timezone("Europe/Moscow")
+
+# аудитория -> (начала, концы) слитых интервалов занятости
+DayIndex = dict[str, tuple[list[int], list[int]]]
+
+_lock = threading.Lock()
+_version = None
+_week_start: date | None = None
+_rooms: list[str] = []
+_days: OrderedDict[date, DayIndex] = OrderedDict()
+
+
+def _build_days(date_from: date, date_to: date) -> dict[date, DayIndex]:
+    """Строит индексы дат периода по одной выборке из БД."""
+    days: dict[date, DayIndex] = {}
+    current = date_from
+    while current <= date_to:
+        days[current] = {}
+        current += timedelta(days=1)
+
+    # Строки отсортированы по аудитории, дате и началу — интервалы сливаются за один проход
+    for classroom, lesson_date, start_min, end_min in get_classroom_intervals(date_from, date_to):
+        starts, ends = days[date.fromisoformat(lesson_date)].setdefault(classroom, ([], []))
+        if ends and start_min <= ends[-1]:
+            ends[-1] = max(ends[-1], end_min)
+        else:
+            starts.append(start_min)
+            ends.append(end_min)
+    return days
+
+
+def _get_day(target_date: date) -> tuple[list[str], DayIndex]:
+    """Возвращает список всех аудиторий и индекс занятости на дату."""
+    global _version, _week_start, _rooms
+
+    version = get_schedule_store_version()
+    today = datetime.now(tz=tz_moscow).date()
+    week_start = today - timedelta(days=today.weekday())
+
+    with _lock:
+        if version != _version or week_start != _week_start:
+            _version, _week_start = version, week_start
+            _rooms = sorted(get_all_classrooms())
+            _days.clear()
+            _days.update(_build_days(week_start, week_start + timedelta(days=6)))
+
+        day = _days.get(target_date)
+        if day is None:
+            day = _build_days(target_date, target_date)[target_date]
+            _days[target_date] = day
+            # Дни текущей недели лежат в начале и не вытесняются
+            while len(_days) > 7 + CLASSROOM_INDEX_EXTRA_DAYS:
+                oldest_extra = list(_days)[7]
+                del _days[oldest_extra]
+
+        return _rooms, day
+
+
+def find_free_classrooms(target_date: date, start_min: int, end_min: int) -> list[tuple[str, int | None]]:
+    """
+    Возвращает аудитории, свободные на дату в интервале [start_min, end_min),
+    в виде (аудитория, до скольких минут свободна; None — до конца дня).
+    """
+    rooms, day = _get_day(target_date)
+
+    free = []
+    for room in rooms:
+        starts, ends = day.get(room, ((), ()))
+        # Последний интервал, начинающийся раньше конца запрошенного
+        i = bisect_left(starts, end_min)
+        if i > 0 and ends[i - 1] > start_min:
+            continue
+        free.append((room, starts[i] if i < len(starts) else None))
+    return free
@@ -0,0 +1,59 @@
+# services/schedule_cache.py
+"""
+Кэш готовых текстов расписания в памяти процесса.
+
+Ключ — (группа, версия расписания, подгруппа, дата). Версия — mtime и размер
+файла, из которого загружено расписание (таблица schedule_files), поэтому
+после перезагрузки файла старые тексты больше не находятся и вытесняются.
+Хранится не больше RENDERED_CACHE_SIZE текстов, лишние вытесняются
+в порядке LRU.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+
+# Сколько готовых текстов расписания держать в памяти
+RENDERED_CACHE_SIZE = 2048
+
+# (группа, (mtime_ns, size), подгруппа, дата) -> текст
+_rendered: OrderedDict[tuple[str, tuple[int, int], str | None, date], str] = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def get_rendered_schedule(group: str, version: tuple[int, int], subgroup: str | None, target_date: date) -> str | None:
+    """Возвращает готовый текст расписания или None, если его нет в кэше."""
+    global _hits, _misses
+    key = (group, version, subgroup, target_date)
+    with _lock:
+        text = _rendered.get(key)
+        if text is None:
+            _misses += 1
+            return None
+        _rendered.move_to_end(key)
+        _hits += 1
+        return text
+
+
+def put_rendered_schedule(group: str, version: tuple[int, int], subgroup: str | None, target_date: date, text: str):
+    """Кладёт готовый текст расписания в кэш."""
+    key = (group, version, subgroup, target_date)
+    with _lock:
+        _rendered[key] = text
+        _rendered.move_to_end(key)
+        while len(_rendered) > RENDERED_CACHE_SIZE:
+            _rendered.popitem(last=False)
+
+
+def get_schedule_cache_stats() -> dict:
+    """Возвращает статистику кэша: размер, попадания, промахи и долю попаданий в %."""
+    with _lock:
+        total = _hits + _misses
+        return {
+            "size": len(_rendered),
+            "max_size": RENDERED_CACHE_SIZE,
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / total * 100, 1) if total else 0.0,
+        }
@@ -0,0 +1,170 @@
+# services/schedule_ingest.py
+"""
+Загрузка файлов расписания групп (<группа>.json) в хранилище расписаний БД.
+
+Каждый файл проверяется, правила дат (once / every / throughout)
+разворачиваются в конкретные дни, и занятия группы заменяются одной
+транзакцией. Файлы, чьи mtime и размер не изменились с прошлой загрузки,
+пропускаются; группы, чьих файлов больше нет, удаляются из хранилища.
+
+Запускается при старте бота, затем периодически таском
+tasks.schedule_ingest (так подхватываются файлы, изменённые без
+перезапуска), а также вручную:
+    python -m services.schedule_ingest [папка]
+"""
+import json
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from utils.database_utils.schedule_store import (
+    COMMON_SUBGROUP, get_schedule_versions, replace_group_lessons, delete_group_schedule
+)
+from utils.logger import write_user_log
+
+# Папка с файлами расписания (рабочая папка бота)
+SCHEDULE_DIR = "."
+# JSON-файлы в папке, которые не являются расписаниями групп
+NOT_SCHEDULE_FILES = {"groups.json", "groups_temp.json"}
+
+# Шаг повторения для правил дат, дней
+_RULE_STEP_DAYS = {
+    "every": 7,        # каждую неделю
+    "throughout": 14,  # через неделю
+}
+_TIME_RE = re.compile(r"^\d{1,2}:\d{2}$")
+
+
+def _parse_date(date_str: str) -> date:
+    return datetime.strptime(date_str, "%Y.%m.%d").date()
+
+
+def _parse_minutes(time_str: str) -> int:
+    """Переводит HH:MM в минуты от полуночи."""
+    if not isinstance(time_str, str) or not _TIME_RE.match(time_str):
+        raise ValueError(f"некорректное время {time_str!r}")
+    hours, minutes = map(int, time_str.split(":"))
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"некорректное время {time_str!r}")
+    return hours * 60 + minutes
+
+
+def _expand_dates(dates: List[Dict[str, str]]) -> set[date]:
+    """Разворачивает правила дат занятия в множество конкретных дат."""
+    if not isinstance(dates, list):
+        raise ValueError("поле dates должно быть списком")
+
+    result = set()
+    for date_info in dates:
+        freq = date_info.get("frequency")
+        date_str = date_info.get("date", "")
+
+        if freq == "once":
+            result.add(_parse_date(date_str))
+        elif freq in _RULE_STEP_DAYS:
+            start_str, end_str = date_str.split('-')
+            current, end = _parse_date(start_str), _parse_date(end_str)
+            if current > end:
+                raise ValueError(f"начало периода позже конца: {date_str}")
+            step = timedelta(days=_RULE_STEP_DAYS[freq])
+            while current <= end:
+                result.add(current)
+                current += step
+        else:
+            raise ValueError(f"неизвестная периодичность {freq!r}")
+    return result
+
+
+def build_lesson_rows(schedule: Any) -> list[tuple]:
+    """
+    Проверяет содержимое файла расписания и разворачивает его в строки
+    таблицы lessons (в порядке LESSON_COLUMNS). При ошибке — ValueError.
+    """
+    if not isinstance(schedule, list):
+        raise ValueError("ожидался список занятий")
+
+    rows = []
+    for number, subject in enumerate(schedule, start=1):
+        try:
+            title = subject["title"]
+            if not isinstance(title, str) or not title:
+                raise ValueError("пустое название")
+            start_min = _parse_minutes(subject["time"]["start"])
+            end_min = _parse_minutes(subject["time"]["end"])
+            if end_min < start_min:
+                raise ValueError("занятие заканчивается раньше, чем начинается")
+
+            for lesson_date in sorted(_expand_dates(subject["dates"])):
+                rows.append((
+                    subject.get("subgroup") or COMMON_SUBGROUP,
+                    lesson_date.isoformat(),
+                    start_min,
+                    end_min,
+                    title,
+                    subject.get("type"),
+                    subject.get("lecturer") or None,
+                    subject.get("classroom") or None,
+                ))
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"занятие №{number}: {e!r}") from e
+    return rows
+
+
+def _find_schedule_files(directory: str) -> dict[str, str]:
+    """Возвращает {группа: путь к файлу} для файлов расписания в папке."""
+    files = {}
+    for filename in os.listdir(directory):
+        if filename.endswith(".json") and filename not in NOT_SCHEDULE_FILES:
+            files[filename[:-len(".json")]] = os.path.join(directory, filename)
+    return files
+
+
+def ingest_schedules(directory: str = SCHEDULE_DIR) -> dict:
+    """
+    Загружает в БД изменившиеся файлы расписания из папки.
+    Возвращает количество загруженных, неизменившихся, удалённых
+    и ошибочных файлов и число загруженных занятий.
+    """
+    stats = {"loaded": 0, "unchanged": 0, "removed": 0, "failed": 0, "lessons": 0}
+    versions = get_schedule_versions()
+    files = _find_schedule_files(directory)
+
+    for group_name, path in sorted(files.items()):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if versions.get(group_name) == version:
+            stats["unchanged"] += 1
+            continue
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = build_lesson_rows(json.load(f))
+        except (OSError, ValueError) as e:
+            # Остаётся ранее загруженная версия расписания (если она была)
+            stats["failed"] += 1
+            write_user_log(f"❌ Расписание {path} не загружено: {e}", level="error")
+            continue
+
+        replace_group_lessons(group_name, version, rows)
+        stats["loaded"] += 1
+        stats["lessons"] += len(rows)
+
+    for group_name in versions.keys() - files.keys():
+        delete_group_schedule(group_name)
+        stats["removed"] += 1
+
+    if stats["loaded"] or stats["removed"] or stats["failed"]:
+        write_user_log(
+            f"📚 Загрузка расписаний: загружено {stats['loaded']} ({stats['lessons']} занятий), "
+            f"без изменений {stats['unchanged']}, удалено {stats['removed']}, ошибок {stats['failed']}"
+        )
+    return stats
+
+
+if __name__ == "__main__":
+    from utils.database_utils.init_database import init_database
+
+    init_database()
+    write_user_log(f"📚 Загрузка расписаний завершена: {ingest_schedules(sys.argv[1] if len(sys.argv) > 1 else SCHEDULE_DIR)}")
@@ -1,23 +1,32 @@
 from datetime import datetime, timedelta
-from utils.schedule_utils import is_group_file_exists
-from utils.database import get_user_info
-
-import json
-from datetime import datetime
+from utils.repository import get_current_user_info, get_schedule_version, get_group_lessons, find_lecturer_lessons
+from services.schedule_cache import get_rendered_schedule, put_rendered_schedule
+from services.classroom_index import find_free_classrooms
+from utils.database_utils.db_executor import run_db
+from utils.database_utils.schedule_store import LECTURER_LESSONS_LIMIT, minutes_to_time
+
+from datetime import date
+from html import escape
 from typing import List, Dict, Any
 import pytz
 
+# Сколько свободных аудиторий показывать в одном сообщении
+FREE_CLASSROOMS_SHOWN = 100
+
+# Словарь перевода типов занятий
+SUBJECT_TYPES = {
+    "Lecture": "Лекция",
+    "Seminar": "Семинар",
+    "Laboratory": "Лабораторная"
+}
+
 
-def get_schedule_for_date(user_id: int, day: int, month: int) -> str:
+async def get_schedule_for_date(user_id: int, day: int, month: int) -> str:
     """Возвращает расписание на указанную дату"""
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
     group, subgroup = user_info["user_group"], user_info["user_subgroup"]
 
-    if not is_group_file_exists(group):
-        return None
-
-    data = load_schedule(group + ".json")
-    return format_schedule(data, day, month, group, subgroup=subgroup)
+    return await render_schedule(group, day, month, subgroup=subgroup)
 
 def format_date(day, month, year=None):
     if year is None:
@@ -25,76 +34,35 @@ def format_date(day, month, year=None):
     return f"{day:02}.{month:02}.{year}"
 
 
-def load_schedule(filename: str) -> List[Dict[str, Any]]:
-    """Загружает расписание из JSON файла."""
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def parse_date_range(date_range: str) -> tuple[datetime, datetime]:
-    """Парсит диапазон дат формата YYYY.MM.DD-YYYY.MM.DD"""
-    start_str, end_str = date_range.split('-')
-    start_date = datetime.strptime(start_str, "%Y.%m.%d")
-    end_date = datetime.strptime(end_str, "%Y.%m.%d")
-    return start_date, end_date
-
-
-def is_subject_on_date(subject: Dict[str, Any], target_date: datetime) -> bool:
-    """Проверяет, проходит ли предмет в указанную дату."""
-    for date_info in subject["dates"]:
-        freq = date_info["frequency"]
-        date_str = date_info["date"]
-
-        if freq == "once":
-            # Проверяем точное совпадение даты
-            lesson_date = datetime.strptime(date_str, "%Y.%m.%d")
-            if lesson_date.date() == target_date.date():
-                return True
-
-        elif freq == "throughout":
-            # Проверяем, попадает ли дата в диапазон
-            start_date, end_date = parse_date_range(date_str)
-            if start_date.date() <= target_date.date() <= end_date.date():
-                # Исправляем проверку на занятия через неделю
-                delta_days = (target_date - start_date).days
-                if delta_days % 14 == 0:  # Каждые две недели
-                    return True
-
-        elif freq == "every":
-            # Проверяем, что день недели совпадает
-            start_date, end_date = parse_date_range(date_str)
-            if start_date.date() <= target_date.date() <= end_date.date():
-                delta_days = (target_date - start_date).days
-                if delta_days % 7 == 0:  # Каждую неделю
-                    return True
-
-    return False
-
-
-def format_schedule(schedule: List[Dict[str, Any]], day: int, month: int, group: str, subgroup: str = "Common") -> str:
-    """Форматирует расписание занятий в красивое сообщение с учетом подгруппы или всех занятий."""
+async def render_schedule(group: str, day: int, month: int, subgroup: str = "Common") -> str | None:
+    """
+    Возвращает текст расписания группы на дату (через кэш готовых сообщений)
+    или None, если расписание группы не загружено.
+    """
     try:
         tz_moscow = pytz.timezone("Europe/Moscow")  # Часовой пояс Москвы
-        current_year = datetime.now(tz=tz_moscow).year
-        target_date = datetime(current_year, month, day)
+        target_date = date(datetime.now(tz=tz_moscow).year, month, day)
     except ValueError:
         return "incorrect date"
 
-    # Словарь перевода типов занятий
-    subject_types = {
-        "Lecture": "Лекция",
-        "Seminar": "Семинар",
-        "Laboratory": "Лабораторная"
-    }
+    version = await get_schedule_version(group)
+    if version is None:
+        return None
+
+    text = get_rendered_schedule(group, version, subgroup, target_date)
+    if text is None:
+        lessons = await get_group_lessons(group, target_date, subgroup)
+        text = format_schedule(lessons, day, month, group, subgroup=subgroup)
+        put_rendered_schedule(group, version, subgroup, target_date, text)
+    return text
 
-    # Если subgroup == "Common", показываем все занятия (и A, и B, и Common)
-    if subgroup == "Common":
-        subjects_on_date = [subj for subj in schedule if is_subject_on_date(subj, target_date)]
-    else:
-        subjects_on_date = [
-            subj for subj in schedule if is_subject_on_date(subj, target_date) and
-            (subj["subgroup"] == subgroup or subj["subgroup"] == "Common")
-        ]
+
+def format_schedule(lessons: List[Dict[str, Any]], day: int, month: int, group: str, subgroup: str = "Common") -> str:
+    """
+    Форматирует занятия на дату (уже отобранные по подгруппе и отсортированные
+    по времени начала) в красивое сообщение.
+    """
+    subjects_on_date = lessons
 
     formatted_date = format_date(day, month)
 
@@ -107,14 +75,11 @@ def format_schedule(schedule: List[Dict[str, Any]], day: int, month: int, group:
         else:
             return f"📅 На {formatted_date} у подгруппы {subgroup_translated} занятий нет."
 
-    # Сортируем по времени начала
-    subjects_on_date.sort(key=lambda x: datetime.strptime(x["time"]["start"], "%H:%M"))
-
     formatted_subjects = []
     for subj in subjects_on_date:
         title = subj["title"]
         lecturer = subj["lecturer"] or "Не указан"
-        subject_type = subject_types.get(subj["type"], subj["type"])  # Перевод типа занятия
+        subject_type = SUBJECT_TYPES.get(subj["type"], subj["type"])  # Перевод типа занятия
         classroom = subj["classroom"] or "Не указана"
         time_start = subj["time"]["start"]
         time_end = subj["time"]["end"]
@@ -132,4 +97,69 @@ def format_schedule(schedule: List[Dict[str, Any]], day: int, month: int, group:
     if subgroup == "Common":
         return f"📅 Расписание группы {group} на {formatted_date}:\n\n" + "\n".join(formatted_subjects)
     else:
-        return f"📅 Расписание подгруппы {subgroup_translated} на {formatted_date}:\n\n" + "\n".join(formatted_subjects)
\ No newline at end of file
+        return f"📅 Расписание подгруппы {subgroup_translated} на {formatted_date}:\n\n" + "\n".join(formatted_subjects)
+
+
+async def get_lecturer_schedule_for_date(query: str, target_date: date) -> str:
+    """Возвращает занятия преподавателя (поиск по началу ФИО) во всех группах на дату"""
+    # Лишнее занятие сверх лимита показывает, что список обрезан
+    lessons = await find_lecturer_lessons(query, target_date, LECTURER_LESSONS_LIMIT + 1)
+    truncated = len(lessons) > LECTURER_LESSONS_LIMIT
+    return format_lecturer_schedule(lessons[:LECTURER_LESSONS_LIMIT], query, target_date.day, target_date.month, truncated)
+
+
+def format_lecturer_schedule(lessons: List[Dict[str, Any]], query: str, day: int, month: int,
+                             truncated: bool = False) -> str:
+    """
+    Форматирует занятия преподавателя на дату. Одно и то же занятие
+    у нескольких групп (общая лекция) выводится один раз со списком групп.
+    truncated — найдено больше занятий, чем показано: просим уточнить запрос.
+    """
+    formatted_date = format_date(day, month)
+
+    if not lessons:
+        return f"📅 На {formatted_date} занятий у преподавателя «{escape(query)}» не найдено."
+
+    merged: dict[tuple, list[str]] = {}
+    for subj in lessons:
+        key = (subj["time"]["start"], subj["time"]["end"], subj["title"], subj["type"], subj["lecturer"], subj["classroom"])
+        group = subj["group"]
+        if subj["subgroup"] != "Common":
+            # Переводим подгруппы A → А, B → Б
+            group += f" (подгруппа {({'A': 'А', 'B': 'Б'}).get(subj['subgroup'], subj['subgroup'])})"
+        merged.setdefault(key, []).append(group)
+
+    formatted_subjects = []
+    for (time_start, time_end, title, lesson_type, lecturer, classroom), groups in merged.items():
+        subject_type = SUBJECT_TYPES.get(lesson_type, lesson_type)
+        formatted_subjects.append(
+            f"⏰ <b>{time_start} — {time_end}</b>\n"
+            f" {escape(title)} ({escape(str(subject_type))})\n"
+            f" {escape(lecturer)}, ауд. {escape(classroom or 'Не указана')}\n"
+            f" 👥 {escape(', '.join(groups))}\n"
+        )
+    if truncated:
+        formatted_subjects.append(
+            f"⚠️ Показаны первые {LECTURER_LESSONS_LIMIT} занятий. Уточните ФИО преподавателя, чтобы увидеть остальные."
+        )
+
+    return f"📅 Занятия преподавателя «{escape(query)}» на {formatted_date}:\n\n" + "\n".join(formatted_subjects)
+
+
+async def get_free_classrooms_message(target_date: date, start_min: int, end_min: int) -> str:
+    """Возвращает список аудиторий, свободных на дату в указанное время"""
+    free = await run_db(find_free_classrooms, target_date, start_min, end_min)
+
+    period = f"{format_date(target_date.day, target_date.month)} с {minutes_to_time(start_min)} до {minutes_to_time(end_min)}"
+    if not free:
+        return f"🏫 Свободных аудиторий на {period} нет."
+
+    lines = []
+    for classroom, free_until in free[:FREE_CLASSROOMS_SHOWN]:
+        until = f"до {minutes_to_time(free_until)}" if free_until is not None else "до конца дня"
+        lines.append(f"🚪 <b>{escape(classroom)}</b> — свободна {until}")
+    if len(free) > FREE_CLASSROOMS_SHOWN:
+        lines.append(f"…и ещё {len(free) - FREE_CLASSROOMS_SHOWN}")
+
+    return f"🏫 Свободные аудитории на {period}:\n\n" + "\n".join(lines)
+
@@ -0,0 +1,5 @@
+from aiogram.fsm.state import State, StatesGroup
+
+
+class FreeClassroomsState(StatesGroup):
+    waiting_for_interval = State()
\ No newline at end of file
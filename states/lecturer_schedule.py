@@ -0,0 +1,5 @@
+from aiogram.fsm.state import State, StatesGroup
+
+
+class LecturerScheduleState(StatesGroup):
+    waiting_for_lecturer = State()
\ No newline at end of file
@@ -0,0 +1,83 @@
+# tasks/activity_compaction.py
+
+import asyncio
+import pytz
+
+from datetime import datetime, timedelta
+
+from config import ACTIVITY_RETENTION_DAYS
+from utils.logger import write_user_log
+from utils.repository import get_task_status, task_sleep
+from utils.database_utils.db_executor import run_db
+from utils.database_utils.maintenance import delete_old_activity_batch, incremental_vacuum
+from utils.database_utils.sent_notifications import prune_sent_notifications
+from utils.database_utils.delivery_failures import prune_delivery_failures
+
+tz_moscow = pytz.timezone("Europe/Moscow")
+
+# Сколько строк удалять одной транзакцией
+COMPACTION_BATCH_SIZE = 5000
+# Пауза между пачками, чтобы не занимать БД надолго, секунд
+COMPACTION_BATCH_PAUSE = 0.1
+# Сколько свободных страниц возвращать за один вызов incremental_vacuum
+VACUUM_PAGES_PER_STEP = 2000
+
+
+def _seconds_until_next_run(now: datetime) -> float:
+    """Сжатие выполняется раз в сутки в 04:00 по Москве, когда бот почти не используется."""
+    next_run = now.replace(hour=4, minute=0, second=0, microsecond=0)
+    if now >= next_run:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def compact_activity_once() -> int:
+    """
+    Удаляет старые сырые события пачками и старые записи журналов уведомлений
+    и недоставленных сообщений, возвращает место на диске. Возвращает число удалённых событий.
+    """
+    total_deleted = 0
+    while True:
+        deleted = await run_db(delete_old_activity_batch, ACTIVITY_RETENTION_DAYS, COMPACTION_BATCH_SIZE)
+        total_deleted += deleted
+        if deleted < COMPACTION_BATCH_SIZE:
+            break
+        await asyncio.sleep(COMPACTION_BATCH_PAUSE)
+
+    # Журнал отправленных уведомлений нужен только за последние дни
+    await run_db(prune_sent_notifications)
+    await run_db(prune_delivery_failures)
+
+    free_pages = await run_db(incremental_vacuum, VACUUM_PAGES_PER_STEP)
+    while free_pages > 0:
+        await asyncio.sleep(COMPACTION_BATCH_PAUSE)
+        remaining = await run_db(incremental_vacuum, VACUUM_PAGES_PER_STEP)
+        if remaining >= free_pages:
+            break
+        free_pages = remaining
+
+    return total_deleted
+
+
+async def compact_activity():
+    while True:
+        now = datetime.now(tz=tz_moscow)
+        time_to_sleep = _seconds_until_next_run(now)
+
+        # Проверяем, включен ли таск
+        if not await get_task_status("activity_compaction"):
+            await task_sleep("activity_compaction", time_to_sleep)
+            continue
+
+        write_user_log(f"Следующее сжатие журнала активности через {time_to_sleep} секунд")
+        # Если таск переключили во время сна — перепроверяем статус
+        if await task_sleep("activity_compaction", time_to_sleep):
+            continue
+
+        try:
+            deleted = await compact_activity_once()
+            write_user_log(
+                f"Сжатие журнала активности: удалено {deleted} событий старше {ACTIVITY_RETENTION_DAYS} дней"
+            )
+        except Exception as e:
+            write_user_log(f"Ошибка при сжатии журнала активности: {e}")
@@ -8,28 +8,38 @@ from aiogram.utils.keyboard import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime, timedelta
 
 from utils.logger import write_user_log
-from utils.database import check_users, get_user_info, check_users_in_7_days
+from utils.repository import check_users, get_users_info, check_users_in_7_days, get_list_friends, get_task_status, task_sleep
 from utils.group_utils import load_groups
-from utils.user_utils import is_user_accessible
-from utils.database_utils.friends import get_list_friends
-from utils.database_utils.task_management import get_task_status
-
-from bot import bot
+from utils.database_utils.reachability import is_user_reachable
+from utils.outbound_queue import submit_message
 
 tz_moscow = pytz.timezone("Europe/Moscow")
 
 
+async def _wait_sends(sends: list[tuple[str, asyncio.Future]]):
+    """
+    Ждёт сообщения, поставленные в очередь (темп задаёт очередь исходящих сообщений),
+    и пишет в лог результат каждого. Ошибка одного получателя не прерывает остальных.
+    """
+    results = await asyncio.gather(*(future for _, future in sends), return_exceptions=True)
+    for (description, _), result in zip(sends, results):
+        if isinstance(result, Exception):
+            write_user_log(f"{description} не отправлено: {result}")
+        else:
+            write_user_log(f"{description} отправлено")
+
+
 async def check_birthdays():
     while True:
         # Проверяем, включен ли таск
-        if not get_task_status("birthday_notifications"):
+        if not await get_task_status("birthday_notifications"):
             # Если таск выключен, проверяем раз в день
             now = datetime.now(tz=tz_moscow)
             next_run = now.replace(hour=8, minute=0, second=0, microsecond=0)
             if now >= next_run:
                 next_run += timedelta(days=1)
             time_to_sleep = (next_run - now).total_seconds()
-            await asyncio.sleep(time_to_sleep)
+            await task_sleep("birthday_notifications", time_to_sleep)
             continue
         
         now = datetime.now(tz=tz_moscow)
@@ -42,18 +52,24 @@ async def check_birthdays():
         msg = f"Следующая проверка дней рождения в {next_run} (через {time_to_sleep} секунд)"
         write_user_log(msg)
 
-        await asyncio.sleep(time_to_sleep)
+        # Если таск переключили во время сна — перепроверяем статус
+        if await task_sleep("birthday_notifications", time_to_sleep):
+            continue
 
         # Получаем всех пользователей с ДР сегодня
-        birthdays_today = check_users()
+        birthdays_today = await check_users()
 
         if birthdays_today:
             group_messages = {}  # {chat_id: [messages]}
+            sends = []  # [(описание, future)]
 
             groups = await load_groups()
+            users_info = await get_users_info(birthdays_today)
 
             for UserID in birthdays_today:
-                user_info = get_user_info(UserID)
+                user_info = users_info.get(int(UserID))
+                if not user_info:
+                    continue
 
                 # Блок отправки в группу
                 if user_info["is_approved"]:
@@ -72,7 +88,7 @@ async def check_birthdays():
                         user_name = user_info['user_name']
 
                     # Проверяем, доступен ли пользователь
-                    if not await is_user_accessible(UserID):
+                    if not is_user_reachable(UserID):
                         write_user_log(f"Пользователь {UserID} недоступен для поздравления")
                         continue
 
@@ -92,9 +108,8 @@ async def check_birthdays():
                     group_messages[chat_id].append((message, keyboard))
 
                 # Блок отправки друзьям
-                user_info = get_user_info(UserID)
                 user_name = user_info['user_name']
-                friend_ids = get_list_friends(UserID)
+                friend_ids = await get_list_friends(UserID)
                 if friend_ids:
                     for friend_id in friend_ids:
                         keyboard_friend = InlineKeyboardMarkup(inline_keyboard=[
@@ -106,12 +121,10 @@ async def check_birthdays():
                             f"🎉 У вашего друга {name_str} сегодня день рождения! 🎂\n"
                             "Обязательно поздравьте его! 🎁"
                         )
-                        await bot.send_message(
-                            chat_id=friend_id,
-                            text=msg_friend,
-                            reply_markup=keyboard_friend
-                        )
-                        write_user_log(f"Сообщение о дне рождения отправлено пользователю {friend_id}")
+                        sends.append((
+                            f"Сообщение о дне рождения пользователю {friend_id}",
+                            submit_message(chat_id=friend_id, text=msg_friend, reply_markup=keyboard_friend)
+                        ))
 
                 # Блок поздравления пользователя в личных сообщениях
                 msg_user = (
@@ -122,28 +135,35 @@ async def check_birthdays():
                 keyboard = InlineKeyboardMarkup(inline_keyboard=[
                             [InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="start")]
                         ])
-                await bot.send_message(
-                    chat_id=UserID,
-                    text=msg_user,
-                    reply_markup=keyboard
-                )
+                sends.append((
+                    f"Поздравление с днём рождения пользователю {UserID}",
+                    submit_message(chat_id=UserID, text=msg_user, reply_markup=keyboard)
+                ))
 
             # Отправляем сообщения в группы
             for chat_id, messages in group_messages.items():
                 for msg, kb in messages:
-                    await bot.send_message(chat_id=chat_id, text=msg, reply_markup=kb)
-                write_user_log(f"Сообщение о дне рождения отправлено в группу {chat_id}")
+                    sends.append((
+                        f"Сообщение о дне рождения в группу {chat_id}",
+                        submit_message(chat_id=chat_id, text=msg, reply_markup=kb)
+                    ))
+
+            await _wait_sends(sends)
 
         # Проверка дней рождения через неделю
-        upcoming_birthdays = check_users_in_7_days()
+        upcoming_birthdays = await check_users_in_7_days()
 
         if upcoming_birthdays:
             group_messages = {}  # {chat_id: [messages]}
+            sends = []  # [(описание, future)]
 
             groups = await load_groups()
+            users_info = await get_users_info(upcoming_birthdays)
 
             for UserID in upcoming_birthdays:
-                user_info = get_user_info(UserID)
+                user_info = users_info.get(int(UserID))
+                if not user_info:
+                    continue
                 if user_info["is_approved"]:
                     UserNAME = f"{user_info.get('real_user_name') or user_info.get('user_name')}" \
                                f"{' @' + user_info['user_tag'] if user_info.get('user_tag') else ''}"
@@ -170,10 +190,9 @@ async def check_birthdays():
                     group_messages[chat_id].append(message)
 
                 # Блок отправки друзьям
-                user_info = get_user_info(UserID)
                 user_name = user_info['user_name']
                 user_wishlist = user_info['user_wishlist'] or "Отсутствует"
-                friend_ids = get_list_friends(UserID)
+                friend_ids = await get_list_friends(UserID)
                 if friend_ids:
                     for friend_id in friend_ids:
                         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -186,15 +205,17 @@ async def check_birthdays():
                             f"Самое время готовить подарки! 🎁\n"
                             f"🎈 Вишлист: {user_wishlist}"
                         )
-                        await bot.send_message(
-                            chat_id=friend_id,
-                            text=msg_friend,
-                            reply_markup=keyboard
-                        )
-                        write_user_log(f"Сообщение о будущем дне рождения отправлено пользователю {friend_id}")
+                        sends.append((
+                            f"Сообщение о будущем дне рождения пользователю {friend_id}",
+                            submit_message(chat_id=friend_id, text=msg_friend, reply_markup=keyboard)
+                        ))
 
             # Отправляем сообщения в группы
             for chat_id, messages in group_messages.items():
                 for msg in messages:
-                    await bot.send_message(chat_id=chat_id, text=msg)
-                write_user_log(f"Сообщение о будущих именинниках отправлено в группу {chat_id}")
\ No newline at end of file
+                    sends.append((
+                        f"Сообщение о будущих именинниках в группу {chat_id}",
+                        submit_message(chat_id=chat_id, text=msg)
+                    ))
+
+            await _wait_sends(sends)
\ No newline at end of file
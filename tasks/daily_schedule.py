@@ -4,19 +4,14 @@ from datetime import datetime, timedelta
 import pytz
 
 from utils.logger import write_user_log  # Функция логирования
-from utils.schedule_utils import load_groups, is_group_file_exists
-from services.schedule_service import format_schedule, load_schedule
-from utils.database_utils.task_management import get_task_status
+from utils.schedule_utils import load_groups
+from services.schedule_service import render_schedule
+from utils.repository import get_task_status, task_sleep, claim_notification
 
-from bot import bot  # Импорт бота для отправки сообщений
+from utils.outbound_queue import submit_message
 
 tz_moscow = pytz.timezone("Europe/Moscow")
 
-# антидубль только "в этот час" для конкретной даты
-# ключ: (group_name, 'YYYY-MM-DD', hour)
-_sent_this_hour: set[tuple[str, str, int]] = set()
-
-
 def _now_msk() -> datetime:
     return datetime.now(tz=tz_moscow)
 
@@ -41,8 +36,8 @@ async def send_daily_schedule():
     while True:
         try:
             # Проверяем, включен ли таск
-            if not get_task_status("daily_schedule"):
-                await asyncio.sleep(3600)  # Спим час, если таск выключен
+            if not await get_task_status("daily_schedule"):
+                await task_sleep("daily_schedule", 3600)  # Спим час, если таск выключен
                 continue
             
             now = _now_msk()
@@ -51,15 +46,16 @@ async def send_daily_schedule():
                 next_20 = now.replace(hour=18, minute=0, second=0, microsecond=0)
                 if now >= next_20:
                     next_20 += timedelta(days=1)
-                await asyncio.sleep((next_20 - now).total_seconds())
+                await task_sleep("daily_schedule", (next_20 - now).total_seconds())
                 continue
 
             if now.minute != 0:
                 next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-                await asyncio.sleep((next_hour - now).total_seconds())
+                await task_sleep("daily_schedule", (next_hour - now).total_seconds())
                 continue
 
             groups = await load_groups()
+            sends = []  # [(группа, chat_id, дата, future)]
             for group_name, group_data in groups.items():
                 chat_id = group_data.get("chat_id")
                 send_hour = group_data.get("send_hour", 20)
@@ -79,45 +75,38 @@ async def send_daily_schedule():
                     continue
 
                 target_date = _compute_target_date(now)
-                key = (group_name, target_date.isoformat(), now.hour)
-
-                # антидубль ТОЛЬКО на этот час
-                if key in _sent_this_hour:
-                    continue
-
-                if not is_group_file_exists(group_name):
-                    write_user_log(f"⚠️ {group_name}: нет файла расписания.")
-                    _sent_this_hour.add(key)
-                    continue
 
                 try:
-                    data = load_schedule(f"{group_name}.json")
-                    schedule_text = format_schedule(
-                        data, target_date.day, target_date.month, group_name, subgroup="Common"
+                    # антидубль ТОЛЬКО на этот час для конкретной даты
+                    # (журнал sent_notifications, переживает перезапуск бота)
+                    if not await claim_notification(chat_id, target_date, "daily_schedule", f"{now.hour:02d}"):
+                        continue
+
+                    schedule_text = await render_schedule(
+                        group_name, target_date.day, target_date.month, subgroup="Common"
                     )
-                    await bot.send_message(chat_id, schedule_text, parse_mode="HTML")
-                    write_user_log(
-                        f"✅ Расписание ({target_date.isoformat()}) отправлено в {group_name} (час={now.hour:02d})"
-                     )
+                    if schedule_text is None:
+                        write_user_log(f"⚠️ {group_name}: нет файла расписания.")
+                        continue
+                    sends.append((group_name, chat_id, target_date,
+                                  submit_message(chat_id, schedule_text, parse_mode="HTML")))
                 except Exception as e:
                     write_user_log(f"❌ Ошибка отправки в {group_name} (chat_id={chat_id}): {e}")
-                finally:
-                    _sent_this_hour.add(key)
-
-            # очистим старые ключи, чтобы set не разрастался
-            # (храним только текущую дату)
-            today_iso = _now_msk().date().isoformat()
-            _sent_this_hour_copy = set()
-            for g, d, h in _sent_this_hour:
-                if d == today_iso:
-                    _sent_this_hour_copy.add((g, d, h))
-            _sent_this_hour.clear()
-            _sent_this_hour.update(_sent_this_hour_copy)
+
+            # Группы получают расписание параллельно: темп задаёт очередь исходящих сообщений
+            results = await asyncio.gather(*(future for *_, future in sends), return_exceptions=True)
+            for (group_name, chat_id, target_date, _), result in zip(sends, results):
+                if isinstance(result, Exception):
+                    write_user_log(f"❌ Ошибка отправки в {group_name} (chat_id={chat_id}): {result}")
+                else:
+                    write_user_log(
+                        f"✅ Расписание ({target_date.isoformat()}) отправлено в {group_name} (час={now.hour:02d})"
+                    )
 
             # спим ровно до следующего часа
             now2 = _now_msk()
             next_hour = (now2 + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-            await asyncio.sleep((next_hour - now2).total_seconds())
+            await task_sleep("daily_schedule", (next_hour - now2).total_seconds())
 
         except Exception as e:
             write_user_log(f"❌ Ошибка планировщика расписаний: {e}")
@@ -0,0 +1,37 @@
+# tasks/schedule_ingest.py
+
+from utils.logger import write_user_log
+from utils.repository import get_task_status, task_sleep, request_schedule_replan
+from utils.database_utils.db_executor import run_db
+from services.schedule_ingest import ingest_schedules
+
+# Как часто проверять файлы расписания на изменения, секунд
+SCHEDULE_INGEST_INTERVAL = 60
+
+
+async def watch_schedule_files():
+    """
+    Раз в SCHEDULE_INGEST_INTERVAL секунд загружает изменившиеся файлы расписания.
+    Неизменившиеся файлы пропускаются по mtime и размеру, так что проверка стоит
+    несколько stat. Загрузка меняет версию хранилища — по ней обновляются индекс
+    свободных аудиторий и кэш отрисованных расписаний, а планировщик уведомлений
+    пересчитывает план на сегодня.
+    """
+    while True:
+        # Проверяем, включен ли таск
+        if not await get_task_status("schedule_ingest"):
+            await task_sleep("schedule_ingest", 600)
+            continue
+
+        # Если таск переключили во время сна — перепроверяем статус
+        if await task_sleep("schedule_ingest", SCHEDULE_INGEST_INTERVAL):
+            continue
+
+        try:
+            stats = await run_db(ingest_schedules)
+        except Exception as e:
+            write_user_log(f"Ошибка при загрузке расписаний: {e}")
+            continue
+
+        if stats["loaded"] or stats["removed"]:
+            request_schedule_replan()
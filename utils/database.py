@@ -1,45 +1,52 @@
 import sqlite3
 import pytz
 from datetime import datetime, timedelta
+from typing import Iterator
 
-from config import BIRTHDAY_DATABASE
+from utils.database_utils.connection import db_cursor
+from utils.database_utils.user_cache import (get_cached_user, put_user, invalidate_user,
+                                             clear_user_cache, get_generation)
+from utils.database_utils.reachability import get_unreachable_since
 
 tz_moscow = pytz.timezone("Europe/Moscow") # Часовой пояс Москвы
 
+# Сколько id передавать в одном запросе IN (...) (лимит параметров SQLite — 999)
+IN_QUERY_CHUNK_SIZE = 500
+# Сколько строк читать из курсора за один fetchmany при потоковой выборке
+STREAM_FETCH_SIZE = 500
 
-def set_user_birthdate(user_id, user_day, user_month, user_year):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+# Столбцы профиля пользователя в порядке, ожидаемом _row_to_user_info
+USER_INFO_COLUMNS = (
+    "user_tag, user_name, real_user_name, cust_user_name, "
+    "user_day, user_month, user_year, user_wishlist, user_group, user_subgroup, "
+    "is_approved, schedule_notifications"
+)
 
-    cur.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-    existing_user = cur.fetchone()
 
-    if existing_user:
-        cur.execute("UPDATE users SET user_day = ?, user_month = ?, user_year = ? WHERE user_id = ?",
-                    (user_day, user_month, user_year, user_id))
-    else:
-        cur.execute("INSERT INTO users (user_id, user_day, user_month, user_year, is_approved) VALUES (?, ?, ?, ?, ?, ?)",
-                    (user_id, user_day, user_month, user_year))
+def set_user_birthdate(user_id, user_day, user_month, user_year):
+    with db_cursor(commit=True) as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
+        existing_user = cur.fetchone()
 
-    con.commit()
-    cur.close()
-    con.close()
+        if existing_user:
+            cur.execute("UPDATE users SET user_day = ?, user_month = ?, user_year = ? WHERE user_id = ?",
+                        (user_day, user_month, user_year, user_id))
+        else:
+            cur.execute("INSERT INTO users (user_id, user_day, user_month, user_year, is_approved) VALUES (?, ?, ?, ?, ?, ?)",
+                        (user_id, user_day, user_month, user_year))
 
-def check_users():
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    invalidate_user(user_id)
 
+def check_users():
     now = datetime.now(tz=tz_moscow)
     today_day = now.day
     today_month = now.month
 
-    cur.execute("SELECT user_id FROM users WHERE user_day = ? AND user_month = ?",
-                (today_day, today_month))
-
-    birthdays = cur.fetchall()
+    with db_cursor() as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_day = ? AND user_month = ?",
+                    (today_day, today_month))
+        birthdays = cur.fetchall()
 
-    cur.close()
-    con.close()
     return [str(b[0]) for b in birthdays]
 
 
@@ -51,52 +58,28 @@ def check_users_in_7_days():
     target_day = target_date.day
     target_month = target_date.month
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute(
-        "SELECT user_id FROM users WHERE user_day = ? AND user_month = ?",
-        (target_day, target_month)
-    )
-
-    birthdays = cur.fetchall()
-
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute(
+            "SELECT user_id FROM users WHERE user_day = ? AND user_month = ?",
+            (target_day, target_month)
+        )
+        birthdays = cur.fetchall()
 
     return [str(b[0]) for b in birthdays]
 
 def get_real_user_name(user_id):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT 
-            CASE 
-                WHEN cust_user_name IS NOT NULL AND cust_user_name != '' 
-                THEN cust_user_name
-                ELSE user_name 
-            END AS final_name 
-        FROM users 
-        WHERE user_id = ?
-    """, (user_id,))
-
-    result = cur.fetchone()
-    cur.close()
-    con.close()
+    # Берём из профиля (обычно он уже в кэше), а не отдельным запросом
+    user_info = get_user_info(user_id)
+    if not user_info:
+        return None
 
-    return result[0] if result else None
+    return user_info["cust_user_name"] or user_info["user_name"]
 
 
 def check_user_exists(user_id):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
-    result = cur.fetchone()
-
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
+        result = cur.fetchone()
 
     return result is not None
 
@@ -105,14 +88,10 @@ def update_cust_user_name(user_id, cust_user_name):
     if not check_user_exists(user_id):
         return None  # Если пользователя нет, возвращаем None
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("UPDATE users SET cust_user_name = ? WHERE user_id = ?", (cust_user_name, user_id))
-    con.commit()
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE users SET cust_user_name = ? WHERE user_id = ?", (cust_user_name, user_id))
 
-    cur.close()
-    con.close()
+    invalidate_user(user_id)
 
 def update_user_name(user_id: int, user_name: str, full_name: str) -> bool:
     """
@@ -126,15 +105,10 @@ def update_user_name(user_id: int, user_name: str, full_name: str) -> bool:
     if not check_user_exists(user_id):
         return False  # Если пользователя нет, ничего не делаем
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("UPDATE users SET user_tag = ?, user_name = ? WHERE user_id = ?", (user_name, full_name, user_id))
-    con.commit()
-
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE users SET user_tag = ?, user_name = ? WHERE user_id = ?", (user_name, full_name, user_id))
 
+    invalidate_user(user_id)
     return True
 
 
@@ -142,84 +116,115 @@ def update_user_wishlist(user_id, user_wishlist):
     if not check_user_exists(user_id):
         return None
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE users SET user_wishlist = ? WHERE user_id = ?", (user_wishlist, user_id))
 
-    cur.execute("UPDATE users SET user_wishlist = ? WHERE user_id = ?", (user_wishlist, user_id))
-    con.commit()
-
-    cur.close()
-    con.close()
+    invalidate_user(user_id)
 
 
 def update_is_approved(user_id, is_approved):
     if not check_user_exists(user_id):
         return None
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("UPDATE users SET is_approved = ? WHERE user_id = ?", (is_approved, user_id))
-    con.commit()
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE users SET is_approved = ? WHERE user_id = ?", (is_approved, user_id))
 
-    cur.close()
-    con.close()
+    invalidate_user(user_id)
 
 
-def get_user_info(user_id):
+def _row_to_user_info(row) -> dict:
+    """Преобразует строку со столбцами USER_INFO_COLUMNS в словарь профиля."""
+    return {
+        "user_tag": row[0],
+        "user_name": row[1],
+        "real_user_name": row[2],
+        "cust_user_name": row[3],
+        "user_day": row[4],
+        "user_month": row[5],
+        "user_year": row[6],
+        "user_wishlist": row[7],
+        "user_group": row[8],
+        "user_subgroup": row[9],
+        "is_approved": row[10],
+        "schedule_notifications": row[11] if row[11] is not None else 0
+    }
 
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
 
-    cur.execute(
-        "SELECT user_tag, user_name, real_user_name, cust_user_name,"
-        "user_day, user_month, user_year, user_wishlist, user_group, user_subgroup, is_approved, schedule_notifications FROM users WHERE user_id = ?",
-        (user_id,)
-    )
-    result = cur.fetchone()
+def get_user_info(user_id):
+    user_info = get_cached_user(user_id)
+    if user_info is not None:
+        return user_info
 
-    cur.close()
-    con.close()
+    generation = get_generation()
+    with db_cursor() as cur:
+        cur.execute(f"SELECT {USER_INFO_COLUMNS} FROM users WHERE user_id = ?", (user_id,))
+        result = cur.fetchone()
 
     if result:
-        return {
-            "user_tag": result[0],
-            "user_name": result[1],
-            "real_user_name": result[2],
-            "cust_user_name": result[3],
-            "user_day": result[4],
-            "user_month": result[5],
-            "user_year": result[6],
-            "user_wishlist": result[7],
-            "user_group": result[8],
-            "user_subgroup": result[9],
-            "is_approved": result[10],
-            "schedule_notifications": result[11] if result[11] is not None else 0
-        }
+        user_info = _row_to_user_info(result)
+        put_user(user_id, user_info, generation)
+        return user_info
     return None
 
-def get_all_user_ids():
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
 
-    cur.execute("SELECT user_id FROM users")
-    users = cur.fetchall()
+def get_users_info(user_ids) -> dict[int, dict]:
+    """
+    Возвращает профили сразу нескольких пользователей.
+    Профили из кэша берутся оттуда, остальные id запрашиваются пачками
+    по IN_QUERY_CHUNK_SIZE, а не по одному.
 
-    cur.close()
-    con.close()
+    :param user_ids: итерируемое с id пользователей (int или str)
+    :return: {user_id: профиль как в get_user_info}; отсутствующих в БД нет в словаре
+    """
+    users_info = {}
+    missing = []
+    for user_id in dict.fromkeys(int(uid) for uid in user_ids):
+        user_info = get_cached_user(user_id)
+        if user_info is not None:
+            users_info[user_id] = user_info
+        else:
+            missing.append(user_id)
+
+    generation = get_generation()
+    with db_cursor() as cur:
+        for start in range(0, len(missing), IN_QUERY_CHUNK_SIZE):
+            chunk = missing[start:start + IN_QUERY_CHUNK_SIZE]
+            placeholders = ",".join("?" for _ in chunk)
+            cur.execute(
+                f"SELECT user_id, {USER_INFO_COLUMNS} FROM users WHERE user_id IN ({placeholders})",
+                chunk
+            )
+            for row in cur.fetchall():
+                user_info = _row_to_user_info(row[1:])
+                users_info[row[0]] = user_info
+                put_user(row[0], user_info, generation)
 
-    return [str(user[0]) for user in users]
+    return users_info
 
+def _iter_rows(query: str, params: tuple = ()) -> Iterator[tuple]:
+    """
+    Перебирает строки запроса, читая их из курсора по STREAM_FETCH_SIZE.
+    Генератор нужно дочитать в том же потоке (внутри run_db), где он создан.
+    """
+    with db_cursor() as cur:
+        cur.execute(query, params)
+        while rows := cur.fetchmany(STREAM_FETCH_SIZE):
+            yield from rows
 
-def get_user_wishlist(user_tag):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
 
-    cur.execute("SELECT user_name, user_wishlist FROM users WHERE user_tag = ?", (user_tag,))
-    result = cur.fetchone()
+def iter_user_ids(after_user_id: int = 0, limit: int = -1) -> Iterator[int]:
+    """Перебирает id всех пользователей по возрастанию, начиная после after_user_id (limit -1 — без ограничения)."""
+    for (user_id,) in _iter_rows(
+        "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+        (after_user_id, limit)
+    ):
+        yield user_id
 
-    cur.close()
-    con.close()
+
+def get_user_wishlist(user_tag):
+    with db_cursor() as cur:
+        cur.execute("SELECT user_name, user_wishlist FROM users WHERE user_tag = ?", (user_tag,))
+        result = cur.fetchone()
 
     if not result:
         return "not_found"
@@ -233,27 +238,58 @@ def get_user_wishlist(user_tag):
 
 
 def set_user_group_subgroup(user_id, user_group, user_subgroup):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("UPDATE users SET user_group = ?, user_subgroup = ? WHERE user_id = ?",
-                (user_group, user_subgroup, user_id))
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE users SET user_group = ?, user_subgroup = ? WHERE user_id = ?",
+                    (user_group, user_subgroup, user_id))
 
-    con.commit()
-    cur.close()
-    con.close()
+    invalidate_user(user_id)
 
 
 def add_user_to_db(user_id, user_tag, user_name):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    with db_cursor(commit=True) as cur:
+        cur.execute("INSERT OR IGNORE INTO users (user_id, user_tag, user_name) VALUES (?, ?, ?)",
+                    (user_id, user_tag, user_name))
 
-    cur.execute("INSERT OR IGNORE INTO users (user_id, user_tag, user_name) VALUES (?, ?, ?)",
-                (user_id, user_tag, user_name))
+    invalidate_user(user_id)
 
-    con.commit()
-    cur.close()
-    con.close()
+
+def sync_user(user_id: int, user_tag: str | None, user_name: str) -> tuple[dict, bool]:
+    """
+    Добавляет пользователя, если его нет, обновляет user_tag/user_name,
+    только если они изменились, и возвращает актуальный профиль.
+    Всё выполняется в одной транзакции.
+
+    :return: (профиль как в get_user_info, True если пользователь только что добавлен)
+    """
+    # Частый случай: профиль в кэше и имя не менялось — в БД не ходим
+    user_info = get_cached_user(user_id)
+    if user_info is not None and user_info["user_tag"] == user_tag and user_info["user_name"] == user_name:
+        return user_info, False
+
+    generation = get_generation()
+    with db_cursor(commit=True) as cur:
+        cur.execute("INSERT OR IGNORE INTO users (user_id, user_tag, user_name) VALUES (?, ?, ?)",
+                    (user_id, user_tag, user_name))
+        created = cur.rowcount > 0
+        changed = created
+
+        if not created:
+            cur.execute(
+                "UPDATE users SET user_tag = ?, user_name = ? "
+                "WHERE user_id = ? AND (user_tag IS NOT ? OR user_name IS NOT ?)",
+                (user_tag, user_name, user_id, user_tag, user_name)
+            )
+            changed = cur.rowcount > 0
+
+        cur.execute(f"SELECT {USER_INFO_COLUMNS} FROM users WHERE user_id = ?", (user_id,))
+        result = cur.fetchone()
+
+    user_info = _row_to_user_info(result)
+    if changed:
+        invalidate_user(user_id)
+    else:
+        put_user(user_id, user_info, generation)
+    return user_info, created
 
 
 def get_users_by_group(group_name: str) -> list[dict]:
@@ -270,21 +306,19 @@ def get_users_by_group(group_name: str) -> list[dict]:
     students = []
 
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            con.row_factory = sqlite3.Row
-            cur = con.cursor()
+        with db_cursor() as cur:
             cur.execute(
                 "SELECT user_id, real_user_name, user_name, is_approved "
                 "FROM users WHERE user_group = ?",
                 (group_name,)
             )
 
-            for row in cur.fetchall():
-                real_name = row['real_user_name'] or row['user_name'] or "Неизвестный"
+            for user_id, real_user_name, user_name, is_approved in cur.fetchall():
+                real_name = real_user_name or user_name or "Неизвестный"
                 students.append({
-                    'id': row['user_id'],
+                    'id': user_id,
                     'name': real_name,
-                    'approved': bool(row['is_approved'])
+                    'approved': bool(is_approved)
                 })
     except sqlite3.Error as e:
         print(f"Ошибка получения студентов: {e}")
@@ -294,13 +328,14 @@ def get_users_by_group(group_name: str) -> list[dict]:
 def update_real_user_name(user_id, real_user_name):
     """Обновляет реальное имя пользователя. Возвращает True при успешном обновлении."""
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            cur = con.cursor()
+        with db_cursor(commit=True) as cur:
             cur.execute(
                 "UPDATE users SET real_user_name = ? WHERE user_id = ?",
                 (real_user_name, user_id)
             )
-            return cur.rowcount > 0  # True если была изменена хотя бы одна строка
+            updated = cur.rowcount > 0  # True если была изменена хотя бы одна строка
+        invalidate_user(user_id)
+        return updated
     except sqlite3.Error as e:
         print(f"Ошибка обновления имени для пользователя {user_id}: {e}")
         return False
@@ -309,8 +344,7 @@ def update_real_user_name(user_id, real_user_name):
 def toggle_user_approval(user_id: int) -> bool:
     """Переключает статус разрешения поздравлений для пользователя"""
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            cur = con.cursor()
+        with db_cursor(commit=True) as cur:
 
             # Получаем текущее состояние
             cur.execute(
@@ -326,8 +360,8 @@ def toggle_user_approval(user_id: int) -> bool:
                 "UPDATE users SET is_approved = ? WHERE user_id = ?",
                 (new_status, user_id)
             )
-            con.commit()
-            return new_status
+        invalidate_user(user_id)
+        return new_status
     except sqlite3.Error as e:
         print(f"Ошибка переключения статуса: {e}")
         return False
@@ -335,8 +369,7 @@ def toggle_user_approval(user_id: int) -> bool:
 def get_approval_status(user_id: int) -> bool:
     """Возвращает текущий статус разрешения поздравлений"""
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            cur = con.cursor()
+        with db_cursor() as cur:
             cur.execute(
                 "SELECT is_approved FROM users WHERE user_id = ?",
                 (user_id,)
@@ -351,8 +384,7 @@ def get_approval_status(user_id: int) -> bool:
 def toggle_schedule_notifications(user_id: int) -> bool:
     """Переключает статус рассылки расписания для пользователя"""
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            cur = con.cursor()
+        with db_cursor(commit=True) as cur:
 
             # Получаем текущее состояние
             cur.execute(
@@ -369,8 +401,8 @@ def toggle_schedule_notifications(user_id: int) -> bool:
                 "UPDATE users SET schedule_notifications = ? WHERE user_id = ?",
                 (new_status, user_id)
             )
-            con.commit()
-            return new_status
+        invalidate_user(user_id)
+        return new_status
     except sqlite3.Error as e:
         print(f"Ошибка переключения статуса рассылки расписания: {e}")
         return False
@@ -379,8 +411,7 @@ def toggle_schedule_notifications(user_id: int) -> bool:
 def get_schedule_notifications_status(user_id: int) -> bool:
     """Возвращает текущий статус рассылки расписания"""
     try:
-        with sqlite3.connect(BIRTHDAY_DATABASE) as con:
-            cur = con.cursor()
+        with db_cursor() as cur:
             cur.execute(
                 "SELECT schedule_notifications FROM users WHERE user_id = ?",
                 (user_id,)
@@ -392,26 +423,34 @@ def get_schedule_notifications_status(user_id: int) -> bool:
         return False
 
 
-def clear_users():
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("DELETE FROM users")
+def iter_schedule_subscribers(after_user_id: int = 0, limit: int = -1) -> Iterator[tuple[int, str, str | None]]:
+    """
+    Перебирает подписчиков рассылки расписания с группой по возрастанию user_id:
+    (user_id, user_group, user_subgroup). Недоступные для бота пользователи пропускаются.
+    """
+    return _iter_rows("""
+        SELECT user_id, user_group, user_subgroup
+        FROM users
+        WHERE user_id > ? AND schedule_notifications = 1 AND user_group IS NOT NULL AND user_group != ''
+          AND user_id NOT IN (
+              SELECT user_id FROM user_reachability WHERE reachable = 0 AND updated_at >= ?
+          )
+        ORDER BY user_id
+        LIMIT ?
+    """, (after_user_id, get_unreachable_since(), limit))
 
-    con.commit()
-    cur.close()
-    con.close()
 
+def clear_users():
+    with db_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM users")
 
-def get_id_from_username(username):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    clear_user_cache()
 
-    cur.execute("SELECT user_id FROM users WHERE user_tag = ?", (username,))
-    result = cur.fetchone()
 
-    cur.close()
-    con.close()
+def get_id_from_username(username):
+    with db_cursor() as cur:
+        cur.execute("SELECT user_id FROM users WHERE user_tag = ?", (username,))
+        result = cur.fetchone()
 
     if not result:
         return "not_found"
@@ -425,13 +464,8 @@ def check_user_by_username(username: str) -> bool:
     :param username: username без @
     :return: True, если пользователь есть в базе, иначе False
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("SELECT 1 FROM users WHERE user_tag = ?", (username,))
-    result = cur.fetchone()
-
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("SELECT 1 FROM users WHERE user_tag = ?", (username,))
+        result = cur.fetchone()
 
     return result is not None
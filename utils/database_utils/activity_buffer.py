@@ -0,0 +1,82 @@
+# utils/database_utils/activity_buffer.py
+"""
+Буфер событий активности пользователей (таблица user_activity).
+
+Middleware только кладёт событие в очередь в памяти, а фоновая корутина
+run_activity_flusher записывает накопленное одной транзакцией (executemany)
+каждые ACTIVITY_FLUSH_SIZE событий или ACTIVITY_FLUSH_INTERVAL_MS миллисекунд.
+При переполнении буфера новые события отбрасываются и учитываются в счётчике.
+"""
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+
+from utils.database_utils.database_statistic import log_user_activities
+from utils.database_utils.db_executor import run_db
+from utils.logger import write_user_log
+
+# Сколько событий накопить, прежде чем записать их досрочно
+ACTIVITY_FLUSH_SIZE = 200
+# Как часто записывать буфер, даже если он не заполнен, мс
+ACTIVITY_FLUSH_INTERVAL_MS = 2000
+# Максимальный размер буфера (при переполнении события отбрасываются)
+ACTIVITY_BUFFER_SIZE = 20000
+
+_buffer: deque[tuple[int, str, str]] = deque()
+_flush_requested = asyncio.Event()
+_flush_lock = asyncio.Lock()
+_dropped = 0
+_written = 0
+
+
+def record_activity(user_id: int, event: str):
+    """Добавляет событие активности в буфер. Не обращается к БД и не блокирует."""
+    global _dropped
+    if len(_buffer) >= ACTIVITY_BUFFER_SIZE:
+        _dropped += 1
+        return
+
+    # Тот же формат и часовой пояс (UTC), что у CURRENT_TIMESTAMP в SQLite
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    _buffer.append((user_id, event, ts))
+
+    if len(_buffer) >= ACTIVITY_FLUSH_SIZE:
+        _flush_requested.set()
+
+
+async def flush_activity():
+    """Записывает в БД всё, что накопилось в буфере."""
+    global _dropped, _written
+    async with _flush_lock:
+        rows = []
+        while _buffer:
+            rows.append(_buffer.popleft())
+        if not rows:
+            return
+
+        try:
+            await run_db(log_user_activities, rows)
+            _written += len(rows)
+        except Exception as e:
+            _dropped += len(rows)
+            write_user_log(f"Ошибка записи активности ({len(rows)} событий потеряно): {e}")
+
+
+async def run_activity_flusher():
+    """Фоновая запись буфера активности. Запускается вместе с ботом."""
+    while True:
+        try:
+            await asyncio.wait_for(_flush_requested.wait(), timeout=ACTIVITY_FLUSH_INTERVAL_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+        _flush_requested.clear()
+        await flush_activity()
+
+
+def get_activity_buffer_stats() -> dict:
+    """Возвращает состояние буфера: ожидают записи, записано и отброшено событий."""
+    return {
+        "pending": len(_buffer),
+        "written": _written,
+        "dropped": _dropped,
+    }
@@ -0,0 +1,132 @@
+# utils/database_utils/broadcasts.py
+"""
+Задания массовых рассылок (таблица broadcast_jobs).
+
+Получатели выбираются из users пачками по возрастанию user_id, начиная
+после курсора задания, так что в памяти никогда не бывает всего списка.
+Курсор сдвигается на конец пачки до её отправки: если бот упадёт посреди
+пачки, её остаток будет пропущен, а не отправлен повторно.
+"""
+from utils.database_utils.connection import db_cursor
+
+# Статусы задания
+BROADCAST_RUNNING = "running"
+BROADCAST_PAUSED = "paused"
+BROADCAST_CANCELLED = "cancelled"
+BROADCAST_DONE = "done"
+
+# Из каких статусов в какой можно перейти
+_STATUS_TRANSITIONS = {
+    BROADCAST_RUNNING: (BROADCAST_PAUSED,),
+    BROADCAST_PAUSED: (BROADCAST_RUNNING,),
+    BROADCAST_CANCELLED: (BROADCAST_RUNNING, BROADCAST_PAUSED),
+    BROADCAST_DONE: (BROADCAST_RUNNING,),
+}
+
+BROADCAST_JOB_COLUMNS = (
+    "id", "kind", "status", "text", "parse_mode", "reply_markup", "created_by",
+    "cursor", "total", "processed", "sent", "failed", "skipped", "created_at", "finished_at"
+)
+
+
+def _row_to_job(row) -> dict:
+    return dict(zip(BROADCAST_JOB_COLUMNS, row))
+
+
+def create_broadcast_job(kind: str, text: str, parse_mode: str | None = None,
+                         reply_markup: str | None = None, created_by: int | None = None) -> int:
+    """Создаёт задание рассылки всем пользователям. Возвращает его id."""
+    with db_cursor(commit=True) as cur:
+        cur.execute("SELECT COUNT(*) FROM users")
+        total = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO broadcast_jobs (kind, status, text, parse_mode, reply_markup, created_by, total)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (kind, BROADCAST_RUNNING, text, parse_mode, reply_markup, created_by, total))
+        return cur.lastrowid
+
+
+def get_broadcast_job(job_id: int) -> dict | None:
+    with db_cursor() as cur:
+        cur.execute(f"SELECT {', '.join(BROADCAST_JOB_COLUMNS)} FROM broadcast_jobs WHERE id = ?", (job_id,))
+        row = cur.fetchone()
+    return _row_to_job(row) if row else None
+
+
+def find_broadcast_job(kind: str) -> dict | None:
+    """Возвращает последнее задание данного вида или None."""
+    with db_cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(BROADCAST_JOB_COLUMNS)} FROM broadcast_jobs WHERE kind = ? ORDER BY id DESC LIMIT 1",
+            (kind,)
+        )
+        row = cur.fetchone()
+    return _row_to_job(row) if row else None
+
+
+def get_recent_broadcast_jobs(limit: int = 5) -> list[dict]:
+    """Возвращает последние задания, новые первыми."""
+    with db_cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(BROADCAST_JOB_COLUMNS)} FROM broadcast_jobs ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+        return [_row_to_job(row) for row in cur.fetchall()]
+
+
+def get_running_broadcast_job_ids() -> list[int]:
+    """Возвращает id заданий в статусе running (их нужно продолжить после перезапуска)."""
+    with db_cursor() as cur:
+        cur.execute("SELECT id FROM broadcast_jobs WHERE status = ? ORDER BY id", (BROADCAST_RUNNING,))
+        return [job_id for (job_id,) in cur.fetchall()]
+
+
+def set_broadcast_status(job_id: int, status: str) -> bool:
+    """
+    Меняет статус задания, если переход допустим (см. _STATUS_TRANSITIONS).
+    :return: True, если статус изменён
+    """
+    allowed_from = _STATUS_TRANSITIONS[status]
+    placeholders = ", ".join("?" * len(allowed_from))
+    finished = status in (BROADCAST_CANCELLED, BROADCAST_DONE)
+    with db_cursor(commit=True) as cur:
+        cur.execute(f"""
+            UPDATE broadcast_jobs
+            SET status = ?, finished_at = CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE finished_at END
+            WHERE id = ? AND status IN ({placeholders})
+        """, (status, finished, job_id, *allowed_from))
+        return cur.rowcount == 1
+
+
+def fetch_broadcast_recipients(after_user_id: int, limit: int) -> list[tuple[int, str | None, str | None]]:
+    """
+    Возвращает следующую пачку получателей после after_user_id:
+    (user_id, real_user_name, user_name) по возрастанию user_id.
+    """
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT user_id, real_user_name, user_name
+            FROM users
+            WHERE user_id > ?
+            ORDER BY user_id
+            LIMIT ?
+        """, (after_user_id, limit))
+        return cur.fetchall()
+
+
+def advance_broadcast_cursor(job_id: int, cursor: int, batch_size: int):
+    """Сдвигает курсор задания на конец пачки (до её отправки)."""
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE broadcast_jobs SET cursor = ?, processed = processed + ? WHERE id = ?",
+            (cursor, batch_size, job_id)
+        )
+
+
+def add_broadcast_counts(job_id: int, sent: int, failed: int, skipped: int):
+    """Прибавляет к счётчикам задания результаты отправленной пачки."""
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE broadcast_jobs SET sent = sent + ?, failed = failed + ?, skipped = skipped + ? WHERE id = ?",
+            (sent, failed, skipped, job_id)
+        )
@@ -0,0 +1,75 @@
+# utils/database_utils/connection.py
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config import BIRTHDAY_DATABASE
+
+# Сколько ждать снятия блокировки другим соединением, мс
+BUSY_TIMEOUT_MS = 5000
+# Размер кэша подготовленных выражений на одно соединение
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_connections: list[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+
+
+def _open_connection() -> sqlite3.Connection:
+    """Открывает соединение и один раз настраивает его PRAGMA."""
+    con = sqlite3.connect(
+        BIRTHDAY_DATABASE,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return con
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Возвращает долгоживущее соединение с БД для текущего потока.
+    Соединение открывается при первом обращении и переиспользуется дальше.
+    """
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = _open_connection()
+        _local.con = con
+        with _connections_lock:
+            _connections.append(con)
+    return con
+
+
+@contextmanager
+def db_cursor(commit: bool = False):
+    """
+    Контекстный менеджер курсора на общем соединении.
+    При commit=True фиксирует транзакцию, при ошибке — откатывает её.
+    """
+    con = get_connection()
+    cur = con.cursor()
+    try:
+        yield cur
+        if commit:
+            con.commit()
+    except Exception:
+        if con.in_transaction:
+            con.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def close_all_connections():
+    """Закрывает все открытые соединения (вызывается при остановке бота)."""
+    with _connections_lock:
+        for con in _connections:
+            try:
+                con.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.__dict__.pop("con", None)
@@ -1,28 +1,72 @@
 # utils/database_utils/database_statistic.py
-import sqlite3
+from datetime import datetime, timezone
 
-from config import BIRTHDAY_DATABASE
+from utils.database_utils.connection import db_cursor
 
 
 def get_users_count() -> int:
     """Возвращает количество пользователей (строк) в таблице users."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("SELECT COUNT(*) FROM users")
-    result = cur.fetchone()
-
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM users")
+        result = cur.fetchone()
 
     return result[0] if result else 0
 
 
 def log_user_activity(user_id: int, event: str) -> None:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-    cur.execute("INSERT INTO user_activity (user_id, event) VALUES (?, ?)", (user_id, event))
-    con.commit(); cur.close(); con.close()
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    log_user_activities([(user_id, event, ts)])
+
+
+def log_user_activities(rows: list[tuple[int, str, str]]) -> None:
+    """
+    Записывает пачку событий активности одной транзакцией
+    и обновляет агрегаты user_activity_daily и user_activity_totals.
+    :param rows: список кортежей (user_id, event, ts), ts в формате "YYYY-MM-DD HH:MM:SS" (UTC)
+    """
+    # Сворачиваем пачку: события по (пользователь, день) и итоги по пользователю
+    daily: dict[tuple[int, str], int] = {}
+    totals: dict[int, list] = {}  # user_id -> [events, first_ts, last_ts]
+    for user_id, _, ts in rows:
+        key = (user_id, ts[:10])
+        daily[key] = daily.get(key, 0) + 1
+
+        user_totals = totals.get(user_id)
+        if user_totals is None:
+            totals[user_id] = [1, ts, ts]
+        else:
+            user_totals[0] += 1
+            user_totals[1] = min(user_totals[1], ts)
+            user_totals[2] = max(user_totals[2], ts)
+
+    with db_cursor(commit=True) as cur:
+        cur.executemany("INSERT INTO user_activity (user_id, event, ts) VALUES (?, ?, ?)", rows)
+
+        new_days: dict[int, int] = {}
+        for (user_id, day), events in daily.items():
+            cur.execute(
+                "INSERT OR IGNORE INTO user_activity_daily (user_id, day, events) VALUES (?, ?, 0)",
+                (user_id, day)
+            )
+            if cur.rowcount > 0:
+                new_days[user_id] = new_days.get(user_id, 0) + 1
+            cur.execute(
+                "UPDATE user_activity_daily SET events = events + ? WHERE user_id = ? AND day = ?",
+                (events, user_id, day)
+            )
+
+        cur.executemany("""
+            INSERT INTO user_activity_totals (user_id, total_events, active_days, first_ts, last_ts)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                total_events = total_events + excluded.total_events,
+                active_days = active_days + excluded.active_days,
+                first_ts = MIN(COALESCE(first_ts, excluded.first_ts), excluded.first_ts),
+                last_ts = MAX(COALESCE(last_ts, excluded.last_ts), excluded.last_ts)
+        """, [
+            (user_id, events, new_days.get(user_id, 0), first_ts, last_ts)
+            for user_id, (events, first_ts, last_ts) in totals.items()
+        ])
 
 
 def count_active_users(days: int) -> int:
@@ -30,18 +74,14 @@ def count_active_users(days: int) -> int:
     Возвращает количество уникальных пользователей,
     которые проявляли активность за последние N дней.
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT COUNT(DISTINCT user_id)
-        FROM user_activity
-        WHERE ts >= datetime('now', ?)
-    """, (f'-{days} days',))
-    (n,) = cur.fetchone()
-
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(DISTINCT user_id)
+            FROM user_activity
+            WHERE ts >= datetime('now', ?)
+        """, (f'-{days} days',))
+        (n,) = cur.fetchone()
+
     return n or 0
 
 
@@ -50,18 +90,14 @@ def count_new_users(days: int) -> int:
     Возвращает количество пользователей,
     которые зарегистрировались за последние N дней.
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM users
-        WHERE created_at >= datetime('now', ?)
-    """, (f'-{days} days',))
-
-    (n,) = cur.fetchone()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM users
+            WHERE created_at >= datetime('now', ?)
+        """, (f'-{days} days',))
+        (n,) = cur.fetchone()
+
     return n or 0
 
 
@@ -70,19 +106,14 @@ def get_last_users(limit: int) -> list[dict]:
     Возвращает список последних зарегистрированных пользователей.
     limit — сколько пользователей показать (по дате регистрации).
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT user_id, user_tag, user_name, created_at
-        FROM users
-        ORDER BY created_at DESC
-        LIMIT ?
-    """, (limit,))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT user_id, user_tag, user_name, created_at
+            FROM users
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (limit,))
+        rows = cur.fetchall()
 
     return [
         {
@@ -100,19 +131,14 @@ def get_users_last_days(days: int) -> list[dict]:
     Возвращает список пользователей,
     которые зарегистрировались за последние N дней.
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT user_id, user_tag, user_name, created_at
-        FROM users
-        WHERE created_at >= datetime('now', ?)
-        ORDER BY created_at DESC
-    """, (f'-{days} days',))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT user_id, user_tag, user_name, created_at
+            FROM users
+            WHERE created_at >= datetime('now', ?)
+            ORDER BY created_at DESC
+        """, (f'-{days} days',))
+        rows = cur.fetchall()
 
     return [
         {
@@ -130,21 +156,15 @@ def get_last_active_users(limit: int) -> list[dict]:
     Возвращает список последних активных пользователей.
     limit — сколько последних уникальных пользователей вернуть.
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT u.user_id, u.user_tag, u.user_name, MAX(a.ts) as last_active
-        FROM user_activity a
-        JOIN users u ON u.user_id = a.user_id
-        GROUP BY u.user_id
-        ORDER BY last_active DESC
-        LIMIT ?
-    """, (limit,))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT u.user_id, u.user_tag, u.user_name, t.last_ts as last_active
+            FROM user_activity_totals t
+            JOIN users u ON u.user_id = t.user_id
+            ORDER BY t.last_ts DESC
+            LIMIT ?
+        """, (limit,))
+        rows = cur.fetchall()
 
     return [
         {
@@ -161,29 +181,23 @@ def get_top_active_users(limit: int = 5) -> list[dict]:
     """
     Возвращает топ-N самых активных пользователей за всё время.
     Сортировка по количеству событий активности (убывание).
-    
+
     :param limit: Количество пользователей для возврата (по умолчанию 5)
     :return: Список словарей с ключами: user_id, user_name, activity_count
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT 
-            u.user_id,
-            COALESCE(u.real_user_name, u.user_name, 'Неизвестный') as user_name,
-            u.user_tag,
-            COUNT(a.id) as activity_count
-        FROM user_activity a
-        JOIN users u ON u.user_id = a.user_id
-        GROUP BY u.user_id
-        ORDER BY activity_count DESC
-        LIMIT ?
-    """, (limit,))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT
+                u.user_id,
+                COALESCE(u.real_user_name, u.user_name, 'Неизвестный') as user_name,
+                u.user_tag,
+                t.total_events as activity_count
+            FROM user_activity_totals t
+            JOIN users u ON u.user_id = t.user_id
+            ORDER BY t.total_events DESC
+            LIMIT ?
+        """, (limit,))
+        rows = cur.fetchall()
 
     return [
         {
@@ -200,29 +214,23 @@ def get_top_users_by_days(limit: int = 5) -> list[dict]:
     """
     Возвращает топ-N пользователей по количеству дней использования бота.
     Считается количество уникальных дней, когда пользователь был активен.
-    
+
     :param limit: Количество пользователей для возврата (по умолчанию 5)
     :return: Список словарей с ключами: user_id, user_name, days_count
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT 
-            u.user_id,
-            COALESCE(u.real_user_name, u.user_name, 'Неизвестный') as user_name,
-            u.user_tag,
-            COUNT(DISTINCT DATE(a.ts)) as days_count
-        FROM user_activity a
-        JOIN users u ON u.user_id = a.user_id
-        GROUP BY u.user_id
-        ORDER BY days_count DESC
-        LIMIT ?
-    """, (limit,))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT
+                u.user_id,
+                COALESCE(u.real_user_name, u.user_name, 'Неизвестный') as user_name,
+                u.user_tag,
+                t.active_days as days_count
+            FROM user_activity_totals t
+            JOIN users u ON u.user_id = t.user_id
+            ORDER BY t.active_days DESC
+            LIMIT ?
+        """, (limit,))
+        rows = cur.fetchall()
 
     return [
         {
@@ -238,79 +246,52 @@ def get_top_users_by_days(limit: int = 5) -> list[dict]:
 def get_user_rank_by_activity(user_id: int) -> int:
     """
     Возвращает место пользователя в топе по количеству действий.
+    Место = 1 + число пользователей из users, у которых действий строго больше
+    (при равенстве место общее, как в «1, 2, 2, 4»).
     :param user_id: ID пользователя
     :return: Место в рейтинге (1 = первое место) или 0, если пользователь не найден
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Получаем всех пользователей с их количеством действий, отсортированных по убыванию
-    cur.execute("""
-        SELECT 
-            u.user_id,
-            COUNT(a.id) as activity_count
-        FROM user_activity a
-        JOIN users u ON u.user_id = a.user_id
-        GROUP BY u.user_id
-        ORDER BY activity_count DESC
-    """)
-    
-    rows = cur.fetchall()
-    
-    if not rows:
-        cur.close()
-        con.close()
-        return 0
-    
-    # Ищем позицию пользователя в отсортированном списке
-    rank = 0
-    for idx, (uid, count) in enumerate(rows, start=1):
-        if uid == user_id:
-            rank = idx
-            break
-    
-    cur.close()
-    con.close()
-    return rank
+    with db_cursor() as cur:
+        cur.execute("SELECT total_events FROM user_activity_totals WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        if not row:
+            return 0
+
+        # Удалённые из users в топе не показываются — не считаем их и здесь
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM user_activity_totals t
+            JOIN users u ON u.user_id = t.user_id
+            WHERE t.total_events > ?
+        """, (row[0],))
+        (ahead,) = cur.fetchone()
+
+    return ahead + 1
 
 
 def get_user_rank_by_days(user_id: int) -> int:
     """
     Возвращает место пользователя в топе по количеству дней использования.
+    Место = 1 + число пользователей из users, у которых дней строго больше
+    (при равенстве место общее, как в «1, 2, 2, 4»).
     :param user_id: ID пользователя
     :return: Место в рейтинге (1 = первое место) или 0, если пользователь не найден
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Получаем всех пользователей с их количеством дней, отсортированных по убыванию
-    cur.execute("""
-        SELECT 
-            u.user_id,
-            COUNT(DISTINCT DATE(a.ts)) as days_count
-        FROM user_activity a
-        JOIN users u ON u.user_id = a.user_id
-        GROUP BY u.user_id
-        ORDER BY days_count DESC
-    """)
-    
-    rows = cur.fetchall()
-    
-    if not rows:
-        cur.close()
-        con.close()
-        return 0
-    
-    # Ищем позицию пользователя в отсортированном списке
-    rank = 0
-    for idx, (uid, count) in enumerate(rows, start=1):
-        if uid == user_id:
-            rank = idx
-            break
-    
-    cur.close()
-    con.close()
-    return rank
+    with db_cursor() as cur:
+        cur.execute("SELECT active_days FROM user_activity_totals WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        if not row:
+            return 0
+
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM user_activity_totals t
+            JOIN users u ON u.user_id = t.user_id
+            WHERE t.active_days > ?
+        """, (row[0],))
+        (ahead,) = cur.fetchone()
+
+    return ahead + 1
 
 
 def get_user_statistics(user_id: int) -> dict:
@@ -319,41 +300,32 @@ def get_user_statistics(user_id: int) -> dict:
     :param user_id: ID пользователя
     :return: Словарь со статистикой
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Общее количество действий
-    cur.execute("SELECT COUNT(*) FROM user_activity WHERE user_id = ?", (user_id,))
-    total_actions = cur.fetchone()[0] or 0
-
-    # Количество дней использования
-    cur.execute("SELECT COUNT(DISTINCT DATE(ts)) FROM user_activity WHERE user_id = ?", (user_id,))
-    days_count = cur.fetchone()[0] or 0
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT
+                total_events,
+                active_days,
+                first_ts,
+                last_ts,
+                CAST(julianday('now') - julianday(first_ts) AS INTEGER)
+            FROM user_activity_totals
+            WHERE user_id = ?
+        """, (user_id,))
+        row = cur.fetchone()
+
+    # Общее количество действий и количество дней использования
+    total_actions = (row[0] or 0) if row else 0
+    days_count = (row[1] or 0) if row else 0
 
     # Первая и последняя активность
-    cur.execute("""
-        SELECT MIN(ts), MAX(ts) 
-        FROM user_activity 
-        WHERE user_id = ?
-    """, (user_id,))
-    first_last = cur.fetchone()
-    first_active = first_last[0] if first_last and first_last[0] else None
-    last_active = first_last[1] if first_last and first_last[1] else None
+    first_active = row[2] if row and row[2] else None
+    last_active = row[3] if row and row[3] else None
 
     # Среднее количество действий в день
     avg_actions_per_day = round(total_actions / days_count, 1) if days_count > 0 else 0
 
     # Длительность использования (дней с первого использования)
-    days_since_first = 0
-    if first_active:
-        cur.execute("""
-            SELECT CAST(julianday('now') - julianday(?) AS INTEGER)
-        """, (first_active,))
-        result = cur.fetchone()
-        days_since_first = result[0] if result and result[0] else 0
-
-    cur.close()
-    con.close()
+    days_since_first = row[4] if row and row[4] else 0
 
     return {
         "total_actions": total_actions,
@@ -362,4 +334,4 @@ def get_user_statistics(user_id: int) -> dict:
         "days_since_first": days_since_first,
         "first_active": first_active,
         "last_active": last_active
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,65 @@
+# utils/database_utils/db_executor.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+# Количество потоков, выполняющих запросы к БД (у каждого своё соединение)
+DB_WORKERS = 4
+# Максимум запросов, одновременно ожидающих выполнения в пуле
+DB_QUEUE_SIZE = 256
+# Сколько строк забирать за один запрос при асинхронном переборе (to_async_stream)
+STREAM_PAGE_SIZE = 1000
+
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+_queue_slots = asyncio.Semaphore(DB_QUEUE_SIZE)
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию работы с БД в отдельном потоке,
+    не блокируя цикл событий. Очередь ограничена DB_QUEUE_SIZE:
+    при переполнении вызывающая корутина ждёт освобождения места.
+    """
+    async with _queue_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def to_async(func):
+    """Оборачивает синхронную функцию БД в корутину, выполняемую через run_db."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+
+def _take_page(iter_func, after_key, page_size: int) -> list:
+    return list(iter_func(after_key, page_size))
+
+
+def to_async_stream(iter_func, page_size: int = STREAM_PAGE_SIZE):
+    """
+    Оборачивает синхронный генератор строк iter_func(after_key, limit),
+    упорядоченных по ключу (первому столбцу), в асинхронный генератор.
+    Строки забираются страницами по page_size: каждая страница — отдельный
+    вызов в пуле потоков БД, продолжающий выборку после ключа последней
+    строки. Курсор не держится открытым между страницами и не переходит
+    между потоками, а в памяти одновременно не больше одной страницы.
+    """
+    @wraps(iter_func)
+    async def wrapper():
+        after_key = 0
+        while True:
+            page = await run_db(_take_page, iter_func, after_key, page_size)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            after_key = last[0] if isinstance(last, tuple) else last
+    return wrapper
+
+
+def shutdown_db_executor():
+    """Дожидается завершения запросов и останавливает пул потоков БД."""
+    _executor.shutdown(wait=True)
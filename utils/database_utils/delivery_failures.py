@@ -0,0 +1,33 @@
+# utils/database_utils/delivery_failures.py
+"""
+Недоставленные сообщения (таблица delivery_failures).
+
+Очередь исходящих сообщений записывает сюда сообщения, которые не удалось
+доставить окончательно: постоянная ошибка Telegram или исчерпаны попытки.
+Доступность пользователей хранится отдельно (reachability).
+"""
+from utils.database_utils.connection import db_cursor
+
+# Сколько дней хранить журнал недоставленных сообщений
+DELIVERY_FAILURES_KEEP_DAYS = 30
+# Сколько символов текста сообщения сохранять в журнале
+FAILURE_TEXT_MAX_LENGTH = 200
+
+
+def record_delivery_failure(chat_id: int, reason: str, error: str, text: str | None, attempts: int = 1):
+    """Записывает окончательно недоставленное сообщение."""
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO delivery_failures (chat_id, reason, error, text, attempts) VALUES (?, ?, ?, ?, ?)",
+            (chat_id, reason, error, text[:FAILURE_TEXT_MAX_LENGTH] if text else text, attempts)
+        )
+
+
+def prune_delivery_failures(keep_days: int = DELIVERY_FAILURES_KEEP_DAYS) -> int:
+    """
+    Удаляет записи журнала старше keep_days дней.
+    :return: количество удалённых строк
+    """
+    with db_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM delivery_failures WHERE failed_at < datetime('now', ?)", (f"-{keep_days} days",))
+        return cur.rowcount
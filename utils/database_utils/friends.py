@@ -1,315 +1,192 @@
-import sqlite3
 import pytz
 from datetime import datetime, timedelta
 
-from config import BIRTHDAY_DATABASE
+from utils.database import get_users_info
+from utils.database_utils.connection import db_cursor
 
 tz_moscow = pytz.timezone("Europe/Moscow")
 
 
 def add_friend_request(sender_id: int, receiver_id: int) -> int:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    with db_cursor(commit=True) as cur:
+        # Добавляем запись о запросе
+        cur.execute("""
+            INSERT INTO friend_requests (sender_id, receiver_id, status)
+            VALUES (?, ?, 'pending')
+        """, (sender_id, receiver_id))
 
-    # Добавляем запись о запросе
-    cur.execute("""
-        INSERT INTO friend_requests (sender_id, receiver_id, status)
-        VALUES (?, ?, 'pending')
-    """, (sender_id, receiver_id))
-
-    con.commit()
-
-    # Получаем ID последнего добавленного запроса (ID запроса)
-    request_id = cur.lastrowid
-
-    cur.close()
-    con.close()
+        # Получаем ID последнего добавленного запроса (ID запроса)
+        request_id = cur.lastrowid
 
     # Возвращаем ID запроса
     return request_id
 
 
 def delete_friend_request(request_id: int) -> None:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Добавляем запись о запросе
-    cur.execute("""
-        DELETE FROM friend_requests
-        WHERE id = ?
-    """, (request_id,))
-
-    con.commit()
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            DELETE FROM friend_requests
+            WHERE id = ?
+        """, (request_id,))
 
 
 def update_friend_request_status(request_id: int, status: str):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        UPDATE friend_requests
-        SET status = ?
-        WHERE id = ?
-    """, (status, request_id))
-
-    con.commit()
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            UPDATE friend_requests
+            SET status = ?
+            WHERE id = ?
+        """, (status, request_id))
 
 
 def check_existing_request(sender_id: int, receiver_id: int) -> bool:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT 1 FROM friend_requests
-        WHERE sender_id = ? AND receiver_id = ? AND status = 'pending'
-    """, (sender_id, receiver_id))
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM friend_requests
+            WHERE sender_id = ? AND receiver_id = ? AND status = 'pending'
+        """, (sender_id, receiver_id))
+        exists = cur.fetchone() is not None
 
-    exists = cur.fetchone() is not None
-    cur.close()
-    con.close()
     return exists
 
 
-def check_existing_friend(user_id: int, friend_id: int):
-    friends = get_list_friends(user_id)
-    for friend in friends:
-        if str(friend_id) == friend:
-            return True
-    return False
-
-
-def add_friend_to_user(user_id: int, friend_id: int):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Получаем текущий список друзей
-    cur.execute("SELECT friends FROM users WHERE user_id = ?", (user_id,))
-    friends_str = cur.fetchone()[0]
-    friends = friends_str.split(",") if friends_str else []
+def check_existing_friend(user_id: int, friend_id: int) -> bool:
+    with db_cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM friendships WHERE user_id = ? AND friend_id = ?",
+            (user_id, friend_id)
+        )
+        exists = cur.fetchone() is not None
 
-    # Добавляем нового друга, если его нет в списке
-    if str(friend_id) not in friends:
-        friends.append(str(friend_id))
+    return exists
 
-    # Обновляем список друзей
-    cur.execute("""
-        UPDATE users
-        SET friends = ?
-        WHERE user_id = ?
-    """, (",".join(friends), user_id))
 
-    con.commit()
-    cur.close()
-    con.close()
+def add_friend_to_user(user_id: int, friend_id: int):
+    with db_cursor(commit=True) as cur:
+        # Повторное добавление того же друга игнорируется первичным ключом
+        cur.execute(
+            "INSERT OR IGNORE INTO friendships (user_id, friend_id) VALUES (?, ?)",
+            (user_id, friend_id)
+        )
 
 
 def get_friend_id_from_request_id(request_id: int) -> int:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Выполняем запрос для получения receiver_id по request_id
-    cur.execute("SELECT sender_id FROM friend_requests WHERE id = ?", (request_id,))
-    result = cur.fetchone()  # Получаем первую строку
+    with db_cursor() as cur:
+        # Выполняем запрос для получения receiver_id по request_id
+        cur.execute("SELECT sender_id FROM friend_requests WHERE id = ?", (request_id,))
+        result = cur.fetchone()  # Получаем первую строку
 
     if result:  # Если результат найден, возвращаем ID друга
-        friend_id = result[0]
-        cur.close()
-        con.close()
-        return friend_id
+        return result[0]
 
     # Если результат не найден, выбрасываем исключение с объяснением
-    cur.close()
-    con.close()
     raise ValueError(f"Запрос с ID {request_id} не найден в базе данных.")
 
 
 def get_list_friends(user_id: int) -> list[int]:
     """
-    Функция для получения списка id друзей пользователя
+    Функция для получения списка id друзей пользователя (в порядке добавления)
     :param user_id
     :return friend_ids
     """
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    with db_cursor() as cur:
+        cur.execute(
+            "SELECT friend_id FROM friendships WHERE user_id = ? ORDER BY created_at, rowid",
+            (user_id,)
+        )
+        rows = cur.fetchall()
 
-    cur.execute("SELECT friends FROM users WHERE user_id = ?", (user_id,))
-    result = cur.fetchone()
-    friends_str = result[0] if result else ""
-    friend_ids = friends_str.split(",") if friends_str else []
-
-    cur.close()
-    con.close()
-    return friend_ids
+    return [row[0] for row in rows]
 
 
 def get_friends_info(user_id: int) -> list[tuple[int, str]]:
     """
     Вернёт список кортежей (friend_id, user_name) в том же порядке,
-    в каком friend_id хранятся у пользователя.
+    в каком друзья были добавлены пользователю.
     """
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT f.friend_id, u.user_name
+            FROM friendships f
+            LEFT JOIN users u ON u.user_id = f.friend_id
+            WHERE f.user_id = ?
+            ORDER BY f.created_at, f.rowid
+        """, (user_id,))
+        rows = cur.fetchall()
 
-    friend_ids = get_list_friends(user_id)
-    if not friend_ids:
-        return []
-
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    return [(fid, str(uname) if uname else "Неизвестный") for fid, uname in rows]
 
-    placeholders = ",".join("?" for _ in friend_ids)
-    cur.execute(
-        f"SELECT user_id, user_name FROM users WHERE user_id IN ({placeholders})",
-        friend_ids
-    )
 
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
+def _friends_with_birthdays(user_id: int) -> list[dict]:
+    """
+    Возвращает друзей пользователя (в порядке добавления), у которых указана
+    дата рождения. Профили загружаются одним пакетным запросом.
+    """
+    friend_ids = get_list_friends(user_id)
+    users_info = get_users_info(friend_ids)
 
-    # Собираем dict[int, str], где ключ — user_id, значение — имя
-    name_by_id: dict[int, str] = {
-        int(uid): str(uname) if uname else "Неизвестный"
-        for uid, uname in rows
-    }
+    friends = []
+    for friend_id in friend_ids:
+        info = users_info.get(friend_id)
+        if not info or not info["user_day"] or not info["user_month"]:
+            continue
 
-    # Собираем пары (id, имя) в исходном порядке
-    pairs: list[tuple[int, str]] = [
-        (int(fid), name_by_id.get(int(fid), "Неизвестный"))
-        for fid in friend_ids
-    ]
-    return pairs
+        friends.append({
+            'user_name': info["user_name"],
+            'user_tag': info["user_tag"],
+            'user_day': int(info["user_day"]),
+            'user_month': int(info["user_month"]),
+            'user_wishlist': info["user_wishlist"] or "Отсутствует"
+        })
+    return friends
 
 
 def get_today_birthdays(user_id: int):
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    # Получаем список айди друзей
-    friend_ids = get_list_friends(user_id)
-
     today = datetime.today()
 
     today_birthdays = []
 
-    for friend_id in friend_ids:
-        cur.execute("SELECT user_name, user_tag, user_day, user_month, user_wishlist FROM users WHERE user_id = ?", (friend_id,))
-        row = cur.fetchone()
-        if row:
-            user_name, user_tag, user_day, user_month, user_wishlist = row
-
-            if not user_day or not user_month:
-                continue
-
-            if not user_wishlist: user_wishlist = "Отсутствует"
-
-            user_day = int(user_day)
-            user_month = int(user_month)
-
-            birthday_today = safe_date(today.year, user_month, user_day)
-            days_until_birthday = (today - birthday_today).days
+    for friend in _friends_with_birthdays(user_id):
+        birthday_today = safe_date(today.year, friend['user_month'], friend['user_day'])
+        days_until_birthday = (today - birthday_today).days
 
-            if days_until_birthday == 0:
-                today_birthdays.append({
-                    'user_name': user_name,
-                    'user_tag': user_tag,
-                    'user_day': user_day,
-                    'user_month': user_month,
-                    'user_wishlist': user_wishlist
-                })
-
-    cur.close()
-    con.close()
+        if days_until_birthday == 0:
+            today_birthdays.append(friend)
 
     return today_birthdays
 
 
 def get_upcoming_birthdays(user_id: int, days: int = 7) -> list[dict]:
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
+    today = datetime.today()
 
-    # Получаем список айди друзей
-    friend_ids = get_list_friends(user_id)
+    # Считаем для каждого друга, через сколько дней его ближайший ДР
+    candidates = []
+    for friend in _friends_with_birthdays(user_id):
+        # Делаем объект даты для ближайшего ДР
+        birthday_this_year = safe_date(today.year, friend['user_month'], friend['user_day'])
+        days_until_birthday = (birthday_this_year - today).days
 
-    today = datetime.today()
-    upcoming = []
+        # Если ДР уже прошёл в этом году, считаем на следующий год
+        if days_until_birthday < 0:
+            birthday_next_year = safe_date(today.year + 1, friend['user_month'], friend['user_day'])
+            days_until_birthday = (birthday_next_year - today).days
 
-    # Сначала проходим по друзьям и собираем тех, у кого ДР в ближайшие days дней
-    for friend_id in friend_ids:
-        cur.execute("SELECT user_name, user_tag, user_day, user_month, user_wishlist FROM users WHERE user_id = ?", (friend_id,))
-        row = cur.fetchone()
-        if row:
-            user_name, user_tag, user_day, user_month, user_wishlist = row
-
-            if not user_day or not user_month:
-                continue
-
-            if not user_wishlist: user_wishlist = "Отсутствует"
-
-            user_day = int(user_day)
-            user_month = int(user_month)
-            # Делаем объект даты для ближайшего ДР
-            birthday_this_year = safe_date(today.year, user_month, user_day)
-            days_until_birthday = (birthday_this_year - today).days
-
-            # Если ДР уже прошёл в этом году, считаем на следующий год
-            if days_until_birthday < 0:
-                birthday_next_year = safe_date(today.year + 1, user_month, user_day)
-                days_until_birthday = (birthday_next_year - today).days
-
-            if 0 <= days_until_birthday <= days:
-                upcoming.append({
-                    'user_name': user_name,
-                    'user_tag': user_tag,
-                    'user_day': user_day,
-                    'user_month': user_month,
-                    'user_wishlist': user_wishlist,
-                    'days_until': days_until_birthday
-                })
+        candidates.append({**friend, 'days_until': days_until_birthday})
+
+    # Собираем тех, у кого ДР в ближайшие days дней
+    upcoming = [c for c in candidates if 0 <= c['days_until'] <= days]
 
     # Если в ближайшие days дней никого нет, добавляем одного самого ближайшего
     if not upcoming:
         closest = None
         min_days = 365
-        for friend_id in friend_ids:
-            cur.execute("SELECT user_name, user_tag, user_day, user_month, user_wishlist FROM users WHERE user_id = ?", (friend_id,))
-            row = cur.fetchone()
-            if row:
-                user_name, user_tag, user_day, user_month, user_wishlist = row
-
-                if not user_day or not user_month:
-                    continue
-
-                if not user_wishlist: user_wishlist = "Отсутствует"
-
-                user_day = int(user_day)
-                user_month = int(user_month)
-
-                birthday_this_year = safe_date(today.year, user_month, user_day)
-                days_until_birthday = (birthday_this_year - today).days
-                if days_until_birthday < 0:
-                    birthday_next_year = safe_date(today.year + 1, user_month, user_day)
-                    days_until_birthday = (birthday_next_year - today).days
-
-                if days_until_birthday < min_days and days_until_birthday < 364:
-                    min_days = days_until_birthday
-                    closest = {
-                        'user_name': user_name,
-                        'user_tag': user_tag,
-                        'user_day': user_day,
-                        'user_month': user_month,
-                        'user_wishlist': user_wishlist,
-                        'days_until': days_until_birthday
-                    }
+        for candidate in candidates:
+            if candidate['days_until'] < min_days and candidate['days_until'] < 364:
+                min_days = candidate['days_until']
+                closest = candidate
         if closest:
             upcoming.append(closest)
 
-    # Закрываем соединение
-    cur.close()
-    con.close()
-
     # Сортируем по ближайшему дню рождения
     upcoming.sort(key=lambda x: x['days_until'])
 
@@ -324,20 +201,11 @@ def delete_friend(user_id: int, friend_id: int) -> None:
     """
     Удаляет friend_id из списка друзей user_id
     """
-
-    friend_id = str(friend_id)
-    ids = get_list_friends(user_id)
-    new_ids = [fid for fid in ids if fid != friend_id]
-
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE users SET friends = ? WHERE user_id = ?",
-        (",".join(new_ids), user_id)
-    )
-    con.commit()
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "DELETE FROM friendships WHERE user_id = ? AND friend_id = ?",
+            (user_id, friend_id)
+        )
 
 
 def safe_date(year: int, month: int, day: int) -> datetime:
@@ -354,36 +222,25 @@ def safe_date(year: int, month: int, day: int) -> datetime:
 
 def add_wishlist_suggestion(sender_id: int, receiver_id: int, wishlist_text: str) -> int:
     """Добавляет предложение вишлиста и возвращает ID предложения."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        INSERT INTO wishlist_suggestions (sender_id, receiver_id, wishlist_text, status)
-        VALUES (?, ?, ?, 'pending')
-    """, (sender_id, receiver_id, wishlist_text))
-
-    con.commit()
-    suggestion_id = cur.lastrowid
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            INSERT INTO wishlist_suggestions (sender_id, receiver_id, wishlist_text, status)
+            VALUES (?, ?, ?, 'pending')
+        """, (sender_id, receiver_id, wishlist_text))
+        suggestion_id = cur.lastrowid
 
     return suggestion_id
 
 
 def get_wishlist_suggestion(suggestion_id: int) -> dict | None:
     """Получает информацию о предложении вишлиста по ID."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT sender_id, receiver_id, wishlist_text, status
-        FROM wishlist_suggestions
-        WHERE id = ?
-    """, (suggestion_id,))
-
-    result = cur.fetchone()
-    cur.close()
-    con.close()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT sender_id, receiver_id, wishlist_text, status
+            FROM wishlist_suggestions
+            WHERE id = ?
+        """, (suggestion_id,))
+        result = cur.fetchone()
 
     if result:
         return {
@@ -397,30 +254,18 @@ def get_wishlist_suggestion(suggestion_id: int) -> dict | None:
 
 def update_wishlist_suggestion_status(suggestion_id: int, status: str):
     """Обновляет статус предложения вишлиста."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        UPDATE wishlist_suggestions
-        SET status = ?
-        WHERE id = ?
-    """, (status, suggestion_id))
-
-    con.commit()
-    cur.close()
-    con.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            UPDATE wishlist_suggestions
+            SET status = ?
+            WHERE id = ?
+        """, (status, suggestion_id))
 
 
 def delete_wishlist_suggestion(suggestion_id: int):
     """Удаляет предложение вишлиста."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-
-    cur.execute("""
-        DELETE FROM wishlist_suggestions
-        WHERE id = ?
-    """, (suggestion_id,))
-
-    con.commit()
-    cur.close()
-    con.close()
\ No newline at end of file
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            DELETE FROM wishlist_suggestions
+            WHERE id = ?
+        """, (suggestion_id,))
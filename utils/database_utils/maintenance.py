@@ -0,0 +1,60 @@
+# utils/database_utils/maintenance.py
+"""
+Обслуживание БД: удаление старых событий активности и возврат места на диске.
+"""
+import sqlite3
+
+from utils.database_utils.connection import db_cursor
+from utils.logger import write_user_log
+
+
+def ensure_incremental_auto_vacuum(con: sqlite3.Connection):
+    """
+    Переводит БД в режим auto_vacuum=INCREMENTAL, чтобы место после удалений
+    можно было возвращать по частям (PRAGMA incremental_vacuum).
+    Для существующего файла режим применяется только после полного VACUUM,
+    поэтому он выполняется один раз — при запуске бота, до приёма апдейтов.
+    """
+    (mode,) = con.execute("PRAGMA auto_vacuum").fetchone()
+    if mode == 2:  # уже INCREMENTAL
+        return
+
+    con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    con.execute("VACUUM")
+    write_user_log("БД переведена в режим auto_vacuum=INCREMENTAL")
+
+
+def delete_old_activity_batch(retention_days: int, batch_size: int) -> int:
+    """
+    Удаляет одну пачку сырых событий user_activity старше retention_days дней.
+    Агрегаты user_activity_daily/user_activity_totals обновляются при записи
+    событий, поэтому статистика после удаления не меняется.
+    :return: количество удалённых строк
+    """
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            DELETE FROM user_activity
+            WHERE id IN (
+                SELECT id FROM user_activity
+                WHERE ts < datetime('now', ?)
+                ORDER BY ts
+                LIMIT ?
+            )
+        """, (f'-{retention_days} days', batch_size))
+        deleted = cur.rowcount
+
+    return deleted
+
+
+def incremental_vacuum(max_pages: int) -> int:
+    """
+    Возвращает ОС до max_pages свободных страниц файла БД.
+    :return: сколько свободных страниц осталось
+    """
+    with db_cursor() as cur:
+        cur.execute(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        cur.fetchall()
+        cur.execute("PRAGMA freelist_count")
+        (free_pages,) = cur.fetchone()
+
+    return free_pages
@@ -0,0 +1,397 @@
+# utils/database_utils/migrations.py
+"""
+Версионные миграции схемы БД.
+
+Каждая миграция — функция, принимающая курсор. Номер последней применённой
+миграции хранится в таблице schema_version. Миграция и запись её номера
+выполняются в одной транзакции BEGIN IMMEDIATE: пока она идёт, остальные
+писатели ждут (busy_timeout), а читатели в режиме WAL продолжают работать
+со старым снимком. При ошибке транзакция откатывается целиком.
+"""
+import sqlite3
+
+from utils.database_utils.schedule_store import normalize_lecturer
+from utils.logger import write_user_log
+
+# Столбцы таблицы users в порядке объявления {"name_column": "type"}
+USERS_COLUMNS = {
+    "user_id": "INTEGER",
+    "user_tag": "TEXT",
+    "user_name": "TEXT",
+    "real_user_name": "TEXT",
+    "cust_user_name": "TEXT",
+    "user_day": "INTEGER",
+    "user_month": "INTEGER",
+    "user_year": "INTEGER",
+    "user_wishlist": "TEXT",
+    "user_group": "TEXT",
+    "user_subgroup": "TEXT",
+    "is_approved": "BOOLEAN",
+    "created_at": "DATETIME DEFAULT CURRENT_TIMESTAMP",
+    "friends": "TEXT",
+    "schedule_notifications": "BOOLEAN DEFAULT 0"
+}
+
+
+def _baseline(cur: sqlite3.Cursor):
+    """Исходная схема: то, что раньше создавали init_database и ensure_columns."""
+    columns_sql = ",\n".join(f"{name} {definition}" for name, definition in USERS_COLUMNS.items())
+    cur.execute(f"CREATE TABLE IF NOT EXISTS users ({columns_sql})")
+
+    # В старых БД части столбцов может не быть — добавляем недостающие
+    cur.execute("PRAGMA table_info(users)")
+    existing_columns = {row[1] for row in cur.fetchall()}
+    for column_name, column_def in USERS_COLUMNS.items():
+        if column_name not in existing_columns:
+            # ALTER TABLE не умеет добавлять столбец с непостоянным DEFAULT;
+            # значение по умолчанию вернёт пересборка таблицы в миграции 2
+            column_def = column_def.replace(" DEFAULT CURRENT_TIMESTAMP", "")
+            cur.execute(f"ALTER TABLE users ADD COLUMN {column_name} {column_def}")
+            write_user_log(f"Добавлен столбец '{column_name}' в таблицу 'users'")
+
+    # Для старых пользователей рассылка расписания по умолчанию выключена
+    cur.execute("UPDATE users SET schedule_notifications = 0 WHERE schedule_notifications IS NULL")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_activity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            ts DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_ts ON user_activity(ts)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_user_ts ON user_activity(user_id, ts)")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS friend_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_id INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',  -- Статусы: 'pending', 'accepted', 'declined'
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS wishlist_suggestions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_id INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL,
+            wishlist_text TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',  -- Статусы: 'pending', 'accepted', 'declined'
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS task_settings (
+            task_name TEXT PRIMARY KEY,
+            enabled BOOLEAN DEFAULT 1,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _users_primary_key(cur: sqlite3.Cursor):
+    """
+    Пересоздаёт users с user_id INTEGER PRIMARY KEY и добавляет индексы
+    для частых выборок. Дубликаты user_id (их допускала старая схема)
+    схлопываются: остаётся самая ранняя запись.
+    """
+    columns = ", ".join(USERS_COLUMNS)
+    columns_sql = ",\n".join(
+        f"{name} INTEGER PRIMARY KEY" if name == "user_id" else f"{name} {definition}"
+        for name, definition in USERS_COLUMNS.items()
+    )
+
+    cur.execute("DROP TABLE IF EXISTS users_new")
+    cur.execute(f"CREATE TABLE users_new ({columns_sql})")
+    cur.execute(f"""
+        INSERT INTO users_new ({columns})
+        SELECT {columns} FROM users
+        WHERE rowid IN (
+            SELECT MIN(rowid) FROM users
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id
+        )
+    """)
+    cur.execute("DROP TABLE users")
+    cur.execute("ALTER TABLE users_new RENAME TO users")
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_tag ON users(user_tag)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_group ON users(user_group)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_birthday ON users(user_month, user_day)")
+
+
+def _friendships(cur: sqlite3.Cursor):
+    """
+    Переносит друзей из строки users.friends ("id1,id2,...") в таблицу
+    рёбер friendships. Порядок добавления сохраняется через rowid.
+    Столбец users.friends больше не используется.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS friendships (
+            user_id INTEGER NOT NULL,
+            friend_id INTEGER NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, friend_id)
+        )
+    """)
+    # Обратный индекс: «у кого X в друзьях»
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_friendships_friend ON friendships(friend_id, user_id)")
+
+    cur.execute("SELECT user_id, friends FROM users WHERE friends IS NOT NULL AND friends != '' ORDER BY user_id")
+    edges = []
+    for user_id, friends_str in cur.fetchall():
+        for friend_id in friends_str.split(","):
+            friend_id = friend_id.strip()
+            if friend_id.lstrip("-").isdigit():
+                edges.append((user_id, int(friend_id)))
+
+    cur.executemany("INSERT OR IGNORE INTO friendships (user_id, friend_id) VALUES (?, ?)", edges)
+
+
+def _activity_rollups(cur: sqlite3.Cursor):
+    """
+    Агрегаты активности: события по дням и итоги по пользователю.
+    Дальше поддерживаются инкрементально при записи событий,
+    здесь заполняются по уже накопленной user_activity.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_activity_daily (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,  -- YYYY-MM-DD (UTC)
+            events INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_daily_day ON user_activity_daily(day)")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_activity_totals (
+            user_id INTEGER PRIMARY KEY,
+            total_events INTEGER NOT NULL DEFAULT 0,
+            active_days INTEGER NOT NULL DEFAULT 0,
+            first_ts DATETIME,
+            last_ts DATETIME
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_totals_events ON user_activity_totals(total_events)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_totals_days ON user_activity_totals(active_days)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_activity_totals_last ON user_activity_totals(last_ts)")
+
+    cur.execute("DELETE FROM user_activity_daily")
+    cur.execute("""
+        INSERT INTO user_activity_daily (user_id, day, events)
+        SELECT user_id, DATE(ts), COUNT(*)
+        FROM user_activity
+        GROUP BY user_id, DATE(ts)
+    """)
+
+    cur.execute("DELETE FROM user_activity_totals")
+    cur.execute("""
+        INSERT INTO user_activity_totals (user_id, total_events, active_days, first_ts, last_ts)
+        SELECT user_id, COUNT(*), COUNT(DISTINCT DATE(ts)), MIN(ts), MAX(ts)
+        FROM user_activity
+        GROUP BY user_id
+    """)
+
+
+def _schedule_store(cur: sqlite3.Cursor):
+    """
+    Хранилище расписаний: занятия групп с развёрнутыми правилами дат
+    (одна строка — одно занятие в конкретный день) и версии загруженных
+    файлов <группа>.json. Заполняется services.schedule_ingest.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schedule_files (
+            group_name TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            lessons_count INTEGER NOT NULL DEFAULT 0,
+            loaded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS lessons (
+            id INTEGER PRIMARY KEY,
+            group_name TEXT NOT NULL,
+            subgroup TEXT NOT NULL DEFAULT 'Common',
+            date TEXT NOT NULL,  -- YYYY-MM-DD
+            start_min INTEGER NOT NULL,  -- минуты от полуночи
+            end_min INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            type TEXT,
+            lecturer TEXT,
+            classroom TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_group_date ON lessons(group_name, date, start_min)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_lecturer_date ON lessons(lecturer, date)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_classroom_date ON lessons(classroom, date)")
+
+
+def _lessons_lecturer_key(cur: sqlite3.Cursor):
+    """
+    Нормализованное имя преподавателя (normalize_lecturer) для поиска
+    по префиксу: индекс (lecturer_key, date) — обратный индекс
+    «преподаватель → занятия» по всем группам.
+    """
+    cur.execute("ALTER TABLE lessons ADD COLUMN lecturer_key TEXT")
+    cur.execute("SELECT DISTINCT lecturer FROM lessons WHERE lecturer IS NOT NULL")
+    cur.executemany(
+        "UPDATE lessons SET lecturer_key = ? WHERE lecturer = ?",
+        [(normalize_lecturer(lecturer), lecturer) for (lecturer,) in cur.fetchall()]
+    )
+    cur.execute("DROP INDEX IF EXISTS idx_lessons_lecturer_date")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_lecturer_key ON lessons(lecturer_key, date, start_min)")
+
+
+def _lessons_date_index(cur: sqlite3.Cursor):
+    """Индекс для выборки занятости всех аудиторий за период (поиск свободных аудиторий)."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_date_classroom ON lessons(date, classroom, start_min, end_min)")
+
+
+def _sent_notifications(cur: sqlite3.Cursor):
+    """
+    Журнал отправленных уведомлений: ключ (дата, вид, слот, получатель)
+    защищает от повторной отправки, в том числе после перезапуска бота.
+    Дата первая в ключе, чтобы удаление старых записей шло по диапазону.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sent_notifications (
+            date TEXT NOT NULL,  -- YYYY-MM-DD
+            kind TEXT NOT NULL,
+            slot TEXT NOT NULL DEFAULT '',
+            target INTEGER NOT NULL,  -- user_id или chat_id
+            PRIMARY KEY (date, kind, slot, target)
+        ) WITHOUT ROWID
+    """)
+
+
+def _delivery_failures(cur: sqlite3.Cursor):
+    """
+    Журнал недоставленных сообщений с причиной и состояние доступности
+    пользователей для бота: недоступность истекает через REACHABILITY_TTL,
+    после чего отправка пробуется снова.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_failures (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            error TEXT,
+            text TEXT,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            failed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_delivery_failures_failed_at ON delivery_failures(failed_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_delivery_failures_chat ON delivery_failures(chat_id, failed_at)")
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_reachability (
+            user_id INTEGER PRIMARY KEY,
+            reachable BOOLEAN NOT NULL,
+            reason TEXT,
+            updated_at REAL NOT NULL  -- unix-время
+        )
+    """)
+
+
+def _broadcast_jobs(cur: sqlite3.Cursor):
+    """
+    Задания массовых рассылок: текст, статус, курсор по user_id
+    (рассылка продолжается с него после перезапуска) и счётчики.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            text TEXT NOT NULL,
+            parse_mode TEXT,
+            reply_markup TEXT,  -- JSON клавиатуры
+            created_by INTEGER,
+            cursor INTEGER NOT NULL DEFAULT 0,  -- последний обработанный user_id
+            total INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finished_at DATETIME
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_kind ON broadcast_jobs(kind)")
+
+
+# Список миграций (версия, описание, функция). Новые добавляются только в конец.
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "users primary key and indexes", _users_primary_key),
+    (3, "friendships edge table", _friendships),
+    (4, "activity rollup tables", _activity_rollups),
+    (5, "schedule store", _schedule_store),
+    (6, "lessons lecturer search key", _lessons_lecturer_key),
+    (7, "lessons date index", _lessons_date_index),
+    (8, "sent notifications log", _sent_notifications),
+    (9, "delivery failures and user reachability", _delivery_failures),
+    (10, "broadcast jobs", _broadcast_jobs),
+]
+
+
+def get_schema_version(con: sqlite3.Connection) -> int:
+    """Возвращает номер последней применённой миграции (0, если их не было)."""
+    cur = con.cursor()
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+        (version,) = cur.fetchone()
+    finally:
+        cur.close()
+    return version or 0
+
+
+def run_migrations(con: sqlite3.Connection):
+    """Применяет по порядку все миграции, которых ещё нет в schema_version."""
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    con.commit()
+
+    current_version = get_schema_version(con)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        cur = con.cursor()
+        try:
+            # Захватываем блокировку записи до чтения версии, чтобы два
+            # процесса не применили одну и ту же миграцию дважды
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+            if cur.fetchone():
+                con.rollback()
+                continue
+
+            migrate(cur)
+            cur.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            con.commit()
+            write_user_log(f"Применена миграция БД {version}: {description}")
+        except Exception:
+            if con.in_transaction:
+                con.rollback()
+            write_user_log(f"Ошибка применения миграции БД {version}: {description}")
+            raise
+        finally:
+            cur.close()
@@ -0,0 +1,82 @@
+# utils/database_utils/reachability.py
+"""
+Доступность пользователей для бота (таблица user_reachability).
+
+Состояние обновляется по результатам отправки (бот заблокирован, чат
+не найден, успешная отправка после недоступности) и по апдейтам
+my_chat_member, а проверка перед отправкой — поиск в памяти процесса,
+без запросов к Telegram и к БД. Пользователь без записи считается
+доступным. Недоступность действует REACHABILITY_TTL секунд: потом
+следующая отправка пробуется снова и заново подтверждает состояние.
+Все записи загружаются в память при первом обращении.
+"""
+import threading
+import time
+
+from utils.database_utils.connection import db_cursor
+
+# Сколько секунд считать пользователя недоступным без повторной проверки
+REACHABILITY_TTL = 7 * 24 * 3600
+
+# user_id -> (доступен, unix-время последнего обновления)
+_states: dict[int, tuple[bool, float]] | None = None
+_lock = threading.Lock()
+
+
+def _get_states() -> dict[int, tuple[bool, float]]:
+    global _states
+    with _lock:
+        if _states is None:
+            with db_cursor() as cur:
+                cur.execute("SELECT user_id, reachable, updated_at FROM user_reachability")
+                _states = {user_id: (bool(reachable), updated_at) for user_id, reachable, updated_at in cur.fetchall()}
+        return _states
+
+
+def load_reachability() -> int:
+    """Загружает состояния в память. Возвращает число недоступных пользователей."""
+    now = time.time()
+    return sum(1 for reachable, updated_at in _get_states().values()
+               if not reachable and now - updated_at < REACHABILITY_TTL)
+
+
+def is_user_reachable(user_id: int, ignore_ttl: bool = False) -> bool:
+    """
+    Проверяет, можно ли писать пользователю. Не обращается ни к БД, ни к Telegram.
+    ignore_ttl=True — считать недоступным и при истёкшей отметке.
+    """
+    state = _get_states().get(int(user_id))
+    if state is None or state[0]:
+        return True
+    # Истёкшая недоступность — пробуем отправить снова
+    return not ignore_ttl and time.time() - state[1] >= REACHABILITY_TTL
+
+
+def set_user_reachable(user_id: int, reachable: bool, reason: str | None = None) -> bool:
+    """
+    Сохраняет состояние доступности. Доступность, которая уже известна,
+    повторно не записывается, так что успешные отправки не нагружают БД.
+    :return: True, если запись в БД изменилась
+    """
+    user_id = int(user_id)
+    state = _get_states().get(user_id)
+    if reachable and (state is None or state[0]):
+        return False
+
+    now = time.time()
+    with db_cursor(commit=True) as cur:
+        cur.execute("""
+            INSERT INTO user_reachability (user_id, reachable, reason, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                reachable = excluded.reachable,
+                reason = excluded.reason,
+                updated_at = excluded.updated_at
+        """, (user_id, reachable, reason, now))
+    with _lock:
+        _states[user_id] = (reachable, now)
+    return True
+
+
+def get_unreachable_since() -> float:
+    """Unix-время, начиная с которого отметки о недоступности ещё действуют (для SQL-фильтров)."""
+    return time.time() - REACHABILITY_TTL
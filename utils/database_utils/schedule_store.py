@@ -0,0 +1,183 @@
+# utils/database_utils/schedule_store.py
+"""
+Хранилище расписаний групп (таблицы lessons и schedule_files).
+
+Каждая строка lessons — одно занятие группы в конкретный день: правила дат
+из <группа>.json разворачиваются при загрузке (services.schedule_ingest).
+В schedule_files хранится версия загруженного файла (mtime и размер),
+по ней загрузка пропускает неизменившиеся файлы, а кэш готовых текстов
+расписания отличает старые тексты от новых.
+"""
+import re
+from datetime import date
+
+from utils.database_utils.connection import db_cursor
+
+# Подгруппа общих занятий (у пользователя "Common" означает «все занятия»)
+COMMON_SUBGROUP = "Common"
+
+LESSON_COLUMNS = "subgroup, date, start_min, end_min, title, type, lecturer, classroom"
+
+# Сколько занятий преподавателя возвращать за один запрос
+LECTURER_LESSONS_LIMIT = 50
+
+_NOT_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_lecturer(name: str | None) -> str | None:
+    """
+    Приводит имя преподавателя к ключу поиска: нижний регистр, ё → е,
+    знаки препинания заменены пробелами ("Иванов И.И." -> "иванов и и").
+    """
+    if not name:
+        return None
+    key = _NOT_WORD_RE.sub(" ", name.lower().replace("ё", "е")).strip()
+    return key or None
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Переводит минуты от полуночи в строку HH:MM."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _row_to_lesson(row) -> dict:
+    """Строка lessons -> занятие в том же виде, что в файле расписания."""
+    subgroup, lesson_date, start_min, end_min, title, lesson_type, lecturer, classroom = row
+    return {
+        "title": title,
+        "type": lesson_type,
+        "lecturer": lecturer,
+        "classroom": classroom,
+        "subgroup": subgroup,
+        "date": lesson_date,
+        "start_min": start_min,
+        "end_min": end_min,
+        "time": {"start": minutes_to_time(start_min), "end": minutes_to_time(end_min)},
+    }
+
+
+def get_schedule_versions() -> dict[str, tuple[int, int]]:
+    """Возвращает {группа: (mtime_ns, size)} для всех загруженных файлов."""
+    with db_cursor() as cur:
+        cur.execute("SELECT group_name, mtime_ns, size FROM schedule_files")
+        return {group_name: (mtime_ns, size) for group_name, mtime_ns, size in cur.fetchall()}
+
+
+def get_schedule_version(group_name: str) -> tuple[int, int] | None:
+    """Возвращает версию расписания группы (mtime_ns, size) или None, если его нет."""
+    with db_cursor() as cur:
+        cur.execute("SELECT mtime_ns, size FROM schedule_files WHERE group_name = ?", (group_name,))
+        row = cur.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def group_schedule_exists(group_name: str) -> bool:
+    """Проверяет, загружено ли расписание группы."""
+    return get_schedule_version(group_name) is not None
+
+
+def replace_group_lessons(group_name: str, version: tuple[int, int], rows: list[tuple]):
+    """
+    Заменяет занятия группы одной транзакцией.
+    rows — кортежи в порядке LESSON_COLUMNS.
+    """
+    mtime_ns, size = version
+    with db_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM lessons WHERE group_name = ?", (group_name,))
+        cur.executemany(
+            f"INSERT INTO lessons (group_name, {LESSON_COLUMNS}, lecturer_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(group_name, *row, normalize_lecturer(row[6])) for row in rows]
+        )
+        cur.execute("""
+            INSERT INTO schedule_files (group_name, mtime_ns, size, lessons_count, loaded_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(group_name) DO UPDATE SET
+                mtime_ns = excluded.mtime_ns,
+                size = excluded.size,
+                lessons_count = excluded.lessons_count,
+                loaded_at = excluded.loaded_at
+        """, (group_name, mtime_ns, size, len(rows)))
+
+
+def delete_group_schedule(group_name: str):
+    """Удаляет расписание группы (файл группы удалён)."""
+    with db_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM lessons WHERE group_name = ?", (group_name,))
+        cur.execute("DELETE FROM schedule_files WHERE group_name = ?", (group_name,))
+
+
+def get_group_lessons(group_name: str, lesson_date: date, subgroup: str | None = COMMON_SUBGROUP) -> list[dict]:
+    """
+    Возвращает занятия группы на дату, отсортированные по времени начала.
+    subgroup "Common" — все занятия, иначе занятия подгруппы и общие.
+    """
+    query = f"SELECT {LESSON_COLUMNS} FROM lessons WHERE group_name = ? AND date = ?"
+    params = [group_name, lesson_date.isoformat()]
+
+    if subgroup != COMMON_SUBGROUP:
+        query += " AND subgroup IN (?, ?)"
+        params += [COMMON_SUBGROUP, subgroup or COMMON_SUBGROUP]
+
+    with db_cursor() as cur:
+        cur.execute(query + " ORDER BY start_min, id", params)
+        return [_row_to_lesson(row) for row in cur.fetchall()]
+
+
+def find_lecturer_lessons(query: str, lesson_date: date, limit: int = LECTURER_LESSONS_LIMIT) -> list[dict]:
+    """
+    Возвращает занятия преподавателей, чьё имя начинается с query,
+    во всех группах на дату, отсортированные по времени начала.
+    У каждого занятия есть поле group.
+    """
+    key = normalize_lecturer(query)
+    if not key:
+        return []
+
+    with db_cursor() as cur:
+        # Поиск по префиксу — диапазон [key, key + U+FFFF) по индексу lecturer_key
+        cur.execute(f"""
+            SELECT group_name, {LESSON_COLUMNS}
+            FROM lessons
+            WHERE lecturer_key >= ? AND lecturer_key < ? AND date = ?
+            ORDER BY start_min, lecturer, classroom, group_name
+            LIMIT ?
+        """, (key, key + "\uffff", lesson_date.isoformat(), limit))
+        lessons = []
+        for row in cur.fetchall():
+            lesson = _row_to_lesson(row[1:])
+            lesson["group"] = row[0]
+            lessons.append(lesson)
+        return lessons
+
+
+def get_schedule_store_version() -> tuple[int, int, int]:
+    """
+    Возвращает версию хранилища целиком: меняется при загрузке
+    или удалении расписания любой группы.
+    """
+    with db_cursor() as cur:
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(mtime_ns), 0), COALESCE(SUM(size), 0) FROM schedule_files")
+        return tuple(cur.fetchone())
+
+
+def get_all_classrooms() -> list[str]:
+    """Возвращает все аудитории, встречающиеся в расписаниях."""
+    with db_cursor() as cur:
+        cur.execute("SELECT DISTINCT classroom FROM lessons WHERE classroom IS NOT NULL")
+        return [classroom for (classroom,) in cur.fetchall()]
+
+
+def get_classroom_intervals(date_from: date, date_to: date) -> list[tuple[str, str, int, int]]:
+    """
+    Возвращает занятость аудиторий (аудитория, дата, начало, конец в минутах)
+    за период включительно, отсортированную по аудитории, дате и началу.
+    """
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT classroom, date, start_min, end_min
+            FROM lessons
+            WHERE date BETWEEN ? AND ? AND classroom IS NOT NULL
+            ORDER BY classroom, date, start_min
+        """, (date_from.isoformat(), date_to.isoformat()))
+        return cur.fetchall()
+
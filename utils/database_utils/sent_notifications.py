@@ -0,0 +1,62 @@
+# utils/database_utils/sent_notifications.py
+"""
+Журнал отправленных уведомлений (таблица sent_notifications).
+
+Ключ (дата, вид, слот, получатель) уникален: перед отправкой уведомление
+«занимается» через INSERT OR IGNORE, и отправляет его только тот, кому
+вставка удалась. Так уведомление не уходит повторно ни в рамках дня,
+ни после перезапуска бота. Если бот упадёт между записью и отправкой,
+уведомление будет пропущено, а не отправлено дважды.
+Старые записи удаляются раз в сутки (prune_sent_notifications).
+"""
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from utils.database_utils.connection import db_cursor
+
+tz_moscow = pytz.timezone("Europe/Moscow")
+
+# Сколько дней хранить записи (ежедневное расписание занимает завтрашнюю дату)
+SENT_NOTIFICATIONS_KEEP_DAYS = 2
+
+
+def claim_notification(target: int, day: date, kind: str, slot: str = "") -> bool:
+    """
+    Отмечает уведомление как отправленное.
+    :return: True, если его ещё не отправляли (можно отправлять)
+    """
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT OR IGNORE INTO sent_notifications (date, kind, slot, target) VALUES (?, ?, ?, ?)",
+            (day.isoformat(), kind, slot, target)
+        )
+        return cur.rowcount == 1
+
+
+def claim_notifications(targets: list[int], day: date, kind: str, slot: str = "") -> list[int]:
+    """
+    То же, что claim_notification, для многих получателей одной транзакцией.
+    :return: получатели, которым уведомление ещё не отправляли
+    """
+    claimed = []
+    with db_cursor(commit=True) as cur:
+        for target in targets:
+            cur.execute(
+                "INSERT OR IGNORE INTO sent_notifications (date, kind, slot, target) VALUES (?, ?, ?, ?)",
+                (day.isoformat(), kind, slot, target)
+            )
+            if cur.rowcount == 1:
+                claimed.append(target)
+    return claimed
+
+
+def prune_sent_notifications(keep_days: int = SENT_NOTIFICATIONS_KEEP_DAYS) -> int:
+    """
+    Удаляет записи за даты раньше, чем keep_days дней назад.
+    :return: количество удалённых строк
+    """
+    before = datetime.now(tz=tz_moscow).date() - timedelta(days=keep_days)
+    with db_cursor(commit=True) as cur:
+        cur.execute("DELETE FROM sent_notifications WHERE date < ?", (before.isoformat(),))
+        return cur.rowcount
@@ -1,46 +1,123 @@
 # utils/database_utils/task_management.py
-import sqlite3
+"""
+Настройки фоновых тасков (вкл/выкл).
+
+Статусы загружаются из task_settings один раз при запуске (load_task_settings)
+и дальше читаются из памяти; set_task_status пишет в БД и сразу обновляет
+память. Каждый таск спит через task_sleep: переключение таска админом
+(или wake_task, если для таска появилась новая работа) будит его,
+не дожидаясь конца сна.
+
+Здесь же копятся просьбы пересчитать план уведомлений о расписании
+(request_schedule_replan): их оставляют хэндлеры профиля, изменения
+доступности пользователей и загрузка расписаний, а забирает таск
+schedule_notifications.
+"""
+import asyncio
+import threading
 from datetime import datetime
 
-from config import BIRTHDAY_DATABASE
+from utils.database_utils.connection import db_cursor
 from utils.logger import write_user_log
 
+_statuses: dict[str, bool] = {}
+_statuses_loaded = False
+_statuses_lock = threading.Lock()
+
+# События пробуждения тасков и цикл событий, в котором они ждут
+_wakeups: dict[str, asyncio.Event] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+
+# Пользователи, чьи уведомления о расписании нужно пересчитать (None — пересчитать всех)
+_schedule_replan: set[int | None] = set()
+_schedule_replan_lock = threading.Lock()
+
+
+def load_task_settings():
+    """Загружает статусы всех тасков из БД в память (вызывается при запуске бота)."""
+    global _statuses_loaded
+    with db_cursor() as cur:
+        cur.execute("SELECT task_name, enabled FROM task_settings")
+        results = cur.fetchall()
+
+    with _statuses_lock:
+        _statuses.clear()
+        _statuses.update({task_name: bool(enabled) for task_name, enabled in results})
+        _statuses_loaded = True
+
 
 def get_task_status(task_name: str) -> bool:
     """Получает статус таска (включен/выключен)."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-    
-    cur.execute("""
-        SELECT enabled FROM task_settings WHERE task_name = ?
-    """, (task_name,))
-    
-    result = cur.fetchone()
-    cur.close()
-    con.close()
-    
+    if not _statuses_loaded:
+        load_task_settings()
+
     # По умолчанию таск включен, если записи нет
-    return bool(result[0]) if result else True
+    with _statuses_lock:
+        return _statuses.get(task_name, True)
+
+
+def wake_task(task_name: str):
+    """Будит таск, ожидающий в task_sleep. Можно вызывать из любого потока."""
+    event = _wakeups.get(task_name)
+    if event is None or _loop is None or _loop.is_closed():
+        return
+    _loop.call_soon_threadsafe(event.set)
+
+
+def request_schedule_replan(user_id: int | None = None):
+    """
+    Просит планировщик уведомлений о расписании пересчитать события пользователя:
+    после смены группы/подгруппы, включения/выключения рассылки или изменения
+    доступности. user_id=None — пересчитать всех (изменилось само расписание).
+    Можно вызывать из любого потока.
+    """
+    with _schedule_replan_lock:
+        _schedule_replan.add(None if user_id is None else int(user_id))
+    wake_task("schedule_notifications")
+
+
+def take_schedule_replan() -> set[int | None]:
+    """Забирает накопленные просьбы о пересчёте (см. request_schedule_replan)."""
+    with _schedule_replan_lock:
+        requests = set(_schedule_replan)
+        _schedule_replan.clear()
+    return requests
+
+
+async def task_sleep(task_name: str, seconds: float) -> bool:
+    """
+    Спит seconds секунд или пока таск не переключат.
+    :return: True, если таск разбудили во время сна (нужно перепроверить статус и работу)
+    """
+    global _loop
+    _loop = asyncio.get_running_loop()
+    event = _wakeups.setdefault(task_name, asyncio.Event())
+
+    try:
+        await asyncio.wait_for(event.wait(), timeout=max(seconds, 0))
+    except asyncio.TimeoutError:
+        return False
+
+    event.clear()
+    return True
 
 
 def set_task_status(task_name: str, enabled: bool) -> bool:
     """Устанавливает статус таска (включен/выключен)."""
     try:
-        con = sqlite3.connect(BIRTHDAY_DATABASE)
-        cur = con.cursor()
-        
-        cur.execute("""
-            INSERT INTO task_settings (task_name, enabled, updated_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(task_name) DO UPDATE SET
-                enabled = ?,
-                updated_at = ?
-        """, (task_name, enabled, datetime.now(), enabled, datetime.now()))
-        
-        con.commit()
-        cur.close()
-        con.close()
-        
+        with db_cursor(commit=True) as cur:
+            cur.execute("""
+                INSERT INTO task_settings (task_name, enabled, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(task_name) DO UPDATE SET
+                    enabled = ?,
+                    updated_at = ?
+            """, (task_name, enabled, datetime.now(), enabled, datetime.now()))
+
+        with _statuses_lock:
+            _statuses[task_name] = bool(enabled)
+        wake_task(task_name)
+
         status_text = "включен" if enabled else "выключен"
         write_user_log(f"Таск '{task_name}' {status_text}")
         return True
@@ -50,21 +127,18 @@ def set_task_status(task_name: str, enabled: bool) -> bool:
 
 
 def toggle_task(task_name: str) -> bool:
-    """Переключает статус таска (включен <-> выключен)."""
+    """Переключает статус таска (включен <-> выключен). Возвращает новый статус."""
     current_status = get_task_status(task_name)
     new_status = not current_status
-    return set_task_status(task_name, new_status)
+    if set_task_status(task_name, new_status):
+        return new_status
+    return current_status
 
 
 def get_all_tasks_status() -> dict[str, bool]:
     """Получает статусы всех тасков."""
-    con = sqlite3.connect(BIRTHDAY_DATABASE)
-    cur = con.cursor()
-    
-    cur.execute("SELECT task_name, enabled FROM task_settings")
-    results = cur.fetchall()
-    cur.close()
-    con.close()
-    
-    return {task_name: bool(enabled) for task_name, enabled in results}
+    if not _statuses_loaded:
+        load_task_settings()
 
+    with _statuses_lock:
+        return dict(_statuses)
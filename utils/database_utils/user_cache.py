@@ -0,0 +1,90 @@
+# utils/database_utils/user_cache.py
+"""
+Кэш профилей пользователей (результатов get_user_info) в памяти процесса.
+
+LRU с ограничением по размеру и времени жизни записи. Функции, меняющие
+строку пользователя, вызывают invalidate_user после записи в БД.
+Кэш потокобезопасный: к нему обращаются потоки пула БД.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Максимум профилей в кэше
+USER_CACHE_SIZE = 2048
+# Время жизни профиля в кэше, секунд
+USER_CACHE_TTL = 300
+
+_cache: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+_lock = threading.Lock()
+# Увеличивается при каждой инвалидации: профиль, прочитанный из БД до неё,
+# не должен попасть в кэш после неё
+_generation = 0
+_hits = 0
+_misses = 0
+
+
+def get_generation() -> int:
+    """Возвращает текущее поколение кэша (передаётся в put_user)."""
+    return _generation
+
+
+def get_cached_user(user_id: int) -> dict | None:
+    """Возвращает копию профиля из кэша или None, если его нет или он устарел."""
+    global _hits, _misses
+    with _lock:
+        user_id = int(user_id)
+        entry = _cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            _cache.move_to_end(user_id)
+            _hits += 1
+            return dict(entry[1])
+
+        if entry is not None:
+            del _cache[user_id]
+        _misses += 1
+        return None
+
+
+def put_user(user_id: int, user_info: dict, generation: int):
+    """
+    Кладёт профиль в кэш. generation — значение get_generation() до чтения
+    из БД; если с тех пор была инвалидация, профиль мог устареть и не сохраняется.
+    """
+    with _lock:
+        if generation != _generation:
+            return
+        user_id = int(user_id)
+        _cache[user_id] = (time.monotonic() + USER_CACHE_TTL, dict(user_info))
+        _cache.move_to_end(user_id)
+        while len(_cache) > USER_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate_user(user_id: int):
+    """Удаляет профиль пользователя из кэша (после изменения его данных)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.pop(int(user_id), None)
+
+
+def clear_user_cache():
+    """Полностью очищает кэш профилей."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def get_user_cache_stats() -> dict:
+    """Возвращает статистику кэша: размер, попадания, промахи и долю попаданий в %."""
+    with _lock:
+        total = _hits + _misses
+        return {
+            "size": len(_cache),
+            "max_size": USER_CACHE_SIZE,
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / total * 100, 1) if total else 0.0,
+        }
@@ -6,6 +6,7 @@ from aiogram.types import ChatMemberAdministrator, ChatMemberOwner
 from bot import bot
 
 from utils.logger import write_user_log
+from utils.repository import group_schedule_exists
 
 GROUPS_FILE = "groups.json"
 TEMP_FILE = "groups_temp.json"
@@ -50,13 +51,12 @@ def is_valid_group_name(name: str) -> bool:
 
 async def is_group_file_exists(group_name: str) -> bool:
     """
-    Асинхронно проверяет, существует ли файл с расписанием группы.
+    Асинхронно проверяет, загружено ли расписание группы в БД.
 
     :param group_name: Название группы (например, "ИДБ-23-10")
-    :return: True, если файл существует, иначе False
+    :return: True, если расписание есть, иначе False
     """
-    file_path = f"{group_name}.json"
-    return os.path.exists(file_path)
+    return await group_schedule_exists(group_name)
 
 async def is_bot_admin(chat_id: int) -> bool:
     """Проверяет, является ли сам бот админом группы."""
@@ -0,0 +1,282 @@
+# utils/outbound_queue.py
+"""
+Общая очередь исходящих сообщений бота с учётом лимитов Telegram.
+
+Рассылки не вызывают bot.send_message напрямую, а ставят сообщение в очередь
+(submit_message) и получают future с результатом отправки. Пул воркеров
+отправляет сообщения параллельно, соблюдая:
+- общий лимит — не больше GLOBAL_RATE_PER_SEC сообщений в секунду;
+- лимит чата — не чаще раза в PRIVATE_CHAT_INTERVAL секунд в личный чат
+  и раза в GROUP_CHAT_INTERVAL секунд в группу.
+Лимит чата проверяется непосредственно перед отправкой: сообщение в чат,
+лимит которого ещё не восстановился, откладывается до нужного момента
+и не занимает воркера. Пока у чата есть отложенное сообщение (в том числе
+отложенное для повтора), следующие сообщения в этот чат ждут за ним
+в очереди чата — порядок сообщений в каждом чате сохраняется.
+
+Ошибки отправки разбираются здесь же:
+- TelegramRetryAfter — отправка всех сообщений приостанавливается на
+  retry_after секунд, сообщение возвращается в очередь;
+- сетевые ошибки и ошибки сервера Telegram — повтор с экспоненциальной
+  задержкой и случайным разбросом;
+- бот заблокирован, пользователь удалён или чат не найден — пользователь
+  отмечается недоступным (reachability), и сообщения ему не отправляются,
+  пока отметка не истечёт.
+Окончательно недоставленные сообщения записываются в delivery_failures,
+а future получает исключение.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+
+from aiogram.exceptions import (
+    TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest, TelegramNetworkError, TelegramServerError
+)
+
+from bot import bot
+from utils.logger import write_user_log
+from utils.database_utils.db_executor import run_db
+from utils.database_utils.delivery_failures import record_delivery_failure
+from utils.database_utils.reachability import load_reachability, is_user_reachable
+from utils.repository import set_user_reachable
+
+# Общий лимит бота, сообщений в секунду
+GLOBAL_RATE_PER_SEC = 30
+# Минимальный интервал между сообщениями в один личный чат, секунд
+PRIVATE_CHAT_INTERVAL = 1.0
+# Минимальный интервал между сообщениями в одну группу (20 в минуту), секунд
+GROUP_CHAT_INTERVAL = 3.0
+# Сколько сообщений отправляется одновременно
+OUTBOUND_WORKERS = 8
+# Сколько чатов помнить для лимитов, прежде чем чистить устаревшие записи
+CHAT_SLOTS_MAX = 10000
+# Сколько раз пытаться отправить сообщение, включая первую попытку
+DELIVERY_MAX_ATTEMPTS = 5
+# Задержка перед первым повтором после сетевой ошибки и её предел, секунд
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 60.0
+# Причины ошибок, после которых пользователь отмечается недоступным
+UNREACHABLE_REASONS = {"forbidden", "chat_not_found"}
+
+_queue: asyncio.Queue = asyncio.Queue()
+# chat_id -> момент (time.monotonic), раньше которого в чат писать нельзя
+_chat_next_slot: dict[int, float] = {}
+# Следующее сообщение чата (отложенное или уже в общей очереди) и сообщения,
+# ждущие за ним. Чат есть в _chat_waiting, пока у него есть сообщение в работе
+_chat_head: dict[int, tuple] = {}
+_chat_waiting: dict[int, deque] = {}
+# Общий лимит: момент, когда освободится следующий слот
+_global_next_slot = 0.0
+_global_lock = asyncio.Lock()
+_stats = {"sent": 0, "failed": 0, "delayed": 0, "retried": 0, "skipped_unreachable": 0}
+
+
+class RecipientUnreachableError(Exception):
+    """Получатель недоступен для бота: сообщение не отправлялось."""
+
+
+def _chat_interval(chat_id: int) -> float:
+    # У групп и каналов chat_id отрицательный
+    return GROUP_CHAT_INTERVAL if chat_id < 0 else PRIVATE_CHAT_INTERVAL
+
+
+def _chat_slot_wait(chat_id: int) -> float:
+    """Сколько секунд осталось до свободного слота чата (0 — свободен)."""
+    now = time.monotonic()
+    return max(_chat_next_slot.get(chat_id, now) - now, 0)
+
+
+def _take_chat_slot(chat_id: int) -> float:
+    """
+    Занимает слот чата, если он свободен, и возвращает 0.
+    Иначе возвращает, сколько секунд осталось до свободного слота.
+    """
+    wait = _chat_slot_wait(chat_id)
+    if wait > 0:
+        return wait
+    now = time.monotonic()
+
+    if len(_chat_next_slot) > CHAT_SLOTS_MAX:
+        for stale_chat_id in [cid for cid, slot in _chat_next_slot.items() if slot <= now]:
+            del _chat_next_slot[stale_chat_id]
+    _chat_next_slot[chat_id] = now + _chat_interval(chat_id)
+    return 0
+
+
+async def _acquire_global_slot():
+    """Ждёт свободного слота общего лимита."""
+    global _global_next_slot
+    async with _global_lock:
+        now = time.monotonic()
+        slot = max(now, _global_next_slot)
+        _global_next_slot = slot + 1 / GLOBAL_RATE_PER_SEC
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+def _pause_global(seconds: float):
+    """Сдвигает общий лимит: до истечения паузы сообщения не отправляются."""
+    global _global_next_slot
+    _global_next_slot = max(_global_next_slot, time.monotonic() + seconds)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Задержка перед повтором номер attempt: экспонента с разбросом от половины до полной."""
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _park(delay: float, job: tuple):
+    """Откладывает сообщение на delay секунд; следующие сообщения в тот же чат ждут за ним."""
+    chat_id = job[0]
+    _chat_waiting.setdefault(chat_id, deque())
+    _chat_head[chat_id] = job
+    asyncio.get_running_loop().call_later(delay, _queue.put_nowait, job)
+
+
+def _release_chat(chat_id: int):
+    """Сообщение чата обработано: в общую очередь идёт следующее из очереди чата."""
+    waiting = _chat_waiting.get(chat_id)
+    if waiting is None:
+        return
+    if waiting:
+        job = waiting.popleft()
+        _chat_head[chat_id] = job
+        _queue.put_nowait(job)
+    else:
+        del _chat_waiting[chat_id]
+
+
+def submit_message(chat_id: int, text: str, **kwargs) -> asyncio.Future:
+    """
+    Ставит сообщение в очередь. kwargs передаются в bot.send_message.
+    :return: future с отправленным сообщением (или исключением отправки)
+    """
+    future = asyncio.get_running_loop().create_future()
+    if not is_user_reachable(chat_id):
+        _stats["skipped_unreachable"] += 1
+        future.set_exception(RecipientUnreachableError(f"пользователь {chat_id} недоступен для бота"))
+        return future
+
+    _queue.put_nowait((int(chat_id), text, kwargs, future, 1))
+    return future
+
+
+async def send_message(chat_id: int, text: str, **kwargs):
+    """Отправляет сообщение через очередь и ждёт результата."""
+    return await submit_message(chat_id, text, **kwargs)
+
+
+async def _fail(job: tuple, reason: str, error: Exception):
+    """Окончательная ошибка: запись в журнал недоставленных и исключение в future."""
+    chat_id, text, kwargs, future, attempt = job
+    _stats["failed"] += 1
+    try:
+        if reason in UNREACHABLE_REASONS and chat_id > 0:
+            await set_user_reachable(chat_id, False, reason)
+        await run_db(record_delivery_failure, chat_id, reason, str(error), text, attempt)
+    except Exception as e:
+        write_user_log(f"Не удалось записать недоставленное сообщение для {chat_id}: {e}", level="error")
+    if not future.done():
+        future.set_exception(error)
+
+
+async def _deliver(job: tuple):
+    chat_id, text, kwargs, future, attempt = job
+    try:
+        result = await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+    except TelegramRetryAfter as e:
+        # Флуд-контроль распространяется на весь бот: приостанавливаем все отправки
+        _pause_global(e.retry_after)
+        if attempt >= DELIVERY_MAX_ATTEMPTS:
+            await _fail(job, "retry_after", e)
+            return
+        _stats["retried"] += 1
+        write_user_log(f"⏳ Telegram просит подождать {e.retry_after} с перед отправкой в {chat_id}")
+        _park(e.retry_after, (chat_id, text, kwargs, future, attempt + 1))
+    except TelegramForbiddenError as e:
+        await _fail(job, "forbidden", e)
+    except TelegramBadRequest as e:
+        await _fail(job, "chat_not_found" if "chat not found" in str(e).lower() else "bad_request", e)
+    except (TelegramNetworkError, TelegramServerError) as e:
+        if attempt >= DELIVERY_MAX_ATTEMPTS:
+            await _fail(job, "network", e)
+            return
+        _stats["retried"] += 1
+        _park(_backoff_delay(attempt), (chat_id, text, kwargs, future, attempt + 1))
+    except Exception as e:
+        # Остальные ошибки повтором не исправить
+        await _fail(job, type(e).__name__, e)
+    else:
+        _stats["sent"] += 1
+        if not future.done():
+            future.set_result(result)
+        # Отправка после истёкшей отметки о недоступности снимает её
+        if chat_id > 0 and not is_user_reachable(chat_id, ignore_ttl=True):
+            await set_user_reachable(chat_id, True, "delivered")
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        chat_id, text, kwargs, future, attempt = job
+        processed = False
+        try:
+            if chat_id in _chat_waiting and _chat_head.get(chat_id) is not job:
+                # У чата есть отложенное или отправляемое сообщение — ждём за ним
+                _chat_waiting[chat_id].append(job)
+                continue
+            # Пока сообщение обрабатывается, остальные сообщения чата ждут за ним
+            _chat_head.pop(chat_id, None)
+            _chat_waiting.setdefault(chat_id, deque())
+            processed = True
+            if future.cancelled():
+                continue
+            # Занятый чат откладываем, не расходуя слот общего лимита
+            wait = _chat_slot_wait(chat_id)
+            if wait == 0:
+                await _acquire_global_slot()
+                # Пока ждали общий слот, чат мог занять другой воркер. Между проверкой
+                # и занятием слота чата нет await — два воркера не займут его вместе
+                wait = _take_chat_slot(chat_id)
+            if wait > 0:
+                _stats["delayed"] += 1
+                _park(wait, job)
+                continue
+            await _deliver(job)
+        except Exception as e:
+            write_user_log(f"Ошибка очереди исходящих сообщений ({chat_id}): {e}", level="error")
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            # Сообщение не отложено снова — очередь чата двигается дальше
+            if processed and chat_id not in _chat_head:
+                _release_chat(chat_id)
+            _queue.task_done()
+
+
+async def run_outbound_workers():
+    """Пул воркеров очереди исходящих сообщений. Запускается вместе с ботом."""
+    unreachable_count = await run_db(load_reachability)
+    write_user_log(
+        f"📤 Очередь исходящих сообщений запущена ({OUTBOUND_WORKERS} воркеров, "
+        f"недоступных пользователей: {unreachable_count})"
+    )
+    workers = [asyncio.create_task(_worker()) for _ in range(OUTBOUND_WORKERS)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+
+def get_outbound_stats() -> dict:
+    """
+    Возвращает состояние очереди: ожидают отправки, отправлено, ошибок,
+    отложено по лимиту чата, повторов, пропущено недоступных получателей.
+    """
+    return {
+        "pending": _queue.qsize(),
+        **_stats,
+    }
@@ -0,0 +1,144 @@
+# utils/repository.py
+"""
+Асинхронный API доступа к данным для хэндлеров, декораторов и тасков.
+
+Каждая функция — обёртка над одноимённой синхронной функцией из
+utils.database / utils.database_utils, выполняемая в пуле потоков БД.
+Функции stream_* — асинхронные генераторы над синхронными iter_*:
+строки читаются страницами, а не загружаются списком целиком.
+Синхронные функции остаются для кода, который уже работает вне цикла событий.
+"""
+from functools import wraps
+
+
+from utils import database
+from utils.database_utils import (broadcasts, database_statistic, friends, reachability, schedule_store,
+                                  sent_notifications, task_management)
+from utils.database_utils.db_executor import to_async, to_async_stream
+from utils.user_context import get_context_user_info, forget_context_user
+
+
+def _user_mutator(func):
+    """
+    Как to_async, но для функций, меняющих строку пользователя (user_id —
+    первый аргумент): сбрасывает профиль, загруженный для текущего апдейта.
+    """
+    async_func = to_async(func)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        user_id = args[0] if args else kwargs.get("user_id")
+        forget_context_user(user_id)
+        return await async_func(*args, **kwargs)
+    return wrapper
+
+
+# Пользователи
+set_user_birthdate = _user_mutator(database.set_user_birthdate)
+check_users = to_async(database.check_users)
+check_users_in_7_days = to_async(database.check_users_in_7_days)
+get_real_user_name = to_async(database.get_real_user_name)
+check_user_exists = to_async(database.check_user_exists)
+update_cust_user_name = _user_mutator(database.update_cust_user_name)
+update_user_name = _user_mutator(database.update_user_name)
+update_user_wishlist = _user_mutator(database.update_user_wishlist)
+update_is_approved = _user_mutator(database.update_is_approved)
+get_user_info = to_async(database.get_user_info)
+get_users_info = to_async(database.get_users_info)
+sync_user = _user_mutator(database.sync_user)
+stream_user_ids = to_async_stream(database.iter_user_ids)
+get_user_wishlist = to_async(database.get_user_wishlist)
+set_user_group_subgroup = _user_mutator(database.set_user_group_subgroup)
+add_user_to_db = _user_mutator(database.add_user_to_db)
+get_users_by_group = to_async(database.get_users_by_group)
+update_real_user_name = _user_mutator(database.update_real_user_name)
+toggle_user_approval = _user_mutator(database.toggle_user_approval)
+get_approval_status = to_async(database.get_approval_status)
+toggle_schedule_notifications = _user_mutator(database.toggle_schedule_notifications)
+get_schedule_notifications_status = to_async(database.get_schedule_notifications_status)
+stream_schedule_subscribers = to_async_stream(database.iter_schedule_subscribers)
+get_id_from_username = to_async(database.get_id_from_username)
+check_user_by_username = to_async(database.check_user_by_username)
+
+
+async def get_current_user_info(user_id: int) -> dict | None:
+    """Профиль из контекста текущего апдейта, если он загружен, иначе — из БД."""
+    user_info = get_context_user_info(user_id)
+    if user_info is not None:
+        return user_info
+    return await get_user_info(user_id)
+
+
+# Друзья и предложения вишлистов
+add_friend_request = to_async(friends.add_friend_request)
+delete_friend_request = to_async(friends.delete_friend_request)
+update_friend_request_status = to_async(friends.update_friend_request_status)
+check_existing_request = to_async(friends.check_existing_request)
+check_existing_friend = to_async(friends.check_existing_friend)
+add_friend_to_user = to_async(friends.add_friend_to_user)
+get_friend_id_from_request_id = to_async(friends.get_friend_id_from_request_id)
+get_list_friends = to_async(friends.get_list_friends)
+get_friends_info = to_async(friends.get_friends_info)
+get_today_birthdays = to_async(friends.get_today_birthdays)
+get_upcoming_birthdays = to_async(friends.get_upcoming_birthdays)
+delete_friend = to_async(friends.delete_friend)
+add_wishlist_suggestion = to_async(friends.add_wishlist_suggestion)
+get_wishlist_suggestion = to_async(friends.get_wishlist_suggestion)
+update_wishlist_suggestion_status = to_async(friends.update_wishlist_suggestion_status)
+delete_wishlist_suggestion = to_async(friends.delete_wishlist_suggestion)
+
+# Статистика
+get_users_count = to_async(database_statistic.get_users_count)
+log_user_activity = to_async(database_statistic.log_user_activity)
+count_active_users = to_async(database_statistic.count_active_users)
+count_new_users = to_async(database_statistic.count_new_users)
+get_last_users = to_async(database_statistic.get_last_users)
+get_users_last_days = to_async(database_statistic.get_users_last_days)
+get_last_active_users = to_async(database_statistic.get_last_active_users)
+get_top_active_users = to_async(database_statistic.get_top_active_users)
+get_top_users_by_days = to_async(database_statistic.get_top_users_by_days)
+get_user_rank_by_activity = to_async(database_statistic.get_user_rank_by_activity)
+get_user_rank_by_days = to_async(database_statistic.get_user_rank_by_days)
+get_user_statistics = to_async(database_statistic.get_user_statistics)
+
+# Расписания
+get_schedule_version = to_async(schedule_store.get_schedule_version)
+group_schedule_exists = to_async(schedule_store.group_schedule_exists)
+get_group_lessons = to_async(schedule_store.get_group_lessons)
+find_lecturer_lessons = to_async(schedule_store.find_lecturer_lessons)
+
+# Журнал отправленных уведомлений
+claim_notification = to_async(sent_notifications.claim_notification)
+claim_notifications = to_async(sent_notifications.claim_notifications)
+
+# Доступность пользователей для бота
+_set_user_reachable = to_async(reachability.set_user_reachable)
+
+
+async def set_user_reachable(user_id: int, reachable: bool, reason: str | None = None) -> bool:
+    """Как reachability.set_user_reachable; при изменении пересчитывает уведомления пользователя."""
+    changed = await _set_user_reachable(user_id, reachable, reason)
+    if changed:
+        task_management.request_schedule_replan(user_id)
+    return changed
+
+# Массовые рассылки
+get_broadcast_job = to_async(broadcasts.get_broadcast_job)
+find_broadcast_job = to_async(broadcasts.find_broadcast_job)
+get_recent_broadcast_jobs = to_async(broadcasts.get_recent_broadcast_jobs)
+
+# Настройки тасков (статусы читаются из памяти, поэтому без пула потоков)
+set_task_status = to_async(task_management.set_task_status)
+toggle_task = to_async(task_management.toggle_task)
+task_sleep = task_management.task_sleep
+wake_task = task_management.wake_task
+request_schedule_replan = task_management.request_schedule_replan
+take_schedule_replan = task_management.take_schedule_replan
+
+
+async def get_task_status(task_name: str) -> bool:
+    return task_management.get_task_status(task_name)
+
+
+async def get_all_tasks_status() -> dict[str, bool]:
+    return task_management.get_all_tasks_status()
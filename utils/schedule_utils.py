@@ -5,16 +5,6 @@ import aiofiles
 
 from utils.logger import write_user_log
 
-def is_group_file_exists(group_name: str) -> bool:
-    """
-    Синхронно проверяет, существует ли файл с расписанием группы.
-
-    :param group_name: Название группы (например, "ИДБ-23-10")
-    :return: True, если файл существует, иначе False
-    """
-    file_path = f"{group_name}.json"
-    return os.path.exists(file_path)
-
 async def load_groups():
     """Асинхронная загрузка данных из JSON с защитой от ошибок."""
     file_path = "groups.json"
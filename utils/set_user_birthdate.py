@@ -177,11 +177,11 @@ async def save_birthday(message: types.Message, state: FSMContext):
         user_id = message.from_user.id
         user_tag = message.from_user.username
         user_name = message.from_user.full_name
-        from utils.database import set_user_birthdate, get_user_info, update_is_approved
-        set_user_birthdate(user_id, day, month, year)
-        user_info = get_user_info(user_id)
+        from utils.repository import set_user_birthdate, get_user_info, update_is_approved
+        await set_user_birthdate(user_id, day, month, year)
+        user_info = await get_user_info(user_id)
         if not user_info.get("is_approved"):
-            update_is_approved(user_id, True)
+            await update_is_approved(user_id, True)
         from utils.date_utils import format_date
         formatted_date = format_date(day, month, year)
         await save_user_birthday(
@@ -0,0 +1,37 @@
+# utils/user_context.py
+"""
+Профиль пользователя, от которого пришёл текущий апдейт.
+
+UserContextMiddleware один раз загружает строку users и кладёт её сюда,
+а декораторы и хэндлеры читают её вместо повторных запросов к БД.
+Функции, меняющие строку пользователя, сбрасывают сохранённый профиль,
+чтобы дальше в том же апдейте он перечитывался из БД.
+"""
+from contextvars import ContextVar, Token
+
+_current_user: ContextVar[dict | None] = ContextVar("current_user", default=None)
+
+
+def set_context_user(user_id: int, user_info: dict | None) -> Token:
+    """Запоминает профиль пользователя текущего апдейта."""
+    return _current_user.set({"user_id": user_id, "user_info": user_info})
+
+
+def reset_context_user(token: Token):
+    """Убирает профиль после обработки апдейта."""
+    _current_user.reset(token)
+
+
+def get_context_user_info(user_id: int) -> dict | None:
+    """Возвращает сохранённый профиль, если он загружен для этого user_id, иначе None."""
+    ctx = _current_user.get()
+    if ctx is not None and ctx["user_id"] == user_id:
+        return ctx["user_info"]
+    return None
+
+
+def forget_context_user(user_id: int):
+    """Сбрасывает сохранённый профиль пользователя (после изменения его данных)."""
+    ctx = _current_user.get()
+    if ctx is not None and ctx["user_id"] == user_id:
+        ctx["user_info"] = None
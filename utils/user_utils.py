@@ -1,13 +1,13 @@
 from aiogram import types, Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
-from aiogram.exceptions import TelegramBadRequest
 
 from keyboards.cancel_keyboard import get_cancel_inline_keyboard
 
 from utils.group_utils import load_groups
 
-from utils.database import get_real_user_name, check_user_exists, add_user_to_db, get_user_info
+from utils.repository import get_real_user_name, check_user_exists, add_user_to_db, get_current_user_info
+from utils.user_context import get_context_user_info
 from aiogram.types import ChatMemberAdministrator, ChatMemberOwner
 from bot import bot
 
@@ -22,7 +22,11 @@ async def get_user_name(obj) -> str:
         user = obj  # Это User
 
     user_id = user.id
-    user_name = get_real_user_name(user_id)
+    user_info = get_context_user_info(user_id)
+    if user_info is not None:
+        user_name = user_info.get("cust_user_name") or user_info.get("user_name")
+    else:
+        user_name = await get_real_user_name(user_id)
 
     # Формируем полное имя из Telegram данных
     full_name = user.full_name or f"{user.first_name or ''} {user.last_name or ''}".strip()
@@ -48,15 +52,16 @@ async def check_group_user(
        Если message передан — редактируем его, иначе отправляем новое сообщение."""
     user_id = user.id
 
-    # Проверяем, есть ли пользователь
-    existing_user = check_user_exists(user_id)
-    if not existing_user:
-        add_user_to_db(user_id, user.username, user.full_name)
+    # Проверяем, есть ли пользователь (в личных чатах уже сделано в UserContextMiddleware)
+    if get_context_user_info(user_id) is None:
+        existing_user = await check_user_exists(user_id)
+        if not existing_user:
+            await add_user_to_db(user_id, user.username, user.full_name)
 
     # Берём инфо
-    user_info = get_user_info(user_id)
+    user_info = await get_current_user_info(user_id)
     user_group, user_subgroup = user_info["user_group"], user_info["user_subgroup"]
-    user_name = get_real_user_name(user_id)
+    user_name = user_info.get("cust_user_name") or user_info.get("user_name")
 
     # Если не указаны группа или подгруппа
     if not user_group or not user_subgroup:
@@ -81,15 +86,6 @@ async def check_group_user(
 
     return True
 
-async def is_user_accessible(user_id: int) -> bool:
-    """Проверяет, доступен ли пользователь для бота."""
-    try:
-        await bot.get_chat(user_id)
-        return True
-    except TelegramBadRequest:
-        return False
-
-
 async def is_user_group_admin(user_id: int) -> str | None:
     """
     Проверяет, является ли пользователь старостой (админом) группы.